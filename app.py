@@ -2,8 +2,14 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from config.constants import SUPABASE_TABLES, CSS_STYLE, ALLOWED_DOMAIN
-from utils.data_loader import load_supabase_data, load_pointclick, load_cashplay, load_ga4, load_media_master
+from config.constants import (
+    SUPABASE_TABLES, CSS_STYLE, ALLOWED_DOMAIN,
+    RAW_RECENT_DAYS, HISTORY_DAYS, PC_HISTORY_COLUMNS, PC_MEDIA_HISTORY_COLUMNS, PC_AD_HISTORY_COLUMNS,
+)
+from utils.data_loader import (
+    load_supabase_data, prefetch_supabase_data, clear_supabase_cache, stitch_history,
+    load_pointclick, load_cashplay, load_ga4, load_media,
+)
 from dashboards import (
     render_pointclick_dashboard, render_cashplay_dashboard,
     render_pointclick_ga_dashboard, render_cashplay_ga_dashboard,
@@ -76,10 +82,123 @@ def init_session_state():
 init_session_state()
 
 
+# ============================================================
+# 데이터 로딩 (페이지별 필요 시 1회, 세션에 보관)
+# ============================================================
+def _pc_requests() -> list[tuple]:
+    """포인트클릭: 원본 최근 90일 + 원본 구간 이전 서버 측 일별 집계 (광고주 · 매체 · 광고 수)"""
+    tables = SUPABASE_TABLES["포인트클릭"]
+    return [(tables["db"], RAW_RECENT_DAYS, None)] + [
+        (tables[k], HISTORY_DAYS, RAW_RECENT_DAYS) for k in ("daily", "daily_media", "daily_ads")
+    ]
+
+
+def _cp_requests() -> list[tuple]:
+    # 캐시플레이는 날짜당 1행이므로 전체 기간을 원본으로 로드
+    return [(SUPABASE_TABLES["캐시플레이"]["db"], HISTORY_DAYS, None)]
+
+
+def _ga_requests(service: str) -> list[tuple]:
+    # 이벤트는 원본 대신 서버 측 일별 집계(date × pageTitle × eventName)로 로드
+    return [
+        (SUPABASE_TABLES[service]["ga_page"], RAW_RECENT_DAYS, None),
+        (SUPABASE_TABLES[service]["ga_user"], RAW_RECENT_DAYS, None),
+    ]
+
+
+def load_pointclick_data():
+    loaded = st.session_state['data_loaded']
+    if 'pointclick' not in loaded:
+        with st.spinner("데이터 로딩 중..."):
+            (db, db_days, _), *histories = _pc_requests()
+            recent = load_pointclick(load_supabase_data(db, recent_days=db_days))
+            loaded['pointclick'] = recent
+            for name, (table, days, before), columns in zip(
+                ('pointclick_history', 'pointclick_media_history', 'pointclick_ads_history'), histories,
+                (PC_HISTORY_COLUMNS, PC_MEDIA_HISTORY_COLUMNS, PC_AD_HISTORY_COLUMNS),
+            ):
+                history = load_pointclick(load_supabase_data(table, recent_days=days, before_days=before))
+                loaded[name] = stitch_history(recent, history, columns)
+    return tuple(loaded.get(k, pd.DataFrame()) for k in (
+        'pointclick', 'pointclick_history', 'pointclick_media_history', 'pointclick_ads_history'))
+
+
+def load_cashplay_data():
+    loaded = st.session_state['data_loaded']
+    if 'cashplay' not in loaded:
+        with st.spinner("데이터 로딩 중..."):
+            (db, days, _), = _cp_requests()
+            loaded['cashplay'] = load_cashplay(load_supabase_data(db, recent_days=days))
+    return loaded.get('cashplay', pd.DataFrame())
+
+
+def load_ga_data(service: str, key: str, label: str):
+    """GA 이벤트 집계 + 사용자 지표 (포인트클릭은 매체명을 media_master로 조회 시점에 매핑)"""
+    loaded = st.session_state['data_loaded']
+    if key not in loaded:
+        with st.spinner(f"{label} GA4 데이터 로딩 중..."):
+            try:
+                (page_table, days, _), (user_table, _, _) = _ga_requests(service)
+                media = load_media(SUPABASE_TABLES[service]["media"]) if "media" in SUPABASE_TABLES[service] else None
+                loaded[key] = load_ga4(load_supabase_data(page_table, recent_days=days), media, table=page_table)
+                loaded[f'{key}_user'] = load_ga4(load_supabase_data(user_table, recent_days=days), table=user_table)
+            except Exception as e:
+                st.error(f"GA4 데이터 로드 실패: {str(e)}")
+                loaded[key] = None
+                loaded[f'{key}_user'] = None
+    return loaded.get(key), loaded.get(f'{key}_user')
+
+
+def prefetch_all():
+    """다른 페이지 데이터를 백그라운드에서 미리 페칭 (활성 페이지 렌더링 후 호출)"""
+    for table, recent_days, before_days in (
+        _pc_requests() + _cp_requests() + _ga_requests("포인트클릭") + _ga_requests("캐시플레이")
+    ):
+        prefetch_supabase_data(table, recent_days=recent_days, before_days=before_days)
+
+
+# ============================================================
+# 페이지 (활성 페이지만 실행)
+# ============================================================
+def page_pointclick():
+    render_pointclick_dashboard(*load_pointclick_data())
+
+
+def page_cashplay():
+    render_cashplay_dashboard(load_cashplay_data())
+
+
+def page_pointclick_ga():
+    ga_df, ga_user_df = load_ga_data("포인트클릭", 'pointclick_ga', "포인트클릭")
+    if ga_df is not None:
+        render_pointclick_ga_dashboard(ga_df, ga_user_df)
+    else:
+        st.warning("GA4 데이터를 불러올 수 없습니다.")
+
+
+def page_cashplay_ga():
+    ga_df, ga_user_df = load_ga_data("캐시플레이", 'cashplay_ga', "캐시플레이")
+    if ga_df is not None:
+        render_cashplay_ga_dashboard(ga_df, ga_user_df)
+    else:
+        st.warning("GA4 데이터를 불러올 수 없습니다.")
+
+
+PAGES = [
+    st.Page(page_pointclick,    title="PointClick (B2B)", icon="🟢", url_path="pointclick", default=True),
+    st.Page(page_cashplay,      title="CashPlay (B2C)",   icon="🔵", url_path="cashplay"),
+    st.Page(page_pointclick_ga, title="PointClick GA",    icon="📊", url_path="pointclick-ga"),
+    st.Page(page_cashplay_ga,   title="CashPlay GA",      icon="📊", url_path="cashplay-ga"),
+]
+
+
 # ============================================================
 # 메인 함수
 # ============================================================
 def main():
+    # 탭과 달리 선택된 대시보드만 실행 → 전체 rerun 비용이 페이지 1개 분량
+    pg = st.navigation(PAGES, position="top")
+
     st.title("📊 E프로젝트 대시보드")
     st.caption(f"마지막 새로고침: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
 
@@ -95,6 +214,7 @@ def main():
         st.markdown("## ⚙️ 설정")
         if st.button("🔄 데이터 새로고침", width='stretch'):
             st.cache_data.clear()
+            clear_supabase_cache()
             st.session_state['data_loaded'] = {}
             # 날짜 선택기 상태도 초기화 (데이터 범위 변경 시 반영)
             date_keys = [k for k in st.session_state if k.endswith(('_di_from', '_di_to', '_seg', '_cf_from', '_cf_to', '_query_btn', '_querying'))]
@@ -103,88 +223,8 @@ def main():
             st.rerun()
         st.markdown("---")
 
-    # ── 데이터 로딩 (90일분 1회, 병렬) ───────────────────────────────────
-    needs_pc = 'pointclick' not in st.session_state['data_loaded']
-    needs_cp = 'cashplay' not in st.session_state['data_loaded']
-
-    if needs_pc or needs_cp:
-        with st.spinner("데이터 로딩 중..."):
-            def _load_pc():
-                return load_pointclick(load_supabase_data(
-                    SUPABASE_TABLES["포인트클릭"]["db"], recent_days=90
-                ))
-
-            def _load_cp():
-                return load_cashplay(load_supabase_data(
-                    SUPABASE_TABLES["캐시플레이"]["db"], recent_days=90
-                ))
-
-            if needs_pc and needs_cp:
-                st.session_state['data_loaded']['pointclick'] = _load_pc()
-                st.session_state['data_loaded']['cashplay'] = _load_cp()
-            elif needs_pc:
-                st.session_state['data_loaded']['pointclick'] = _load_pc()
-            else:
-                st.session_state['data_loaded']['cashplay'] = _load_cp()
-
-    pc_df = st.session_state['data_loaded'].get('pointclick', pd.DataFrame())
-    cp_df = st.session_state['data_loaded'].get('cashplay', pd.DataFrame())
-    # ────────────────────────────────────────────────────────────────────────
-
-    tab_pc, tab_cp, tab_pc_ga, tab_cp_ga = st.tabs([
-        "🟢 PointClick (B2B)",
-        "🔵 CashPlay (B2C)",
-        "📊 PointClick GA",
-        "📊 CashPlay GA",
-    ])
-
-    with tab_pc:
-        render_pointclick_dashboard(pc_df)
-
-    with tab_cp:
-        render_cashplay_dashboard(cp_df)
-
-    with tab_pc_ga:
-        if 'pointclick_ga' not in st.session_state['data_loaded']:
-            with st.spinner("포인트클릭 GA4 데이터 로딩 중..."):
-                try:
-                    pc_ga_raw = load_supabase_data(SUPABASE_TABLES["포인트클릭"]["ga"], recent_days=90)
-                    pc_ga_user_raw = load_supabase_data(SUPABASE_TABLES["포인트클릭"]["ga_user"], recent_days=90)
-                    st.session_state['data_loaded']['pointclick_ga'] = load_ga4(pc_ga_raw)
-                    st.session_state['data_loaded']['pointclick_ga_user'] = load_ga4(pc_ga_user_raw)
-                except Exception as e:
-                    st.error(f"GA4 데이터 로드 실패: {str(e)}")
-                    st.session_state['data_loaded']['pointclick_ga'] = None
-                    st.session_state['data_loaded']['pointclick_ga_user'] = None
-
-        pc_ga_df      = st.session_state['data_loaded'].get('pointclick_ga')
-        pc_ga_user_df = st.session_state['data_loaded'].get('pointclick_ga_user')
-
-        if pc_ga_df is not None:
-            render_pointclick_ga_dashboard(pc_ga_df, pc_ga_user_df)
-        else:
-            st.warning("GA4 데이터를 불러올 수 없습니다.")
-
-    with tab_cp_ga:
-        if 'cashplay_ga' not in st.session_state['data_loaded']:
-            with st.spinner("캐시플레이 GA4 데이터 로딩 중..."):
-                try:
-                    cp_ga_raw = load_supabase_data(SUPABASE_TABLES["캐시플레이"]["ga"], recent_days=90)
-                    cp_ga_user_raw = load_supabase_data(SUPABASE_TABLES["캐시플레이"]["ga_user"], recent_days=90)
-                    st.session_state['data_loaded']['cashplay_ga'] = load_ga4(cp_ga_raw)
-                    st.session_state['data_loaded']['cashplay_ga_user'] = load_ga4(cp_ga_user_raw)
-                except Exception as e:
-                    st.error(f"GA4 데이터 로드 실패: {str(e)}")
-                    st.session_state['data_loaded']['cashplay_ga'] = None
-                    st.session_state['data_loaded']['cashplay_ga_user'] = None
-
-        cp_ga_df      = st.session_state['data_loaded'].get('cashplay_ga')
-        cp_ga_user_df = st.session_state['data_loaded'].get('cashplay_ga_user')
-
-        if cp_ga_df is not None:
-            render_cashplay_ga_dashboard(cp_ga_df, cp_ga_user_df)
-        else:
-            st.warning("GA4 데이터를 불러올 수 없습니다.")
+    pg.run()
+    prefetch_all()
 
 
 main()
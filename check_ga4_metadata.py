@@ -3,34 +3,27 @@ GA4 API에서 사용 가능한 모든 측정기준(Dimensions)과 측정항목(M
 """
 
 import os
-import json
 import sys
 
-from google.oauth2.service_account import Credentials
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from google.analytics.data_v1beta.types import GetMetadataRequest
 
+from pipeline.ga4 import get_client, with_retries
+
 
 def get_ga4_metadata(property_id: str):
     """GA4 속성의 사용 가능한 모든 측정기준과 측정항목 조회"""
 
-    # 환경변수에서 자격증명 로드
+    # 환경변수 자격증명으로 GA4 클라이언트 생성
     try:
-        creds_json = json.loads(os.environ["GCP_SERVICE_ACCOUNT"])
+        client = get_client()
     except KeyError:
         print("❌ GCP_SERVICE_ACCOUNT 환경변수가 설정되지 않았습니다.")
         print("GitHub Actions나 터미널에서 환경변수를 설정하고 실행하세요.")
         sys.exit(1)
 
-    scopes = ["https://www.googleapis.com/auth/analytics.readonly"]
-    credentials = Credentials.from_service_account_info(creds_json, scopes=scopes)
-
-    # GA4 클라이언트 생성
-    client = BetaAnalyticsDataClient(credentials=credentials)
-
-    # 메타데이터 요청
+    # 메타데이터 요청 (일시적 오류 시 백오프 재시도)
     request = GetMetadataRequest(name=f"{property_id}/metadata")
-    response = client.get_metadata(request)
+    response = with_retries(client.get_metadata, request, label="메타데이터")
 
     # 측정기준(Dimensions) 정리
     print("\n" + "=" * 100)
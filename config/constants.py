@@ -6,15 +6,64 @@ SUPABASE_TABLES = {
         "db":      "pointclick_db",
         "ga":      "pointclick_ga",
         "ga_user": "pointclick_ga_user",
+        "ga_page": "pointclick_ga_page_daily",
+        "ga_event": "pointclick_ga_event_daily",
         "media":   "media_master",
+        "daily":   "pointclick_db_daily",
+        "daily_media": "pointclick_db_daily_media",
+        "daily_ads":   "pointclick_db_daily_ads",
     },
     "캐시플레이": {
         "db":      "cashplay_db",
         "ga":      "cashplay_ga",
         "ga_user": "cashplay_ga_user",
+        "ga_page": "cashplay_ga_page_daily",
+        "ga_event": "cashplay_ga_event_daily",
     }
 }
 
+# 로딩 범위: 최근 RAW_RECENT_DAYS일은 원본, HISTORY_DAYS일까지는 서버 측 일별 집계
+RAW_RECENT_DAYS = 90
+HISTORY_DAYS = 730
+
+# 일별 큐브 정의: 합산 지표 / 비율 지표 (분자, 분모)
+# unit_price, media_rate 등 합산이 의미 없는 컬럼은 제외하고 비율은 구성요소 합계로 계산
+PC_MEASURES = ['clicks', 'conversions', 'ad_revenue', 'media_cost', 'margin']
+PC_RATIOS = {
+    'margin_rate': ('margin', 'ad_revenue'),
+    'cvr':         ('conversions', 'clicks'),
+}
+PC_DIMS = ['ad_type', 'advertiser', 'publisher_type']
+PC_MEDIA_DIMS = ['media_name', 'publisher_type']
+PC_COUNT_DIMS = [('advertiser', 'ad_name')]   # 광고주별 광고 수
+# 과거 구간은 서버 측 일별 집계 3종을 원본 구간에 이어 붙인다 (광고 × 매체 조합은 원본 행 수만큼 늘어나므로
+# 광고주 · 매체 · 광고 수 집계로 나눔). 집계에 없는 차원은 과거 행에서 결측 → 그 차원으로 필터하면 과거 구간 제외
+PC_HISTORY_COLUMNS = ['date', 'publisher_type', 'ad_type', 'advertiser', 'media_name', 'os'] + PC_MEASURES
+PC_MEDIA_HISTORY_COLUMNS = ['date', 'publisher_type', 'advertiser', 'media_name', 'os'] + PC_MEASURES
+PC_AD_HISTORY_COLUMNS = ['date', 'publisher_type', 'advertiser', 'media_name', 'os', 'ad_name']
+# 과거 일별 집계별로 보존되는 차원 (supabase/schema.sql의 pointclick_db_daily* 뷰 그룹 키)
+PC_HISTORY_KEYS = {
+    'daily':       ['publisher_type', 'ad_type', 'advertiser', 'os'],
+    'daily_media': ['publisher_type', 'media_name', 'os'],
+    'daily_ads':   ['advertiser', 'ad_name', 'os'],
+}
+# 전역 드릴다운 필터 차원 → 표시명 (KPI · 상세 · 추이 공통 적용)
+PC_FILTER_DIMS = {'advertiser': '광고주', 'media_name': '매체', 'os': 'OS', 'publisher_type': '퍼블리셔'}
+
+CP_MEASURES = [
+    'reward_paid', 'reward_free', 'reward_total',
+    'game_direct', 'game_dsp', 'game_rs', 'game_acquisition', 'game_total',
+    'gathering_pointclick',
+    'iaa_levelplay', 'iaa_adwhale', 'iaa_hubble', 'iaa_total',
+    'offerwall_adpopcorn', 'offerwall_pointclick', 'offerwall_ive',
+    'offerwall_adforus', 'offerwall_addison', 'offerwall_adjo', 'offerwall_total',
+    'revenue_total', 'cost_total', 'margin', 'pointclick_revenue',
+]
+CP_RATIOS = {
+    'margin_rate':      ('margin', 'revenue_total'),
+    'pointclick_ratio': ('pointclick_revenue', 'revenue_total'),
+}
+
 PASTEL = {
     'blue': '#5B9BD5', 'green': '#70AD47', 'orange': '#ED7D31',
     'yellow': '#FFC000', 'purple': '#A855F7', 'red': '#E05252',
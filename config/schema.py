@@ -0,0 +1,224 @@
+"""테이블 스키마 레지스트리 (supabase/schema.sql 기준)
+
+테이블별 컬럼의 SQL 타입 · pandas dtype · 범주형 힌트 · 원본 별칭(시트 한글 헤더, GA4 customEvent:*,
+PostgreSQL 소문자 컬럼명)을 한곳에 선언한다.
+대시보드 로더(CSV 파싱 · dtype 지정), 동기화 스크립트 · 마이그레이션(행 검증 · 일괄 변환)이 함께 사용한다.
+동기화 환경(GitHub Actions)에서도 쓰이므로 pandas 등 외부 라이브러리에 의존하지 않는다.
+
+    schema = SCHEMAS["pointclick_db"]
+    schema.dtypes()                 # {'clicks': 'Int64', 'ad_type': 'category', ...}
+    schema.cast_rows(rows)          # 별칭 → 컬럼명, 타입 변환, 필수 컬럼 없는 행 제외
+"""
+from dataclasses import dataclass, field
+
+# SQL 타입 → pandas dtype
+PANDAS_DTYPES = {
+    'DATE': 'datetime64[us]', 'TEXT': 'str',
+    'INTEGER': 'Int64', 'BIGINT': 'Int64', 'NUMERIC': 'float64', 'DOUBLE PRECISION': 'float64',
+}
+INTEGER_TYPES = ('INTEGER', 'BIGINT')
+NUMERIC_TYPES = INTEGER_TYPES + ('NUMERIC', 'DOUBLE PRECISION')
+
+
+@dataclass(frozen=True)
+class Column:
+    """컬럼 1개 선언
+
+    aliases: 원본 컬럼명 (로더 · 마이그레이션에서 이 이름으로 들어오면 name으로 변경)
+    category: 저카디널리티 텍스트 → 대시보드에서 pandas category로 보관
+    nullable: False면 값이 없는 행은 적재 대상에서 제외 (date 등)
+    """
+    name: str
+    sql: str
+    aliases: tuple = ()
+    category: bool = False
+    nullable: bool = True
+
+    @property
+    def dtype(self) -> str:
+        return 'category' if self.category else PANDAS_DTYPES[self.sql]
+
+    @property
+    def numeric(self) -> bool:
+        return self.sql in NUMERIC_TYPES
+
+    @property
+    def integer(self) -> bool:
+        return self.sql in INTEGER_TYPES
+
+    def cast(self, val):
+        """원본 값 → 적재 값 (숫자: 빈 값 · '-' → 0, 천 단위 콤마 제거, 정수 컬럼은 반올림한 int /
+        텍스트: 빈 값 → None)"""
+        if self.numeric:
+            return _to_number(val, integer=self.integer)
+        if val is None:
+            return None
+        if self.sql == 'DATE':
+            text = val.strftime("%Y-%m-%d") if hasattr(val, "strftime") else str(val).strip()[:10]
+        else:
+            text = str(val)
+        return None if text in ("", "nan", "NaT", "None") else text
+
+
+def _to_number(val, integer: bool = False):
+    if val is None:
+        return 0
+    try:
+        f = float(val) if isinstance(val, (int, float)) else float(str(val).replace(",", "").strip() or 0)
+    except ValueError:   # '-' 등
+        return 0
+    if f != f or f in (float("inf"), float("-inf")):   # NaN · inf
+        return 0
+    if integer:   # 0.5는 0에서 먼 쪽으로 (PostgreSQL ROUND와 같게)
+        return int(f + 0.5) if f >= 0 else -int(-f + 0.5)
+    f = round(f, 6)
+    return int(f) if f == int(f) else f
+
+
+@dataclass
+class TableSchema:
+    """테이블 1개 선언 (컬럼 순서 = schema.sql 순서)"""
+    name: str
+    columns: list
+    key: str | None = None
+    by_name: dict = field(init=False, repr=False)
+    renames: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.by_name = {c.name: c for c in self.columns}
+        self.renames = {}
+        for c in self.columns:
+            for alias in c.aliases + ((c.name.lower(),) if c.name != c.name.lower() else ()):
+                self.renames[alias] = c.name
+
+    def names(self, include_id: bool = False) -> list[str]:
+        return [c.name for c in self.columns if include_id or c.name != 'id']
+
+    def types(self) -> dict:
+        """{컬럼명: SQL 타입}"""
+        return {c.name: c.sql for c in self.columns}
+
+    def dtypes(self) -> dict:
+        """{컬럼명: pandas dtype (범주형 힌트 반영)}"""
+        return {c.name: c.dtype for c in self.columns}
+
+    def numeric(self) -> list[str]:
+        return [c.name for c in self.columns if c.numeric]
+
+    def categories(self) -> list[str]:
+        return [c.name for c in self.columns if c.category]
+
+    def cast_rows(self, rows: list[dict]) -> list[dict]:
+        """행 dict 일괄 검증 · 변환 (별칭 → 컬럼명, 컬럼별 타입 변환, 필수 컬럼이 비면 제외)
+
+        스키마에 없는 컬럼이 있으면 적재 전에 ValueError로 알린다.
+        """
+        if not rows:
+            return []
+        names = [self.renames.get(k, k) for k in rows[0]]
+        unknown = [n for n in names if n not in self.by_name]
+        if unknown:
+            raise ValueError(f"{self.name}: 스키마에 없는 컬럼 {unknown}")
+        # 컬럼 단위로 변환 후 다시 행으로 (컬럼 조회 · 분기를 행마다 반복하지 않음)
+        keys = list(rows[0])
+        columns = [[self.by_name[n].cast(row.get(k)) for row in rows] for k, n in zip(keys, names)]
+        required = [i for i, n in enumerate(names) if not self.by_name[n].nullable]
+        return [dict(zip(names, vals)) for vals in zip(*columns)
+                if all(vals[i] is not None for i in required)]
+
+
+def _cols(sql: str, names, category: bool = False) -> list[Column]:
+    return [Column(n, sql, category=category) for n in names]
+
+
+def _aliased(sql: str, aliases: dict, category=()) -> list[Column]:
+    """{컬럼명: 원본 별칭} → 컬럼 목록"""
+    return [Column(n, sql, (a,) if a else (), n in category) for n, a in aliases.items()]
+
+
+_DATE = Column('date', 'DATE', ('날짜',), nullable=False)
+_ID = Column('id', 'BIGINT')
+
+_PC_TEXT = {
+    'ad_category': '광고구분', 'media_type': '매체타입', 'publisher_type': '퍼블리셔타입',
+    'ad_name': '광고명', 'media_name': '매체명', 'cd': 'CD', 'advertiser': '광고주명',
+    'os': 'OS', 'ad_type': '광고타입',
+}
+_PC_CATEGORY = ('ad_category', 'media_type', 'publisher_type', 'media_name', 'advertiser',
+                'os', 'ad_type', 'week', 'month')
+_CP_AMOUNTS = {
+    'reward_paid': '리워드(원)_유상', 'reward_free': '리워드(원)_무상', 'reward_total': '리워드(원)_합계',
+    'game_direct': '게임(원)_직거래', 'game_dsp': '게임(원)_DSP', 'game_rs': '게임(원)_RS',
+    'game_acquisition': '게임(원)_인수', 'game_total': '게임(원)_합계',
+    'gathering_pointclick': '게더링(원)_포인트클릭',
+    'iaa_levelplay': 'IAA(원)_레벨플레이', 'iaa_adwhale': 'IAA(원)_애드웨일',
+    'iaa_hubble': 'IAA(원)_허블', 'iaa_total': 'IAA(원)_합계',
+    'offerwall_adpopcorn': '오퍼월(원)_애드팝콘', 'offerwall_pointclick': '오퍼월(원)_포인트클릭',
+    'offerwall_ive': '오퍼월(원)_아이브', 'offerwall_adforus': '오퍼월(원)_애드포러스',
+    'offerwall_addison': '오퍼월(원)_애디슨', 'offerwall_adjo': '오퍼월(원)_애드조',
+    'offerwall_total': '오퍼월(원)_합계',
+}
+_GA_COUNTS = ['eventCount', 'sessions', 'screenPageViews']
+_GA_USER_METRICS = ['activeUsers', 'active7DayUsers', 'active28DayUsers', 'newUsers', 'sessions']
+
+
+def _pc_daily(name: str, dims: list[str]) -> TableSchema:
+    """포인트클릭 일별 집계 뷰 (건수 · 금액 합계는 BIGINT)"""
+    return TableSchema(name, [_DATE, *_cols('TEXT', dims, category=True),
+                              *_cols('BIGINT', ['clicks', 'conversions', 'ad_revenue', 'media_cost', 'margin'])])
+
+
+def _ga_event(name: str, custom: list[str]) -> TableSchema:
+    """GA4 이벤트 원본 (custom: customEvent:* 차원 → 같은 이름 컬럼)"""
+    return TableSchema(name, [
+        _ID, _DATE,
+        Column('eventName', 'TEXT', category=True), Column('pageTitle', 'TEXT'), Column('pagePath', 'TEXT'),
+        *[Column(c, 'TEXT', (f"customEvent:{c}",), category=c == 'page_type') for c in custom],
+        *_cols('BIGINT', _GA_COUNTS),
+        *_cols('DOUBLE PRECISION', ['averageSessionDuration', 'engagementRate',
+                                    'userEngagementDuration', 'session_duration']),
+    ])
+
+
+def _ga_daily(name: str, page: bool, keys: tuple = ()) -> TableSchema:
+    """GA4 일별 집계 뷰 (건수 합계는 BIGINT로 고정, keys: 조회 시점 매핑용 키 차원)"""
+    dims = [Column('pageTitle', 'TEXT')] if page else []
+    dims += [Column(k, 'TEXT') for k in keys]
+    return TableSchema(name, [_DATE, *dims, Column('eventName', 'TEXT', category=True),
+                              *_cols('BIGINT', _GA_COUNTS), Column('session_duration', 'DOUBLE PRECISION')])
+
+
+SCHEMAS = {s.name: s for s in [
+    TableSchema("pointclick_db", [
+        _ID, Column('date', 'DATE', ('일자',), nullable=False),
+        *_aliased('TEXT', _PC_TEXT, _PC_CATEGORY),
+        *_aliased('BIGINT', {'unit_price': '광고단가'}),
+        *_aliased('INTEGER', {'clicks': '클릭수', 'conversions': '전환수'}),
+        *_aliased('BIGINT', {'ad_revenue': '광고비', 'media_cost': '매체수익금'}),
+        *_aliased('DOUBLE PRECISION', {'media_rate': '매체정산비율'}),
+        *_aliased('BIGINT', {'margin': '마진금액'}),
+        *_aliased('DOUBLE PRECISION', {'margin_rate': '마진율', 'cvr': 'CVR'}),
+        *_aliased('TEXT', {'week': '주차', 'month': '월별'}, _PC_CATEGORY),
+    ]),
+    # 과거 구간 일별 집계 뷰: 원본 차원 일부 + SUM 결과 (광고주 · 매체 · 광고 수 집계로 분리)
+    _pc_daily("pointclick_db_daily", ['publisher_type', 'ad_type', 'advertiser', 'os']),
+    _pc_daily("pointclick_db_daily_media", ['publisher_type', 'media_name', 'os']),
+    TableSchema("pointclick_db_daily_ads", [
+        _DATE, Column('advertiser', 'TEXT', category=True), Column('ad_name', 'TEXT'),
+        Column('os', 'TEXT', category=True),
+    ]),
+    TableSchema("cashplay_db", [Column('date', 'DATE', ('날짜',), nullable=False),
+                                *_aliased('BIGINT', _CP_AMOUNTS)], key="date"),
+    _ga_event("pointclick_ga", ['page_name', 'page_type', 'media_key']),
+    _ga_event("cashplay_ga", ['page', 'page_type', 'button_id']),
+    TableSchema("pointclick_ga_user", [_DATE, *_cols('BIGINT', _GA_USER_METRICS)], key="date"),
+    TableSchema("cashplay_ga_user", [_DATE, *_cols('BIGINT', _GA_USER_METRICS)], key="date"),
+    _ga_daily("pointclick_ga_page_daily", page=True, keys=("media_key",)),
+    _ga_daily("pointclick_ga_event_daily", page=False),
+    _ga_daily("cashplay_ga_page_daily", page=True),
+    _ga_daily("cashplay_ga_event_daily", page=False),
+    TableSchema("media_master", [
+        Column('media_key', 'TEXT', ('매체키',), nullable=False),
+        Column('media_name', 'TEXT', ('매체명',)),
+    ], key="media_key"),
+]}
@@ -1,16 +1,30 @@
 """
 매체마스터 자동 생성 스크립트 (Supabase 버전)
-- MySQL media 테이블에서 media_key, media_name 직접 조회
-- Supabase media_master 테이블에 upsert
+- MySQL media 테이블에서 media_key, media_name 직접 조회 (스트리밍 커서)
+- (media_key, media_name) 해시를 Supabase media_master와 비교해 추가·변경된 키만 upsert
+- 삭제된 키는 감지만 하고 기본적으로 유지 (과거 GA 데이터 매핑용), --prune 시 삭제
+- 변경이 있으면 sync_state에 새 버전을 기록 → 대시보드 매체 캐시(load_media의 캐시 키) 무효화
+
+사용법:
+    python create_media_master.py            # 증분 동기화
+    python create_media_master.py --full     # 전체 upsert (버전 비교 생략)
+    python create_media_master.py --prune    # MySQL에서 삭제된 키도 제거
 """
 
 import os
 import sys
+import hashlib
+from datetime import datetime, timezone
+from functools import partial
+
 import pymysql
-from supabase import create_client
+
+from pipeline.engine import SyncSpec, mysql_extractor, retry, run
 
 TABLE_NAME = "media_master"
+STATE_TABLE = "sync_state"
 SQL_QUERY = "SELECT media_key, media_name FROM media ORDER BY media_key"
+PAGE_SIZE = 1000
 
 
 def get_mysql_connection():
@@ -21,66 +35,138 @@ def get_mysql_connection():
         password=os.environ["MYSQL_PASSWORD"],
         database=os.environ["MYSQL_DATABASE"],
         charset="utf8mb4",
-        cursorclass=pymysql.cursors.DictCursor,
+        cursorclass=pymysql.cursors.SSDictCursor,
     )
 
 
-def get_supabase_client():
-    url = os.environ["SUPABASE_URL"]
-    key = os.environ["SUPABASE_KEY"]
-    return create_client(url, key)
-
-
-def fetch_media_from_mysql() -> list:
-    """MySQL media 테이블에서 media_key, media_name 조회"""
-    conn = get_mysql_connection()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(SQL_QUERY)
-            rows = cursor.fetchall()
-    finally:
-        conn.close()
-
-    result = []
-    for row in rows:
-        result.append({
-            "media_key": str(row["media_key"]),
-            "media_name": str(row["media_name"]) if row["media_name"] else ""
-        })
+def row_hash(media_key: str, media_name: str) -> str:
+    """(media_key, media_name) 쌍의 해시"""
+    return hashlib.blake2b(f"{media_key}\x1f{media_name}".encode(), digest_size=8).hexdigest()
+
+
+def digest(hashes: dict) -> str:
+    """키 순서와 무관한 전체 다이제스트 (sync_state.version)"""
+    h = hashlib.sha256()
+    for key in sorted(hashes):
+        h.update(hashes[key].encode())
+    return h.hexdigest()
+
+
+def to_media_rows(batch: list[dict]) -> list[dict]:
+    """MySQL 행 → {media_key, media_name} (문자열, 빈 이름은 '')"""
+    return [{"media_key": str(row["media_key"]),
+             "media_name": str(row["media_name"]) if row["media_name"] else ""} for row in batch]
+
+
+def fetch_media_from_supabase(client) -> dict:
+    """Supabase media_master → {media_key: media_name}"""
+    result = {}
+    offset = 0
+    while True:
+        page = (client.table(TABLE_NAME).select("media_key,media_name")
+                .order("media_key").range(offset, offset + PAGE_SIZE - 1).execute().data or [])
+        for row in page:
+            result[row["media_key"]] = row["media_name"] or ""
+        if len(page) < PAGE_SIZE:
+            return result
+        offset += PAGE_SIZE
+
+
+def load_version(client):
+    """sync_state에 기록된 직전 버전 (없으면 None)"""
+    rows = (client.table(STATE_TABLE).select("version")
+            .eq("table_name", TABLE_NAME).limit(1).execute().data or [])
+    return rows[0]["version"] if rows else None
+
+
+def diff_media(current: dict, existing: dict) -> tuple:
+    """해시 비교로 (추가, 변경, 삭제) 키 목록 산출"""
+    cur_h = {k: row_hash(k, v) for k, v in current.items()}
+    old_h = {k: row_hash(k, v) for k, v in existing.items()}
+    added = [k for k in cur_h if k not in old_h]
+    renamed = [k for k in cur_h if k in old_h and cur_h[k] != old_h[k]]
+    removed = [k for k in old_h if k not in cur_h]
+    return added, renamed, removed
+
+
+def apply_changes(client, rows: list[dict], metrics, full: bool = False, prune: bool = False) -> int:
+    """해시 diff로 추가·변경된 키만 upsert하고 sync_state 버전 갱신 (적재 행 수 반환)"""
+    current = {row["media_key"]: row["media_name"] for row in rows}
+    print(f"[sync] MySQL에서 {len(current)}개 매체 조회 완료")
+    version = digest({k: row_hash(k, v) for k, v in current.items()})
+
+    # ── 1. 버전 비교: 직전 동기화 이후 변경이 없으면 종료 ──
+    metrics.add(requests=1)
+    if not full and load_version(client) == version:
+        print(f"[sync] 변경 없음 (version {version[:12]})")
+        return 0
+
+    # ── 2. 키 단위 diff ──
+    if full:
+        added, renamed, removed = list(current), [], []
+    else:
+        added, renamed, removed = diff_media(current, fetch_media_from_supabase(client))
+    print(f"[sync] 추가 {len(added)}개 / 변경 {len(renamed)}개 / 삭제 {len(removed)}개")
+
+    # ── 3. 추가·변경된 키만 upsert ──
+    upserts = [{"media_key": k, "media_name": current[k]} for k in added + renamed]
+    chunk_size = 500
+    for i in range(0, len(upserts), chunk_size):
+        retry(client.table(TABLE_NAME).upsert(upserts[i:i + chunk_size], on_conflict="media_key").execute,
+              label=f"{TABLE_NAME} upsert", metrics=metrics)
+        metrics.add(requests=1, loaded=len(upserts[i:i + chunk_size]))
+    if upserts:
+        print(f"[sync] Supabase {TABLE_NAME}에 {len(upserts)}개 매체 upsert 완료")
+
+    # ── 4. 삭제된 키: 기본은 유지 (과거 GA 데이터의 매체명 매핑용) ──
+    if removed:
+        if prune:
+            for i in range(0, len(removed), chunk_size):
+                retry(client.table(TABLE_NAME).delete().in_("media_key", removed[i:i + chunk_size]).execute,
+                      label=f"{TABLE_NAME} 삭제", metrics=metrics)
+                metrics.add(requests=1)
+            print(f"[sync] {len(removed)}개 매체 삭제 완료")
+        else:
+            print(f"[warn] MySQL에서 삭제된 매체 {len(removed)}개 유지 (--prune 시 삭제): {removed[:5]}")
+
+    # ── 5. 버전 기록 → 대시보드 매체 캐시 무효화 ──
+    client.table(STATE_TABLE).upsert({
+        "table_name": TABLE_NAME,
+        "version": version,
+        "row_count": len(current),
+        "changed": len(added) + len(renamed) + (len(removed) if prune else 0),
+        "synced_at": datetime.now(timezone.utc).isoformat(),
+    }, on_conflict="table_name").execute()
+    metrics.add(requests=1)
+    print(f"[sync] {STATE_TABLE} 버전 갱신: {version[:12]}")
 
-    print(f"[sync] MySQL에서 {len(result)}개 매체 조회 완료")
-    return result
+    # 샘플 출력
+    if renamed:
+        print("\n[변경된 매체]")
+        for k in renamed[:5]:
+            print(f"  {k:20} | {current[k]}")
+    return len(upserts)
 
 
 def main():
-    print(f"[sync] 매체마스터 자동 생성 시작")
-
-    rows = fetch_media_from_mysql()
+    full = "--full" in sys.argv
+    prune = "--prune" in sys.argv
+    print(f"[sync] 매체마스터 동기화 시작 ({'전체' if full else '증분'})")
+
+    spec = SyncSpec(
+        name="매체마스터",
+        table=TABLE_NAME,
+        extract=mysql_extractor(SQL_QUERY, get_mysql_connection),
+        transform=to_media_rows,
+        load=partial(apply_changes, full=full, prune=prune),
+    )
+    metrics = run(spec, [])
 
-    if not rows:
+    if not metrics.extracted:
         print("[ERROR] MySQL media 테이블에 데이터가 없습니다.")
         return
 
-    client = get_supabase_client()
-
-    # upsert: media_key 기준으로 insert or update
-    chunk_size = 500
-    total = 0
-    for i in range(0, len(rows), chunk_size):
-        chunk = rows[i:i + chunk_size]
-        client.table(TABLE_NAME).upsert(chunk, on_conflict="media_key").execute()
-        total += len(chunk)
-
-    print(f"[sync] Supabase {TABLE_NAME}에 {total}개 매체 upsert 완료")
-
-    # 샘플 출력
-    print("\n[샘플 데이터]")
-    for row in rows[:5]:
-        print(f"  {row['media_key']:20} | {row['media_name']}")
-    if len(rows) > 5:
-        print(f"  ... (총 {len(rows)}개)")
-
-    print(f"\n[완료] 매체마스터 생성 완료!")
+    print(f"\n[완료] 매체마스터 동기화 완료!")
 
 
 if __name__ == "__main__":
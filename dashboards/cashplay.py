@@ -5,11 +5,144 @@ import plotly.express as px
 import plotly.graph_objects as go
 from contextlib import nullcontext
 from utils import (
-    safe_divide, get_comparison_metrics, make_weekly,
+    safe_divide, make_periodic, PERIOD_FREQS, get_daily_cube, COMPARE_MODES, data_version,
     format_won, format_number, format_pct,
-    apply_layout, set_y_korean_ticks, week_label, quick_date_picker
+    apply_layout, set_y_korean_ticks, period_label, quick_date_picker, cached_figure, export_buttons,
+    persist_widget_state
 )
-from config.constants import PASTEL
+from config.constants import CP_MEASURES, CP_RATIOS, PASTEL
+
+CP_DETAIL_VIEWS = {"game": "🎮 게임", "gathering": "🔗 게더링", "iaa": "📺 IAA",
+                   "offerwall": "📱 오퍼월", "reward": "💸 리워드", "all": "📋 전체"}
+
+# 표 뷰별 (컬럼 순서, 표시명) — 첫 컬럼은 date, 마지막 컬럼은 합계 (차트는 중간 컬럼 스택, 자사 우선)
+CP_DETAIL_COLUMNS = {
+    "game": (['date','game_direct','game_dsp','game_rs','game_acquisition','game_total'],
+             {'date':'날짜','game_direct':'직거래','game_dsp':'DSP','game_rs':'RS','game_acquisition':'인수','game_total':'합계'}),
+    "gathering": (['date','gathering_pointclick'], {'date':'날짜','gathering_pointclick':'포인트클릭'}),
+    "iaa": (['date','iaa_levelplay','iaa_adwhale','iaa_hubble','iaa_total'],
+            {'date':'날짜','iaa_levelplay':'레벨플레이','iaa_adwhale':'애드웨일','iaa_hubble':'허블','iaa_total':'합계'}),
+    "offerwall": (['date','offerwall_adpopcorn','offerwall_pointclick','offerwall_ive',
+                   'offerwall_adforus','offerwall_addison','offerwall_adjo','offerwall_total'],
+                  {'date':'날짜','offerwall_adpopcorn':'애드팝콘','offerwall_pointclick':'⭐포인트클릭',
+                   'offerwall_ive':'아이브','offerwall_adforus':'애드포러스','offerwall_addison':'애디슨','offerwall_adjo':'애드조','offerwall_total':'합계'}),
+}
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _cp_detail_table(version: str, kf, kt, view: str, _cube) -> pd.DataFrame:
+    """매출 상세 뷰 1개의 표시용 표 (데이터 버전 · 기간 · 뷰별로 1회 계산, 세션 간 공유)"""
+    kdf = _cube.daily(kf, kt).sort_values('date', ascending=False)
+    if view in CP_DETAIL_COLUMNS:
+        cols, names = CP_DETAIL_COLUMNS[view]
+        d = kdf[cols].copy()
+        d['date'] = d['date'].dt.strftime('%Y-%m-%d')
+        for c in cols[1:]:
+            d[c] = d[c].apply(lambda x: f"{x:,.0f}")
+        return d.rename(columns=names)
+
+    d = kdf.copy()
+    d['date'] = d['date'].dt.strftime('%Y-%m-%d')
+    for c in [col for col in d.columns if col != 'date']:
+        if pd.api.types.is_numeric_dtype(kdf[c]):
+            if 'rate' in c or 'ratio' in c:
+                d[c] = d[c].apply(lambda x: f"{x:.1f}%")
+            else:
+                d[c] = d[c].apply(lambda x: f"{x:,.0f}")
+    return d
+
+
+def _cp_mix_figures(kdf: pd.DataFrame, tot) -> tuple:
+    """카테고리 파이 · 일별 매출 구성 · 자사/외부 막대 · 자사 일별 스택"""
+    cats = {'게임': tot['game_total'], '게더링': tot['gathering_pointclick'],
+        'IAA': tot['iaa_total'], '오퍼월': tot['offerwall_total']}
+    cdf_pie = pd.DataFrame({'category': cats.keys(), 'amount': cats.values()})
+    fig_p = px.pie(cdf_pie, values='amount', names='category',
+        color_discrete_sequence=[PASTEL['game'], PASTEL['gathering'], PASTEL['iaa'], PASTEL['offerwall']], hole=0.5)
+    fig_p.update_traces(textinfo='label+percent', textfont_size=11,
+        hovertemplate="<b>%{label}</b><br>%{value:,.0f}원 (%{percent})<extra></extra>")
+    fig_p.update_layout(height=360, margin=dict(t=25,b=10), showlegend=False,
+        title_text="카테고리별 매출", title_font=dict(size=12), paper_bgcolor="rgba(0,0,0,0)")
+
+    fig_s = go.Figure()
+    for nm, col, clr in [('게임','game_total',PASTEL['game']),('게더링','gathering_pointclick',PASTEL['gathering']),
+                          ('IAA','iaa_total',PASTEL['iaa']),('오퍼월','offerwall_total',PASTEL['offerwall'])]:
+        fig_s.add_trace(go.Bar(x=kdf['date'], y=kdf[col], name=nm, marker_color=clr,
+            hovertemplate=f"<b>{nm}</b><br>%{{x|%m/%d}}: %{{y:,.0f}}원<extra></extra>"))
+    apply_layout(fig_s, dict(barmode='stack', height=360, title_text="일별 매출 구성", title_font=dict(size=12)))
+    set_y_korean_ticks(fig_s, kdf['revenue_total'].tolist())
+
+    pcr = tot['pointclick_revenue']
+    ext = tot['revenue_total'] - pcr
+    fig_b = go.Figure()
+    fig_b.add_trace(go.Bar(x=['자사(포인트클릭)'], y=[pcr], marker_color=PASTEL['pc_highlight'],
+        text=[format_won(pcr)], textposition='auto', width=0.35, hovertemplate="자사: %{y:,.0f}원<extra></extra>"))
+    fig_b.add_trace(go.Bar(x=['외부 매체'], y=[ext], marker_color=PASTEL['gray'],
+        text=[format_won(ext)], textposition='auto', width=0.35, hovertemplate="외부: %{y:,.0f}원<extra></extra>"))
+    apply_layout(fig_b, dict(height=330, showlegend=False))
+    set_y_korean_ticks(fig_b, [pcr, ext])
+
+    fig_dd = go.Figure()
+    fig_dd.add_trace(go.Bar(x=kdf['date'], y=kdf['gathering_pointclick'], name='게더링(PC)',
+        marker_color=PASTEL['red'], hovertemplate="게더링: %{y:,.0f}원<extra></extra>"))
+    fig_dd.add_trace(go.Bar(x=kdf['date'], y=kdf['offerwall_pointclick'], name='오퍼월(PC)',
+        marker_color=PASTEL['pink'], hovertemplate="오퍼월: %{y:,.0f}원<extra></extra>"))
+    apply_layout(fig_dd, dict(barmode='stack', height=330))
+    return fig_p, fig_s, fig_b, fig_dd
+
+
+def _cp_stack_figure(kdf: pd.DataFrame, view: str):
+    """매출 상세 뷰의 매체별 일별 스택 (합계 컬럼 제외)"""
+    cols, names = CP_DETAIL_COLUMNS[view]
+    fig_v = go.Figure()
+    for col in sorted(cols[1:-1], key=lambda c: c != 'offerwall_pointclick'):
+        nm = names[col]
+        kw = dict(marker_color=PASTEL['pc_highlight']) if col == 'offerwall_pointclick' else {}
+        fig_v.add_trace(go.Bar(x=kdf['date'], y=kdf[col], name=nm, hovertemplate=f"{nm}: %{{y:,.0f}}원<extra></extra>", **kw))
+    apply_layout(fig_v, dict(barmode='stack', height=330))
+    return fig_v
+
+
+def _cp_reward_figures(kdf: pd.DataFrame, tot) -> tuple:
+    """유상/무상 리워드 일별 스택 + 비율 파이"""
+    fig_rw = go.Figure()
+    fig_rw.add_trace(go.Bar(x=kdf['date'], y=kdf['reward_paid'], name='유상',
+        marker_color=PASTEL['red'], hovertemplate="유상: %{y:,.0f}원<extra></extra>"))
+    fig_rw.add_trace(go.Bar(x=kdf['date'], y=kdf['reward_free'], name='무상',
+        marker_color=PASTEL['orange'], hovertemplate="무상: %{y:,.0f}원<extra></extra>"))
+    apply_layout(fig_rw, dict(barmode='stack', height=330))
+
+    fig_rp = px.pie(values=[tot['reward_paid'], tot['reward_free']], names=['유상','무상'],
+        color_discrete_sequence=[PASTEL['red'], PASTEL['orange']], hole=0.5)
+    fig_rp.update_traces(textinfo='label+percent+value', hovertemplate="<b>%{label}</b><br>%{value:,.0f}원 (%{percent})<extra></extra>")
+    fig_rp.update_layout(height=330, margin=dict(t=25,b=10), title_text="유상/무상 비율",
+        title_font=dict(size=12), paper_bgcolor="rgba(0,0,0,0)")
+    return fig_rw, fig_rp
+
+
+def _cp_trend_figure(cube, tf, tt, freq: str):
+    """매출 · 매입(음수) · 마진 기간별 차트 (집계 구간 없으면 None)"""
+    w = make_periodic(cube.daily(tf, tt)[['date'] + cube.measures], freq=freq)
+    if w.empty:
+        return None
+
+    w['margin_rate'] = w.apply(lambda row: safe_divide(row['margin'], row['revenue_total'], default=0, scale=100), axis=1)
+    w['wl'] = w['period'].apply(period_label, freq=freq)
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=w['wl'], y=w['revenue_total'], name='총 매출',
+        marker_color=PASTEL['blue'], opacity=0.75, hovertemplate="매출: %{y:,.0f}원<extra></extra>"))
+    fig.add_trace(go.Bar(x=w['wl'], y=-w['cost_total'], name='매입(리워드)', marker_color=PASTEL['red'], opacity=0.75, customdata=w['cost_total'],
+        hovertemplate="매입: %{customdata:,.0f}원<extra></extra>"))
+    fig.add_trace(go.Scatter(x=w['wl'], y=w['margin'], name='마진', mode='lines+markers+text',
+        text=[format_won(v) for v in w['margin']], textposition='top center',
+        textfont=dict(size=9, color=PASTEL['green']),
+        line=dict(color=PASTEL['green'], width=2.5), marker=dict(size=7, color=PASTEL['green']),
+        hovertemplate="마진: %{y:,.0f}원<extra></extra>"))
+    apply_layout(fig, dict(barmode='relative', height=400, xaxis_tickangle=-45))
+    all_vals = list(w['revenue_total']) + list(-w['cost_total']) + list(w['margin'])
+    set_y_korean_ticks(fig, all_vals)
+    return fig
 
 
 def render_cashplay_dashboard(df: pd.DataFrame):
@@ -24,214 +157,100 @@ def render_cashplay_dashboard(df: pd.DataFrame):
         st.error("날짜 데이터를 처리할 수 없습니다.")
         return
 
+    # 데이터 버전별 1회 생성되는 일별 누적합 큐브 (KPI · 상세 · 추이 공용)
+    cube = get_daily_cube(df, CP_MEASURES, CP_RATIOS)
+    version = data_version(df)
+
     @st.fragment
     def cp_kpi_section():
         st.markdown("## 📈 핵심 지표")
         kf, kt, queried = quick_date_picker(dmin, dmax, "cp_kpi", "어제")
+        mode = st.segmented_control("비교 기준", options=list(COMPARE_MODES.keys()),
+            format_func=COMPARE_MODES.get, key="cp_kpi_cmp_mode", default="prev") or "prev"
         with (st.spinner("조회 중...") if queried else nullcontext()):
-            kdf = df[(df['date'].dt.date >= kf) & (df['date'].dt.date <= kt)]
-            curr_sums, prev_sums, get_delta, get_rate_delta = get_comparison_metrics(df, kf, kt)
+            cmp = cube.compare(kf, kt, mode)
 
-            if kdf.empty:
+            if not cmp.has_data:
                 st.info("선택한 기간에 데이터가 없습니다.")
             else:
-                tr = curr_sums.get('revenue_total', 0)
-                tc = curr_sums.get('cost_total', 0)
-                tm = curr_sums.get('margin', 0)
-                amr = safe_divide(tm, tr, default=0, scale=100)
-                tpc = curr_sums.get('pointclick_revenue', 0)
-                apcr = safe_divide(tpc, tr, default=0, scale=100)
-
                 m1,m2,m3,m4,m5 = st.columns(5)
-                m1.metric("총 매출", format_won(tr), delta=f"{get_delta('revenue_total'):+.1f}%")
-                m2.metric("매입(리워드)", format_won(tc), delta=f"{get_delta('cost_total'):+.1f}%")
-                m3.metric("마진", format_won(tm), delta=f"{get_delta('margin'):+.1f}%")
-                m4.metric("마진율", format_pct(amr), delta=f"{get_rate_delta('margin', 'revenue_total'):+.1f}%p")
-                m5.metric("🌟 자사 비중", format_pct(apcr), delta=f"{get_rate_delta('pointclick_revenue', 'revenue_total'):+.1f}%p")
+                m1.metric("총 매출", format_won(cmp.value('revenue_total')), delta=f"{cmp.delta('revenue_total'):+.1f}%")
+                m2.metric("매입(리워드)", format_won(cmp.value('cost_total')), delta=f"{cmp.delta('cost_total'):+.1f}%")
+                m3.metric("마진", format_won(cmp.value('margin')), delta=f"{cmp.delta('margin'):+.1f}%")
+                m4.metric("마진율", format_pct(cmp.value('margin_rate')), delta=f"{cmp.delta('margin_rate'):+.1f}%p")
+                m5.metric("🌟 자사 비중", format_pct(cmp.value('pointclick_ratio')), delta=f"{cmp.delta('pointclick_ratio'):+.1f}%p")
 
     @st.fragment
     def cp_detail_section():
         st.markdown("## 🔎 상세 분석")
+        persist_widget_state({'cp_detail_view': "game"})
         kf, kt, queried = quick_date_picker(dmin, dmax, "cp_detail", "전주")
         with (st.spinner("조회 중...") if queried else nullcontext()):
-            kdf = df[(df['date'].dt.date >= kf) & (df['date'].dt.date <= kt)]
+            kdf = cube.daily(kf, kt)
+            tot = cube.totals(kf, kt)
             st.caption(f"📅 {kf} ~ {kt}")
 
             if kdf.empty:
                 st.info("선택한 기간에 데이터가 없습니다.")
                 return
 
+            key = (version, kf, kt)
+            fig_p, fig_s, fig_b, fig_dd = cached_figure(key + ("cp_mix",), lambda: _cp_mix_figures(kdf, tot))
+
             st.markdown("### 📊 매출 구성 분석")
             col1, col2 = st.columns(2)
             with col1:
-                cats = {'게임': kdf['game_total'].sum(), '게더링': kdf['gathering_pointclick'].sum(),
-                    'IAA': kdf['iaa_total'].sum(), '오퍼월': kdf['offerwall_total'].sum()}
-                cdf_pie = pd.DataFrame({'category': cats.keys(), 'amount': cats.values()})
-                fig_p = px.pie(cdf_pie, values='amount', names='category',
-                    color_discrete_sequence=[PASTEL['game'], PASTEL['gathering'], PASTEL['iaa'], PASTEL['offerwall']], hole=0.5)
-                fig_p.update_traces(textinfo='label+percent', textfont_size=11,
-                    hovertemplate="<b>%{label}</b><br>%{value:,.0f}원 (%{percent})<extra></extra>")
-                fig_p.update_layout(height=360, margin=dict(t=25,b=10), showlegend=False,
-                    title_text="카테고리별 매출", title_font=dict(size=12), paper_bgcolor="rgba(0,0,0,0)")
                 st.plotly_chart(fig_p, width='stretch')
-
             with col2:
-                ks2 = kdf.sort_values('date')
-                fig_s = go.Figure()
-                for nm, col, clr in [('게임','game_total',PASTEL['game']),('게더링','gathering_pointclick',PASTEL['gathering']),
-                                      ('IAA','iaa_total',PASTEL['iaa']),('오퍼월','offerwall_total',PASTEL['offerwall'])]:
-                    fig_s.add_trace(go.Bar(x=ks2['date'], y=ks2[col], name=nm, marker_color=clr,
-                        hovertemplate=f"<b>{nm}</b><br>%{{x|%m/%d}}: %{{y:,.0f}}원<extra></extra>"))
-                apply_layout(fig_s, dict(barmode='stack', height=360, title_text="일별 매출 구성", title_font=dict(size=12)))
-                set_y_korean_ticks(fig_s, ks2['revenue_total'].tolist())
                 st.plotly_chart(fig_s, width='stretch')
 
             st.markdown("### 🌟 자사 서비스(포인트클릭) 기여도")
-            pcr = kdf['pointclick_revenue'].sum()
-            ext = kdf['revenue_total'].sum() - pcr
             c3, c4 = st.columns(2)
-
             with c3:
-                fig_b = go.Figure()
-                fig_b.add_trace(go.Bar(x=['자사(포인트클릭)'], y=[pcr], marker_color=PASTEL['pc_highlight'],
-                    text=[format_won(pcr)], textposition='auto', width=0.35, hovertemplate="자사: %{y:,.0f}원<extra></extra>"))
-                fig_b.add_trace(go.Bar(x=['외부 매체'], y=[ext], marker_color=PASTEL['gray'],
-                    text=[format_won(ext)], textposition='auto', width=0.35, hovertemplate="외부: %{y:,.0f}원<extra></extra>"))
-                apply_layout(fig_b, dict(height=330, showlegend=False))
-                set_y_korean_ticks(fig_b, [pcr, ext])
                 st.plotly_chart(fig_b, width='stretch')
-
             with c4:
-                ks3 = kdf.sort_values('date')
-                fig_dd = go.Figure()
-                fig_dd.add_trace(go.Bar(x=ks3['date'], y=ks3['gathering_pointclick'], name='게더링(PC)',
-                    marker_color=PASTEL['red'], hovertemplate="게더링: %{y:,.0f}원<extra></extra>"))
-                fig_dd.add_trace(go.Bar(x=ks3['date'], y=ks3['offerwall_pointclick'], name='오퍼월(PC)',
-                    marker_color=PASTEL['pink'], hovertemplate="오퍼월: %{y:,.0f}원<extra></extra>"))
-                apply_layout(fig_dd, dict(barmode='stack', height=330))
                 st.plotly_chart(fig_dd, width='stretch')
 
-            total_all = kdf['revenue_total'].sum()
-            pc_r = safe_divide(pcr, total_all, default=0, scale=100)
-            st.info(f"**자사 매출** – 게더링: **{format_won(kdf['gathering_pointclick'].sum())}** · "
-                f"오퍼월: **{format_won(kdf['offerwall_pointclick'].sum())}** · "
+            pcr = tot['pointclick_revenue']
+            pc_r = safe_divide(pcr, tot['revenue_total'], default=0, scale=100)
+            st.info(f"**자사 매출** – 게더링: **{format_won(tot['gathering_pointclick'])}** · "
+                f"오퍼월: **{format_won(tot['offerwall_pointclick'])}** · "
                 f"합계: **{format_won(pcr)}** (전체의 **{format_pct(pc_r)}**)")
 
             st.markdown("### 📋 매출 상세")
-            dt1, dt2, dt3, dt4, dt5, dt6 = st.tabs(["🎮 게임", "🔗 게더링", "📺 IAA", "📱 오퍼월", "💸 리워드", "📋 전체"])
-
-            with dt1:
-                cols_g = ['date','game_direct','game_dsp','game_rs','game_acquisition','game_total']
-                dg = kdf[cols_g].copy().sort_values('date', ascending=False)
-                dg['date'] = dg['date'].dt.strftime('%Y-%m-%d')
-                for c in cols_g[1:]: dg[c] = dg[c].apply(lambda x: f"{x:,.0f}")
-                st.dataframe(dg.rename(columns={'date':'날짜','game_direct':'직거래','game_dsp':'DSP','game_rs':'RS','game_acquisition':'인수','game_total':'합계'}),
-                    width='stretch', hide_index=True)
-                gs = kdf.sort_values('date')
-                fig_g = go.Figure()
-                for nm, col in [('직거래','game_direct'),('DSP','game_dsp'),('RS','game_rs'),('인수','game_acquisition')]:
-                    fig_g.add_trace(go.Bar(x=gs['date'], y=gs[col], name=nm, hovertemplate=f"{nm}: %{{y:,.0f}}원<extra></extra>"))
-                apply_layout(fig_g, dict(barmode='stack', height=330))
-                st.plotly_chart(fig_g, width='stretch')
-
-            with dt2:
-                dgt = kdf[['date','gathering_pointclick']].copy().sort_values('date', ascending=False)
-                dgt['date'] = dgt['date'].dt.strftime('%Y-%m-%d')
-                dgt['gathering_pointclick'] = dgt['gathering_pointclick'].apply(lambda x: f"{x:,.0f}")
-                st.dataframe(dgt.rename(columns={'date':'날짜','gathering_pointclick':'포인트클릭'}), width='stretch', hide_index=True)
-
-            with dt3:
-                cols_i = ['date','iaa_levelplay','iaa_adwhale','iaa_hubble','iaa_total']
-                di = kdf[cols_i].copy().sort_values('date', ascending=False)
-                di['date'] = di['date'].dt.strftime('%Y-%m-%d')
-                for c in cols_i[1:]: di[c] = di[c].apply(lambda x: f"{x:,.0f}")
-                st.dataframe(di.rename(columns={'date':'날짜','iaa_levelplay':'레벨플레이','iaa_adwhale':'애드웨일','iaa_hubble':'허블','iaa_total':'합계'}),
-                    width='stretch', hide_index=True)
-                ias = kdf.sort_values('date')
-                fig_i = go.Figure()
-                for nm, col in [('레벨플레이','iaa_levelplay'),('애드웨일','iaa_adwhale'),('허블','iaa_hubble')]:
-                    fig_i.add_trace(go.Bar(x=ias['date'], y=ias[col], name=nm, hovertemplate=f"{nm}: %{{y:,.0f}}원<extra></extra>"))
-                apply_layout(fig_i, dict(barmode='stack', height=330))
-                st.plotly_chart(fig_i, width='stretch')
-
-            with dt4:
-                cols_o = ['date','offerwall_adpopcorn','offerwall_pointclick','offerwall_ive',
-                          'offerwall_adforus','offerwall_addison','offerwall_adjo','offerwall_total']
-                do = kdf[cols_o].copy().sort_values('date', ascending=False)
-                do['date'] = do['date'].dt.strftime('%Y-%m-%d')
-                for c in cols_o[1:]: do[c] = do[c].apply(lambda x: f"{x:,.0f}")
-                st.dataframe(do.rename(columns={'date':'날짜','offerwall_adpopcorn':'애드팝콘','offerwall_pointclick':'⭐포인트클릭',
-                    'offerwall_ive':'아이브','offerwall_adforus':'애드포러스','offerwall_addison':'애디슨','offerwall_adjo':'애드조','offerwall_total':'합계'}),
-                    width='stretch', hide_index=True)
-                ows = kdf.sort_values('date')
-                fig_o = go.Figure()
-                traces = [('⭐포인트클릭','offerwall_pointclick',PASTEL['pc_highlight']),('애드팝콘','offerwall_adpopcorn',None),
-                          ('아이브','offerwall_ive',None),('애드포러스','offerwall_adforus',None),('애디슨','offerwall_addison',None),('애드조','offerwall_adjo',None)]
-                for nm, col, clr in traces:
-                    kw = dict(marker_color=clr) if clr else {}
-                    fig_o.add_trace(go.Bar(x=ows['date'], y=ows[col], name=nm, hovertemplate=f"{nm}: %{{y:,.0f}}원<extra></extra>", **kw))
-                apply_layout(fig_o, dict(barmode='stack', height=330))
-                st.plotly_chart(fig_o, width='stretch')
-
-            with dt5:
+            view = st.segmented_control("보기", options=list(CP_DETAIL_VIEWS.keys()),
+                format_func=CP_DETAIL_VIEWS.get, key="cp_detail_view",
+                label_visibility="collapsed") or "game"
+
+            # 선택한 뷰만 계산 (데이터 버전 · 기간 · 뷰별 메모)
+            if view in CP_DETAIL_COLUMNS:
+                st.dataframe(_cp_detail_table(version, kf, kt, view, cube), width='stretch', hide_index=True)
+                if view != "gathering":
+                    st.plotly_chart(cached_figure(key + ("cp_detail", view), lambda: _cp_stack_figure(kdf, view)),
+                                    width='stretch')
+
+            elif view == "reward":
+                fig_rw, fig_rp = cached_figure(key + ("cp_detail", view), lambda: _cp_reward_figures(kdf, tot))
                 rw1, rw2 = st.columns(2)
                 with rw1:
-                    rws = kdf.sort_values('date')
-                    fig_rw = go.Figure()
-                    fig_rw.add_trace(go.Bar(x=rws['date'], y=rws['reward_paid'], name='유상',
-                        marker_color=PASTEL['red'], hovertemplate="유상: %{y:,.0f}원<extra></extra>"))
-                    fig_rw.add_trace(go.Bar(x=rws['date'], y=rws['reward_free'], name='무상',
-                        marker_color=PASTEL['orange'], hovertemplate="무상: %{y:,.0f}원<extra></extra>"))
-                    apply_layout(fig_rw, dict(barmode='stack', height=330))
                     st.plotly_chart(fig_rw, width='stretch')
                 with rw2:
-                    fig_rp = px.pie(values=[kdf['reward_paid'].sum(), kdf['reward_free'].sum()], names=['유상','무상'],
-                        color_discrete_sequence=[PASTEL['red'], PASTEL['orange']], hole=0.5)
-                    fig_rp.update_traces(textinfo='label+percent+value', hovertemplate="<b>%{label}</b><br>%{value:,.0f}원 (%{percent})<extra></extra>")
-                    fig_rp.update_layout(height=330, margin=dict(t=25,b=10), title_text="유상/무상 비율",
-                        title_font=dict(size=12), paper_bgcolor="rgba(0,0,0,0)")
                     st.plotly_chart(fig_rp, width='stretch')
 
-            with dt6:
-                full = kdf.copy().sort_values('date', ascending=False)
-                fd = full.copy()
-                fd['date'] = fd['date'].dt.strftime('%Y-%m-%d')
-                for c in [col for col in fd.columns if col != 'date']:
-                    if pd.api.types.is_numeric_dtype(full[c]):
-                        if 'rate' in c or 'ratio' in c:
-                            fd[c] = fd[c].apply(lambda x: f"{x:.1f}%")
-                        else:
-                            fd[c] = fd[c].apply(lambda x: f"{x:,.0f}")
-                st.dataframe(fd, width='stretch', hide_index=True, height=500)
-                csv = full.to_csv(index=False).encode('utf-8-sig')
-                st.download_button("📥 CSV 다운로드", csv, file_name=f"캐시플레이_{kf}_{kt}.csv", mime="text/csv")
+            else:
+                st.dataframe(_cp_detail_table(version, kf, kt, view, cube), width='stretch', hide_index=True, height=500)
+                export_buttons(kdf.sort_values('date', ascending=False), key, f"캐시플레이_{kf}_{kt}")
 
     @st.fragment
     def cp_trend_section():
-        st.markdown("## 💰 매출 · 비용 · 마진 추이 (주단위, 월요일 기준)")
+        st.markdown("## 💰 매출 · 비용 · 마진 추이")
         tf, tt, queried = quick_date_picker(dmin, dmax, "cp_tr", "이전달1일")
+        freq = st.segmented_control("집계 단위", options=list(PERIOD_FREQS.keys()),
+            format_func=PERIOD_FREQS.get, key="cp_tr_freq", default="W") or "W"
         with (st.spinner("조회 중...") if queried else nullcontext()):
-            tdf = df[(df['date'].dt.date >= tf) & (df['date'].dt.date <= tt)]
-
-            if not tdf.empty:
-                w = make_weekly(tdf)
-                if not w.empty:
-                    w['margin_rate'] = w.apply(lambda row: safe_divide(row['margin'], row['revenue_total'], default=0, scale=100), axis=1)
-                    w['wl'] = w['week'].apply(week_label)
-
-                    fig = go.Figure()
-                    fig.add_trace(go.Bar(x=w['wl'], y=w['revenue_total'], name='총 매출',
-                        marker_color=PASTEL['blue'], opacity=0.75, hovertemplate="매출: %{y:,.0f}원<extra></extra>"))
-                    fig.add_trace(go.Bar(x=w['wl'], y=-w['cost_total'], name='매입(리워드)', marker_color=PASTEL['red'], opacity=0.75, customdata=w['cost_total'],
-                        hovertemplate="매입: %{customdata:,.0f}원<extra></extra>"))
-                    fig.add_trace(go.Scatter(x=w['wl'], y=w['margin'], name='마진', mode='lines+markers+text',
-                        text=[format_won(v) for v in w['margin']], textposition='top center',
-                        textfont=dict(size=9, color=PASTEL['green']),
-                        line=dict(color=PASTEL['green'], width=2.5), marker=dict(size=7, color=PASTEL['green']),
-                        hovertemplate="마진: %{y:,.0f}원<extra></extra>"))
-                    apply_layout(fig, dict(barmode='relative', height=400, xaxis_tickangle=-45))
-                    all_vals = list(w['revenue_total']) + list(-w['cost_total']) + list(w['margin'])
-                    set_y_korean_ticks(fig, all_vals)
+            if cube.row_count(tf, tt) > 0:
+                fig = cached_figure((version, "cp_trend", tf, tt, freq), lambda: _cp_trend_figure(cube, tf, tt, freq))
+                if fig is not None:
                     st.plotly_chart(fig, width='stretch')
 
     cp_kpi_section()
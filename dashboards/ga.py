@@ -0,0 +1,500 @@
+"""GA4 대시보드 공통 렌더러 (포인트클릭 / 캐시플레이)"""
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+from contextlib import nullcontext
+from datetime import date, timedelta
+from config.constants import PASTEL, CHART_LAYOUT
+from utils import (
+    get_ga_cube, get_daily_cube, GA_USER_METRICS, COMPARE_MODES, shift_window,
+    safe_divide, quick_date_picker, data_version, cached_figure
+)
+
+
+# ── 서비스별 표시 설정 ────────────────────────────────────────────
+GA_THEMES = {
+    "pointclick": {
+        "title": "PointClick GA",
+        "key": "pc_ga",
+        "trend_line": PASTEL['blue'],
+        "trend_fill": 'rgba(91,155,213,0.12)',
+        "trend_bar": 'rgba(112,173,71,0.45)',
+        "pv_bar": PASTEL['blue'],
+        "click_bar": PASTEL['orange'],
+        "dur_scale": [PASTEL['teal'], PASTEL['blue']],
+        "scatter_scale": ['#4DB8A4', '#5B9BD5'],
+        "event_bar": PASTEL['indigo'],
+    },
+    "cashplay": {
+        "title": "CashPlay GA",
+        "key": "cp_ga",
+        "trend_line": PASTEL['teal'],
+        "trend_fill": 'rgba(77,184,164,0.12)',
+        "trend_bar": 'rgba(91,155,213,0.45)',
+        "pv_bar": PASTEL['teal'],
+        "click_bar": PASTEL['yellow'],
+        "dur_scale": [PASTEL['teal'], '#22D3EE'],
+        "scatter_scale": ['#4DB8A4', '#22D3EE'],
+        "event_bar": PASTEL['teal'],
+    },
+}
+
+GA_VIEWS = {"day": "기준일", "range": "기간 비교"}
+USER_MISSING = "사용자 지표(*_ga_user) 데이터가 없어 DAU · 세션 · 신규 사용자를 표시할 수 없습니다."
+
+
+def _count(value: int | None) -> str:
+    return "-" if value is None else f"{value:,}"
+
+
+def render_ga_dashboard(df: pd.DataFrame, df_user: pd.DataFrame | None, service: str):
+    theme = GA_THEMES[service]
+    if df.empty:
+        st.warning("GA4 데이터가 없습니다.")
+        return
+
+    # 데이터 버전당 1회 생성되는 (pageTitle, eventName) 일별 누적합 큐브
+    ga = get_ga_cube(df)
+    has_user = df_user is not None and not df_user.empty
+    version = f"{data_version(df)}|{data_version(df_user) if has_user else ''}"
+
+    view = st.segmented_control("보기", options=list(GA_VIEWS.keys()), format_func=GA_VIEWS.get,
+                                key=f"{theme['key']}_view", default="day",
+                                label_visibility="collapsed") or "day"
+    if view == "range":
+        _render_range(ga, df_user if has_user else None, theme, version)
+    else:
+        _render_day(ga, df_user if has_user else None, theme, version)
+
+
+def _render_day(ga, df_user: pd.DataFrame | None, theme: dict, version: str):
+    # ── 날짜 선택 (기준일 단일) ──────────────────────────────────────
+    yesterday = date.today() - timedelta(days=1)
+    default_date = max(
+        [d.date() for d in ga.dates if d.date() <= yesterday],
+        default=ga.dates[-1].date() if ga.dates else yesterday
+    )
+
+    col_date, _ = st.columns([1, 6])
+    with col_date:
+        target_date = st.date_input("기준일", value=default_date, key=f"{theme['key']}_date")
+
+    target_ts = pd.Timestamp(target_date)
+    key = (version, theme['key'], target_date)
+    cutoff_28 = target_date - timedelta(days=27)
+
+    # ── KPI: df_user 기준 (날짜당 1행 → 정확한 DAU/MAU/세션) ───────
+    # 이벤트 집계의 사용자 · 세션 수는 행마다 중복되므로 df_user가 없으면 표시하지 않음
+    dau = mau = new_users = sessions = None
+    trend_df = pd.DataFrame()
+    if df_user is not None:
+        user_day = df_user[df_user['date'] == target_ts]
+        dau       = int(user_day['activeUsers'].sum())       if not user_day.empty else 0
+        mau       = int(user_day['active28DayUsers'].sum())  if not user_day.empty else 0
+        new_users = int(user_day['newUsers'].sum())          if not user_day.empty else 0
+        sessions  = int(user_day['sessions'].sum())          if not user_day.empty else 0
+        trend_src = df_user[(df_user['date'] >= pd.Timestamp(cutoff_28)) & (df_user['date'] <= target_ts)]
+        trend_df = trend_src.groupby('date').agg(
+            DAU=('activeUsers', 'sum'),
+            세션=('sessions', 'sum'),
+        ).reset_index().sort_values('date')
+
+    avg_duration = ga.avg_duration(target_date, target_date)
+
+    # ── KPI 메트릭 ───────────────────────────────────────────────────
+    st.markdown(f"## 📊 {theme['title']} · 기준일: {target_date.strftime('%Y-%m-%d')}")
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("DAU", _count(dau))
+    c2.metric("MAU (28일 활성)", _count(mau))
+    c3.metric("세션", _count(sessions))
+    c4.metric("신규 사용자", _count(new_users))
+    c5.metric("평균 세션시간", f"{avg_duration:.0f}초")
+
+    st.divider()
+
+    # ── 섹션 1: DAU 추이 (최근 28일 라인 차트) ──────────────────────
+    st.markdown("## DAU 추이 (최근 28일)")
+    if df_user is None:
+        st.info(USER_MISSING)
+    _dau_trend_chart(trend_df, theme, key, marker_ts=target_ts)
+
+    st.divider()
+
+    # ── 섹션 2: pageTitle 기준 진입률 ───────────────────────────────
+    st.markdown("## 페이지별 진입률 (page_view vs click)")
+    if ga.has_event and ga.has_page:
+        _entry_charts(ga.page_entry(target_date, target_date), theme, key,
+                      "기준일의 page_view / click 이벤트 데이터가 없습니다.")
+    else:
+        st.info("eventName 또는 pageTitle 컬럼이 없어 진입률을 계산할 수 없습니다.")
+
+    st.divider()
+
+    # ── 섹션 3: 페이지별 평균 세션시간 ──────────────────────────────
+    st.markdown("## 페이지별 평균 세션시간")
+    if ga.has_page and ga.has_duration:
+        _duration_charts(ga.page_duration(target_date, target_date), theme, key)
+    else:
+        st.info("pageTitle 또는 세션시간(session_duration · sessions) 컬럼이 없습니다.")
+
+    st.divider()
+
+    # ── 섹션 4: 이벤트 유형별 분포 (기준일) ────────────────────────
+    st.markdown("## 이벤트 유형 분포 (기준일)")
+    if ga.has_event:
+        _event_charts(ga.event_mix(target_date, target_date), theme, key)
+
+
+def _render_range(ga, df_user: pd.DataFrame | None, theme: dict, version: str):
+    """기간 선택 + 비교 기간 대비 증감 (누적합 차이로 계산되어 기간 길이와 무관)"""
+    if not ga.dates:
+        st.info("GA4 데이터가 없습니다.")
+        return
+    dmin, dmax = ga.dates[0].date(), ga.dates[-1].date()
+    key = theme['key']
+    user_cube = get_daily_cube(df_user, GA_USER_METRICS) if df_user is not None else None
+
+    @st.fragment
+    def ga_range_section():
+        kf, kt, queried = quick_date_picker(dmin, dmax, f"{key}_cmp", "전주")
+        mode = st.segmented_control("비교 기준", options=list(COMPARE_MODES.keys()),
+            format_func=COMPARE_MODES.get, key=f"{key}_cmp_mode", default="prev") or "prev"
+        ps, pe = shift_window(kf, kt, mode)
+        fkey = (version, key, kf, kt, mode)
+
+        with (st.spinner("조회 중...") if queried else nullcontext()):
+            st.markdown(f"## 📊 {theme['title']} · {kf:%Y-%m-%d} ~ {kt:%Y-%m-%d}")
+            st.caption(f"비교 기간: {ps:%Y-%m-%d} ~ {pe:%Y-%m-%d} ({COMPARE_MODES[mode]})")
+
+            # ── KPI: 사용자 · 세션 지표는 df_user(날짜당 1행)에서만 (이벤트 집계는 행마다 중복) ──
+            days = sum(1 for d in ga.dates if kf <= d.date() <= kt)
+            users = {}
+            if user_cube is not None:
+                ucmp = user_cube.compare(kf, kt, mode)
+                days, prev_days = ucmp.curr_rows, ucmp.prev_rows
+                users = {m: (ucmp.value(m), ucmp.prev_value(m)) for m in GA_USER_METRICS}
+
+            if days == 0:
+                st.info("선택한 기간에 데이터가 없습니다.")
+                return
+
+            def pct(curr, prev):
+                return f"{safe_divide(curr - prev, prev, default=0, scale=100):+.1f}%"
+
+            events = (ga.total(kf, kt, 'eventCount'), ga.total(ps, pe, 'eventCount'))
+            dur = (ga.avg_duration(kf, kt), ga.avg_duration(ps, pe))
+
+            c1, c2, c3, c4, c5 = st.columns(5)
+            if users:
+                avg_dau = safe_divide(users['activeUsers'][0], days, default=0, scale=1)
+                prev_avg_dau = safe_divide(users['activeUsers'][1], prev_days, default=0, scale=1)
+                c1.metric("평균 DAU", f"{avg_dau:,.0f}", delta=pct(avg_dau, prev_avg_dau))
+                c2.metric("세션", f"{users['sessions'][0]:,.0f}", delta=pct(*users['sessions']))
+                c3.metric("신규 사용자", f"{users['newUsers'][0]:,.0f}", delta=pct(*users['newUsers']))
+            else:
+                c1.metric("평균 DAU", "-")
+                c2.metric("세션", "-")
+                c3.metric("신규 사용자", "-")
+            c4.metric("이벤트 수", f"{events[0]:,.0f}", delta=pct(*events))
+            c5.metric("평균 세션시간", f"{dur[0]:.0f}초", delta=pct(*dur))
+
+            st.divider()
+
+            # ── DAU 추이 (선택 기간) ──────────────────────────────────
+            st.markdown("## DAU 추이 (선택 기간)")
+            if user_cube is not None:
+                trend_df = user_cube.daily(kf, kt).rename(columns={'activeUsers': 'DAU', 'sessions': '세션'})
+                _dau_trend_chart(trend_df, theme, fkey)
+            else:
+                st.info(USER_MISSING)
+
+            st.divider()
+
+            # ── 페이지별 진입률: 현재 vs 비교 기간 ────────────────────
+            st.markdown("## 페이지별 진입률 비교 (page_view vs click)")
+            if ga.has_event and ga.has_page:
+                _entry_compare(ga.compare_pages(kf, kt, mode), theme, fkey)
+            else:
+                st.info("eventName 또는 pageTitle 컬럼이 없어 진입률을 계산할 수 없습니다.")
+
+            st.divider()
+
+            # ── 이벤트 유형 분포: 현재 vs 비교 기간 ───────────────────
+            st.markdown("## 이벤트 유형 분포 비교")
+            if ga.has_event:
+                _event_compare(ga.compare_events(kf, kt, mode), theme, fkey)
+
+            st.divider()
+
+            st.markdown("## 페이지별 평균 세션시간 (선택 기간)")
+            if ga.has_page and ga.has_duration:
+                _duration_charts(ga.page_duration(kf, kt), theme, fkey)
+            else:
+                st.info("pageTitle 또는 세션시간(session_duration · sessions) 컬럼이 없습니다.")
+
+    ga_range_section()
+
+
+# ── 차트 ─────────────────────────────────────────────────────────
+# 각 Figure는 cached_figure로 (데이터 버전, 서비스, 기간, 섹션) 키마다 1회 생성
+
+def _dau_trend_chart(trend_df: pd.DataFrame, theme: dict, key: tuple, marker_ts: pd.Timestamp | None = None):
+    """DAU 라인 + 세션 막대 (보조축)"""
+    if trend_df.empty or not {'DAU', '세션'} <= set(trend_df.columns):
+        return
+
+    def build():
+        fig_trend = go.Figure()
+        fig_trend.add_trace(go.Scatter(
+            x=trend_df['date'], y=trend_df['DAU'],
+            name='DAU', mode='lines+markers',
+            line=dict(color=theme['trend_line'], width=2),
+            marker=dict(size=5),
+            fill='tozeroy', fillcolor=theme['trend_fill']
+        ))
+        fig_trend.add_trace(go.Bar(
+            x=trend_df['date'], y=trend_df['세션'],
+            name='세션', yaxis='y2',
+            marker_color=theme['trend_bar'],
+        ))
+        if marker_ts is not None:
+            # 기준일 수직선
+            fig_trend.add_vline(
+                x=marker_ts.timestamp() * 1000,
+                line_dash='dash', line_color=PASTEL['orange'], line_width=1.5,
+                annotation_text="기준일", annotation_position="top right"
+            )
+        layout = dict(**CHART_LAYOUT)
+        layout['yaxis2'] = dict(
+            overlaying='y', side='right',
+            showgrid=False, tickfont=dict(size=10)
+        )
+        layout['height'] = 280
+        fig_trend.update_layout(**layout)
+        return fig_trend
+
+    st.plotly_chart(cached_figure(key + ("dau_trend",), build), width='stretch')
+
+
+def _entry_charts(entry_df: pd.DataFrame, theme: dict, key: tuple, empty_msg: str):
+    """pageTitle별 page_view / click 막대 + 진입률 버블"""
+    if entry_df.empty:
+        st.info(empty_msg)
+        return
+
+    def build():
+        # 수평 막대: page_view & click
+        fig_entry = go.Figure()
+        fig_entry.add_trace(go.Bar(
+            y=entry_df['pageTitle'], x=entry_df['page_view'],
+            name='Page View', orientation='h',
+            marker_color=theme['pv_bar']
+        ))
+        fig_entry.add_trace(go.Bar(
+            y=entry_df['pageTitle'], x=entry_df['click'],
+            name='Click', orientation='h',
+            marker_color=theme['click_bar']
+        ))
+        layout_e = dict(**CHART_LAYOUT)
+        layout_e['barmode'] = 'group'
+        layout_e['height'] = 420
+        layout_e['xaxis'] = dict(title='이벤트 수', showgrid=True, gridcolor='rgba(128,128,128,0.12)')
+        layout_e['yaxis'] = dict(tickfont=dict(size=9), autorange='reversed')
+        layout_e['margin'] = dict(t=15, b=30, l=160, r=15)
+        fig_entry.update_layout(**layout_e)
+
+        # 버블/산점도: page_view × 진입률
+        fig_ratio = px.scatter(
+            entry_df, x='page_view', y='진입률(click/pv)',
+            size='click', color='pageTitle',
+            text='pageTitle', size_max=40,
+            color_discrete_sequence=px.colors.qualitative.Pastel,
+            labels={'page_view': 'Page View', '진입률(click/pv)': '진입률 (%)'}
+        )
+        layout_r = dict(**CHART_LAYOUT)
+        layout_r['height'] = 420
+        layout_r['showlegend'] = False
+        layout_r['hovermode'] = 'closest'
+        fig_ratio.update_traces(textposition='top center', textfont_size=8)
+        fig_ratio.update_layout(**layout_r)
+        return fig_entry, fig_ratio
+
+    fig_entry, fig_ratio = cached_figure(key + ("entry",), build)
+    col_l, col_r = st.columns(2)
+    with col_l:
+        st.plotly_chart(fig_entry, width='stretch')
+    with col_r:
+        st.plotly_chart(fig_ratio, width='stretch')
+
+
+def _entry_compare(cmp_df: pd.DataFrame, theme: dict, key: tuple):
+    """pageTitle별 진입률: 현재 vs 비교 기간 막대 + 증감 표"""
+    if cmp_df.empty:
+        st.info("선택한 기간의 page_view / click 이벤트 데이터가 없습니다.")
+        return
+
+    def build():
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            y=cmp_df['pageTitle'], x=cmp_df['진입률(click/pv)'],
+            name='선택 기간', orientation='h', marker_color=theme['pv_bar']
+        ))
+        fig.add_trace(go.Bar(
+            y=cmp_df['pageTitle'], x=cmp_df['비교_진입률'],
+            name='비교 기간', orientation='h', marker_color='rgba(160,160,160,0.55)'
+        ))
+        layout_c = dict(**CHART_LAYOUT)
+        layout_c['barmode'] = 'group'
+        layout_c['height'] = 460
+        layout_c['xaxis'] = dict(title='진입률 (%)', showgrid=True, gridcolor='rgba(128,128,128,0.12)')
+        layout_c['yaxis'] = dict(tickfont=dict(size=9), autorange='reversed')
+        layout_c['margin'] = dict(t=15, b=30, l=160, r=15)
+        fig.update_layout(**layout_c)
+        return fig
+
+    col_l, col_r = st.columns([3, 2])
+    with col_l:
+        st.plotly_chart(cached_figure(key + ("entry_compare",), build), width='stretch')
+    with col_r:
+        tbl = cmp_df[['pageTitle', 'page_view', 'click', '진입률(click/pv)', '비교_진입률', '진입률 증감(%p)']]
+        st.dataframe(
+            tbl.rename(columns={'진입률(click/pv)': '진입률(%)', '비교_진입률': '비교 진입률(%)'}),
+            hide_index=True, width='stretch', height=460,
+            column_config={
+                'page_view': st.column_config.NumberColumn(format="%d"),
+                'click': st.column_config.NumberColumn(format="%d"),
+                '진입률(%)': st.column_config.NumberColumn(format="%.1f"),
+                '비교 진입률(%)': st.column_config.NumberColumn(format="%.1f"),
+                '진입률 증감(%p)': st.column_config.NumberColumn(format="%+.1f"),
+            },
+        )
+
+
+def _duration_charts(dur_df: pd.DataFrame, theme: dict, key: tuple):
+    """pageTitle별 평균 세션시간 막대 + 세션수 산점도"""
+    if dur_df.empty:
+        st.info("세션시간 데이터가 없습니다.")
+        return
+
+    def build():
+        # 수평 막대 (세션시간 기준 정렬)
+        fig_dur = go.Figure(go.Bar(
+            x=dur_df['평균세션시간'],
+            y=dur_df['pageTitle'],
+            orientation='h',
+            marker=dict(
+                color=dur_df['평균세션시간'],
+                colorscale=[[0, theme['dur_scale'][0]], [1, theme['dur_scale'][1]]],
+                showscale=False
+            ),
+            text=dur_df['평균세션시간'].apply(lambda v: f"{v:.0f}초"),
+            textposition='outside'
+        ))
+        layout_d = dict(**CHART_LAYOUT)
+        layout_d['height'] = 420
+        layout_d['xaxis'] = dict(title='평균 세션시간 (초)', showgrid=True, gridcolor='rgba(128,128,128,0.12)')
+        layout_d['yaxis'] = dict(tickfont=dict(size=9), autorange='reversed')
+        layout_d['margin'] = dict(t=15, b=30, l=160, r=60)
+        fig_dur.update_layout(**layout_d)
+
+        # 세션수 vs 세션시간 산점도
+        fig_scatter = px.scatter(
+            dur_df, x='세션수', y='평균세션시간',
+            text='pageTitle', size='세션수',
+            size_max=30,
+            color='평균세션시간',
+            color_continuous_scale=theme['scatter_scale'],
+            labels={'세션수': '세션 수', '평균세션시간': '평균 세션시간 (초)'}
+        )
+        layout_s = dict(**CHART_LAYOUT)
+        layout_s['height'] = 420
+        layout_s['showlegend'] = False
+        layout_s['hovermode'] = 'closest'
+        layout_s['coloraxis_showscale'] = False
+        fig_scatter.update_traces(textposition='top center', textfont_size=8)
+        fig_scatter.update_layout(**layout_s)
+        return fig_dur, fig_scatter
+
+    fig_dur, fig_scatter = cached_figure(key + ("duration",), build)
+    col_l2, col_r2 = st.columns([3, 2])
+    with col_l2:
+        st.plotly_chart(fig_dur, width='stretch')
+    with col_r2:
+        st.plotly_chart(fig_scatter, width='stretch')
+
+
+def _event_charts(evt_sum: pd.DataFrame, theme: dict, key: tuple):
+    """eventName별 이벤트 수 도넛 + 막대"""
+    if evt_sum.empty:
+        st.info("이벤트 데이터가 없습니다.")
+        return
+
+    def build():
+        # 도넛 차트
+        fig_donut = go.Figure(go.Pie(
+            labels=evt_sum['eventName'],
+            values=evt_sum['eventCount'],
+            hole=0.5,
+            textinfo='label+percent',
+            textfont_size=9,
+            marker_colors=px.colors.qualitative.Pastel
+        ))
+        layout_do = dict(**CHART_LAYOUT)
+        layout_do['height'] = 320
+        layout_do['showlegend'] = False
+        layout_do['margin'] = dict(t=15, b=15, l=15, r=15)
+        fig_donut.update_layout(**layout_do)
+
+        # 수평 막대
+        fig_evt = go.Figure(go.Bar(
+            x=evt_sum['eventCount'],
+            y=evt_sum['eventName'],
+            orientation='h',
+            marker_color=theme['event_bar'],
+            text=evt_sum['eventCount'].apply(lambda v: f"{int(v):,}"),
+            textposition='outside'
+        ))
+        layout_ev = dict(**CHART_LAYOUT)
+        layout_ev['height'] = 320
+        layout_ev['xaxis'] = dict(title='이벤트 수', showgrid=True, gridcolor='rgba(128,128,128,0.12)')
+        layout_ev['yaxis'] = dict(tickfont=dict(size=9), autorange='reversed')
+        layout_ev['margin'] = dict(t=15, b=30, l=140, r=60)
+        fig_evt.update_layout(**layout_ev)
+        return fig_donut, fig_evt
+
+    fig_donut, fig_evt = cached_figure(key + ("events",), build)
+    col_e1, col_e2 = st.columns([2, 3])
+    with col_e1:
+        st.plotly_chart(fig_donut, width='stretch')
+    with col_e2:
+        st.plotly_chart(fig_evt, width='stretch')
+
+
+def _event_compare(cmp_df: pd.DataFrame, theme: dict, key: tuple):
+    """eventName별 이벤트 수: 현재 vs 비교 기간"""
+    if cmp_df.empty:
+        st.info("이벤트 데이터가 없습니다.")
+        return
+
+    def build():
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            y=cmp_df['eventName'], x=cmp_df['eventCount'],
+            name='선택 기간', orientation='h', marker_color=theme['event_bar'],
+            text=cmp_df['증감률(%)'].apply(lambda v: f"{v:+.1f}%"), textposition='outside'
+        ))
+        fig.add_trace(go.Bar(
+            y=cmp_df['eventName'], x=cmp_df['비교_eventCount'],
+            name='비교 기간', orientation='h', marker_color='rgba(160,160,160,0.55)'
+        ))
+        layout_ev = dict(**CHART_LAYOUT)
+        layout_ev['barmode'] = 'group'
+        layout_ev['height'] = 380
+        layout_ev['xaxis'] = dict(title='이벤트 수', showgrid=True, gridcolor='rgba(128,128,128,0.12)')
+        layout_ev['yaxis'] = dict(tickfont=dict(size=9), autorange='reversed')
+        layout_ev['margin'] = dict(t=15, b=30, l=140, r=60)
+        fig.update_layout(**layout_ev)
+        return fig
+
+    st.plotly_chart(cached_figure(key + ("event_compare",), build), width='stretch')
@@ -5,234 +5,481 @@ import plotly.express as px
 import plotly.graph_objects as go
 from contextlib import nullcontext
 from utils import (
-    safe_divide, get_comparison_metrics, make_weekly,
+    safe_divide, make_periodic, PERIOD_FREQS, get_daily_cube, get_row_index, filter_rows, COMPARE_MODES, shift_window, data_version,
+    cached_figure,
     format_won, format_number, format_pct,
-    apply_layout, set_y_korean_ticks, week_label, quick_date_picker
+    apply_layout, set_y_korean_ticks, period_label, quick_date_picker, export_buttons, persist_widget_state
 )
-from config.constants import PASTEL, PUB_COLORS
+from utils import duck
+from utils.cube import ratio_columns
+from config.constants import (
+    PC_MEASURES, PC_RATIOS, PC_DIMS, PC_MEDIA_DIMS, PC_COUNT_DIMS, PC_FILTER_DIMS,
+    PC_HISTORY_KEYS, PASTEL, PUB_COLORS,
+)
+
+PC_DETAIL_VIEWS = {"conv": "🎯 광고타입별 전환", "adv": "📊 광고주별", "media": "📡 매체별", "raw": "📋 Raw"}
+
+# Raw 그리드 컬럼 → 표시명 (표시 순서)
+PC_RAW_COLUMNS = {
+    'date':'일자', 'publisher_type':'퍼블리셔', 'ad_name':'광고명', 'media_name':'매체명', 'advertiser':'광고주',
+    'os':'OS', 'ad_type':'광고타입', 'unit_price':'단가', 'clicks':'클릭수', 'conversions':'전환수', 'cvr':'CVR',
+    'ad_revenue':'광고비', 'media_cost':'매체비', 'margin':'마진', 'margin_rate':'마진율',
+}
+PC_RAW_SEARCH = ('ad_name', 'media_name', 'advertiser')
+PC_RAW_PAGE_SIZES = (50, 100, 200, 500)
+PC_DETAIL_STATE = {
+    'pc_detail_view': "conv", 'pc_raw_query': "", 'pc_raw_pubs': [], 'pc_raw_ad_types': [],
+    'pc_raw_sort': "date", 'pc_raw_order': "desc", 'pc_raw_page_size': 100, 'pc_raw_page': 1,
+}
+PC_FILTER_STATE = {f"pc_filter_{dim}": [] for dim in PC_FILTER_DIMS}
+
+
+def _fmt(df: pd.DataFrame, ints=(), pct1=(), pct2=()) -> pd.DataFrame:
+    """표시용 문자열 포맷 (천 단위 콤마 · 소수 1/2자리 %)"""
+    d = df.copy()
+    for c in ints:
+        d[c] = d[c].apply(lambda x: f"{x:,.0f}")
+    for c in pct1:
+        d[c] = d[c].apply(lambda x: f"{x:.1f}%")
+    for c in pct2:
+        d[c] = d[c].apply(lambda x: f"{x:.2f}%")
+    return d
+
+
+def _arrow(frame: pd.DataFrame):
+    """DuckDB 경로용 Arrow 테이블 (데이터 버전별 1회), DuckDB가 없으면 None → 큐브(pandas) 경로"""
+    return duck.arrow_table((data_version(frame),), frame) if duck.available() else None
+
+
+def _group(table, cube, dim: str, kf, kt, daily: bool = False) -> pd.DataFrame:
+    """기간 내 차원값별(daily면 일 × 차원값) 합계 + 비율 — DuckDB 집계, 없으면 큐브 누적합"""
+    if table is None:
+        return cube.daily(kf, kt, dim) if daily else cube.by(dim, kf, kt)
+    return ratio_columns(duck.group_by(table, dim, cube.measures, kf, kt, daily), cube.ratios)
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _pc_detail_data(version: str, kf, kt, view: str, _cube, _ads=None, _table=None, _ads_table=None) -> dict:
+    """상세 분석 뷰 1개의 집계 · 표시용 표 (데이터 버전 · 기간 · 뷰별로 1회 계산, 세션 간 공유)
+
+    _cube: 뷰의 차원을 가진 큐브 (매체별은 매체 집계 큐브), _ads: 광고 수 큐브 (광고주별)
+    _table / _ads_table: 같은 프레임의 Arrow 테이블 (있으면 DuckDB로 집계)
+    """
+    if view == "conv":
+        at = _group(_table, _cube, 'ad_type', kf, kt)[['ad_type','clicks','conversions','ad_revenue','margin','cvr','margin_rate']]
+        at = at.sort_values('ad_revenue', ascending=False)
+        table = _fmt(at, ints=['clicks','conversions','ad_revenue','margin'], pct1=['margin_rate'], pct2=['cvr'])
+        table = table.rename(columns={'ad_type':'광고타입','clicks':'클릭수','conversions':'전환수',
+            'ad_revenue':'광고비(매출)','margin':'마진','cvr':'CVR','margin_rate':'마진율'})
+        return {'at': at, 'table': table, 'daily': _group(_table, _cube, 'ad_type', kf, kt, daily=True)}
+
+    if view == "adv":
+        adv = _group(_table, _cube, 'advertiser', kf, kt)
+        if _ads_table is not None:
+            ad_count = duck.distinct_count(_ads_table, 'advertiser', 'ad_name', kf, kt)
+        else:
+            ad_count = _ads.distinct_count(('advertiser','ad_name'), kf, kt)
+        ad_count = ad_count.rename(columns={'count': 'ad_count'})
+        adv = adv.merge(ad_count, on='advertiser', how='left')
+        adv = adv[['advertiser','ad_revenue','margin','conversions','clicks','ad_count','margin_rate','cvr']]
+        adv = adv.sort_values('ad_revenue', ascending=False)
+        table = _fmt(adv, ints=['ad_revenue','margin','conversions','clicks','ad_count'], pct1=['margin_rate','cvr'])
+        table = table.rename(columns={'advertiser':'광고주','ad_revenue':'광고비(매출)','margin':'마진',
+            'margin_rate':'마진율','conversions':'전환수','clicks':'클릭수','cvr':'CVR','ad_count':'광고수'})
+        return {'adv': adv, 'table': table}
+
+    if view == "media":
+        med = _group(_table, _cube, 'media_name', kf, kt)
+        med = med[['media_name','ad_revenue','margin','conversions','clicks','margin_rate','cvr']]
+        med = med.sort_values('ad_revenue', ascending=False)
+        table = _fmt(med, ints=['ad_revenue','margin','conversions','clicks'], pct1=['margin_rate','cvr'])
+        table = table.rename(columns={'media_name':'매체명','ad_revenue':'광고비(매출)','margin':'마진',
+            'margin_rate':'마진율','conversions':'전환수','clicks':'클릭수','cvr':'CVR'})
+        return {'med': med, 'table': table}
+    raise ValueError(f"지원하지 않는 보기: {view}")
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _pc_raw_filtered(key: tuple, query: str, pubs: tuple, ad_types: tuple, sort_col: str, ascending: bool,
+                     _raw: pd.DataFrame) -> pd.DataFrame:
+    """Raw 행 필터 · 정렬 결과 (pandas 경로, 기간 · 조건별 1회, 페이지 이동은 슬라이스만)"""
+    mask = pd.Series(True, index=_raw.index)
+    if pubs:
+        mask &= _raw['publisher_type'].isin(pubs)
+    if ad_types:
+        mask &= _raw['ad_type'].isin(ad_types)
+    if query:
+        hit = pd.Series(False, index=_raw.index)
+        for c in PC_RAW_SEARCH:
+            hit |= _raw[c].astype(str).str.contains(query, case=False, regex=False, na=False)
+        mask &= hit
+    out = _raw.loc[mask, list(PC_RAW_COLUMNS)]
+    return out.sort_values(sort_col, ascending=ascending, kind='stable', na_position='last')
+
+
+def _pc_raw_where(query: str, pubs: tuple, ad_types: tuple) -> tuple[str, list]:
+    """DuckDB 경로의 WHERE 절 (pandas 경로와 같은 조건)"""
+    conds, params = [], []
+    for col, values in (('publisher_type', pubs), ('ad_type', ad_types)):
+        if values:
+            conds.append(f"{col} IN ({', '.join('?' * len(values))})")
+            params += list(values)
+    if query:
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        conds.append("(" + " OR ".join(f"CAST({c} AS VARCHAR) ILIKE ? ESCAPE '\\'" for c in PC_RAW_SEARCH) + ")")
+        params += [pattern] * len(PC_RAW_SEARCH)
+    return (f"WHERE {' AND '.join(conds)}" if conds else ""), params
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _pc_raw_count(key: tuple, query: str, pubs: tuple, ad_types: tuple, _table) -> int:
+    where, params = _pc_raw_where(query, pubs, ad_types)
+    return int(duck.query(f"SELECT COUNT(*) AS n FROM raw {where}", params, raw=_table)['n'].iloc[0])
+
+
+def _pc_raw_select(table, query: str, pubs: tuple, ad_types: tuple, sort_col: str, ascending: bool,
+                   limit: int | None = None, offset: int = 0) -> pd.DataFrame:
+    """DuckDB 경로: 필터 · 정렬 후 요청 구간 행만 반환 (나머지 컬럼 순으로 동순위 고정)"""
+    where, params = _pc_raw_where(query, pubs, ad_types)
+    direction = "ASC" if ascending else "DESC"
+    ties = [c for c in PC_RAW_COLUMNS if c != sort_col]
+    order = ", ".join([f"{duck.quote(sort_col)} {direction} NULLS LAST"] + [duck.quote(c) for c in ties])
+    cols = ", ".join(duck.quote(c) for c in PC_RAW_COLUMNS)
+    page = f"LIMIT {int(limit)} OFFSET {int(offset)}" if limit else ""
+    return duck.query(f"SELECT {cols} FROM raw {where} ORDER BY {order} {page}", params, raw=table)
+
+
+def _pc_raw_page(rows: pd.DataFrame) -> pd.DataFrame:
+    """현재 페이지 행만 표시용 문자열로 포맷"""
+    rd = rows.copy()
+    rd['date'] = rd['date'].dt.strftime('%Y-%m-%d')
+    rd = _fmt(rd, ints=['unit_price','clicks','conversions','ad_revenue','media_cost','margin'], pct1=['margin_rate'], pct2=['cvr'])
+    return rd.rename(columns=PC_RAW_COLUMNS)
+
+
+def _render_raw(raw: pd.DataFrame, key: tuple, file_stem: str):
+    """페이지 단위 Raw 그리드 (필터 · 정렬은 서버에서, 브라우저에는 현재 페이지만 전송)"""
+    def reset_page():
+        st.session_state['pc_raw_page'] = 1
+
+    f1, f2, f3 = st.columns([2, 1, 1])
+    with f1:
+        query = st.text_input("검색 (광고명 · 매체명 · 광고주)", key="pc_raw_query", on_change=reset_page).strip()
+    with f2:
+        pubs = st.multiselect("퍼블리셔", sorted(raw['publisher_type'].dropna().unique()),
+                              key="pc_raw_pubs", on_change=reset_page)
+    with f3:
+        ad_types = st.multiselect("광고타입", sorted(raw['ad_type'].dropna().unique()),
+                                  key="pc_raw_ad_types", on_change=reset_page)
+
+    s1, s2, s3, s4 = st.columns([2, 1, 1, 1], vertical_alignment="bottom")
+    with s1:
+        sort_col = st.selectbox("정렬", list(PC_RAW_COLUMNS), format_func=PC_RAW_COLUMNS.get,
+                                key="pc_raw_sort", on_change=reset_page)
+    with s2:
+        order = st.segmented_control("순서", ["desc", "asc"], format_func={"desc": "내림차순", "asc": "오름차순"}.get,
+                                     key="pc_raw_order", on_change=reset_page) or "desc"
+    with s3:
+        page_size = st.selectbox("페이지당 행", PC_RAW_PAGE_SIZES, key="pc_raw_page_size", on_change=reset_page)
+
+    cond = (query, tuple(pubs), tuple(ad_types))
+    if duck.available():
+        # DuckDB: 건수와 현재 페이지만 조회 (전체 결과는 내보내기 클릭 시에만)
+        table = duck.arrow_table(key, raw)
+        n_rows = _pc_raw_count(key, *cond, table)
+        fetch = lambda limit=None, offset=0: _pc_raw_select(table, *cond, sort_col, order == "asc", limit, offset)
+    else:
+        rows = _pc_raw_filtered(key, *cond, sort_col, order == "asc", raw)
+        n_rows = len(rows)
+        fetch = lambda limit=None, offset=0: rows.iloc[offset:offset + limit] if limit else rows
+    pages = max((n_rows - 1) // page_size + 1, 1)
+    if st.session_state.get('pc_raw_page', 1) > pages:
+        st.session_state['pc_raw_page'] = pages
+    with s4:
+        page = st.number_input(f"페이지 (/{pages:,})", min_value=1, max_value=pages, step=1, key="pc_raw_page")
+
+    start = (page - 1) * page_size
+    shown = f"{start + 1:,}–{min(start + page_size, n_rows):,}" if n_rows else "0"
+    filtered = " (필터 적용)" if query or pubs or ad_types else ""
+    st.caption(f"전체 {len(raw):,}행 중 {n_rows:,}행{filtered} · {shown}행 표시")
+    st.dataframe(_pc_raw_page(fetch(page_size, start)), width='stretch', hide_index=True,
+                 height=min(35 * (page_size + 1) + 3, 500))
+    export_buttons(fetch, key + cond + (sort_col, order), file_stem, rows=n_rows)
+
+
+def _pc_trend_figures(cube, tf, tt, freq: str, table=None):
+    """퍼블리셔별 매출 스택 · 마진/마진율 차트 (집계 구간 없으면 None)"""
+    daily = _group(table, cube, 'publisher_type', tf, tt, daily=True)
+    wp = make_periodic(daily[['date','publisher_type'] + cube.measures],
+                       group_col='publisher_type', freq=freq)
+    if not wp.empty:
+        wp['wl'] = wp['period'].apply(period_label, freq=freq)
+
+    wt = make_periodic(cube.daily(tf, tt)[['date'] + cube.measures], freq=freq)
+    if not wt.empty:
+        wt['margin_rate'] = wt.apply(lambda row: safe_divide(row['margin'], row['ad_revenue'], default=0, scale=100), axis=1)
+        wt['wl'] = wt['period'].apply(period_label, freq=freq)
+
+    if wp.empty or wt.empty:
+        return None
+
+    pubs = sorted(wp['publisher_type'].dropna().unique().tolist())
+
+    fig = go.Figure()
+    for i, p in enumerate(pubs):
+        s = wp[wp['publisher_type']==p].sort_values('period')
+        fig.add_trace(go.Bar(x=s['wl'], y=s['ad_revenue'], name=p, marker_color=PUB_COLORS[i%len(PUB_COLORS)],
+            hovertemplate=f"<b>{p}</b><br>%{{y:,.0f}}원<extra></extra>"))
+    apply_layout(fig, dict(barmode='stack', height=380, xaxis_tickangle=-45))
+    set_y_korean_ticks(fig, wp['ad_revenue'].tolist())
 
+    fig2 = go.Figure()
+    for i, p in enumerate(pubs):
+        s = wp[wp['publisher_type']==p].sort_values('period')
+        fig2.add_trace(go.Bar(x=s['wl'], y=s['margin'], name=p, marker_color=PUB_COLORS[i%len(PUB_COLORS)],
+            showlegend=False, hovertemplate=f"<b>{p}</b><br>%{{y:,.0f}}원<extra></extra>"))
 
-def render_pointclick_dashboard(df: pd.DataFrame):
-    """포인트클릭 대시보드 렌더링"""
+    max_margin_rate = wt['margin_rate'].max() if not wt.empty else 10
+    fig2.add_trace(go.Scatter(x=wt['wl'], y=wt['margin_rate'], name='마진율', mode='lines+markers+text',
+        text=[f"{v:.1f}%" for v in wt['margin_rate']], textposition='top center',
+        textfont=dict(size=9, color=PASTEL['yellow']), line=dict(color=PASTEL['yellow'], width=2.5),
+        marker=dict(size=6, color=PASTEL['yellow']), yaxis='y2', hovertemplate="마진율: %{y:.1f}%<extra></extra>"))
+    apply_layout(fig2, dict(barmode='stack', height=380, xaxis_tickangle=-45,
+        yaxis2=dict(title="", overlaying='y', side='right', range=[0, max(max_margin_rate*1.5, 10)],
+            ticksuffix="%", gridcolor="rgba(0,0,0,0)", tickfont=dict(size=10, color=PASTEL['yellow']))))
+    set_y_korean_ticks(fig2, wp['margin'].tolist())
+    return fig, fig2
+
+
+def _conv_figures(d: dict):
+    """광고타입별 클릭·전환·CVR 차트 + 일별 전환수 라인"""
+    at = d['at']
+    fig_a = go.Figure()
+    fig_a.add_trace(go.Bar(x=at['ad_type'], y=at['clicks'], name='클릭수',
+        marker_color=PASTEL['blue'], opacity=0.55, hovertemplate="클릭: %{y:,.0f}<extra></extra>"))
+    fig_a.add_trace(go.Bar(x=at['ad_type'], y=at['conversions'], name='전환수',
+        marker_color=PASTEL['green'], opacity=0.85, hovertemplate="전환: %{y:,.0f}<extra></extra>"))
+    fig_a.add_trace(go.Scatter(x=at['ad_type'], y=at['cvr'], name='CVR', mode='lines+markers+text',
+        text=[f"{v:.1f}%" for v in at['cvr']], textposition='top center', textfont=dict(size=9, color=PASTEL['red']),
+        line=dict(color=PASTEL['red'], width=2.5), marker=dict(size=8),
+        yaxis='y2', hovertemplate="CVR: %{y:.2f}%<extra></extra>"))
+    max_cvr = at['cvr'].max() if not at.empty else 10
+    apply_layout(fig_a, dict(barmode='group', height=380,
+        yaxis2=dict(title="", overlaying='y', side='right', range=[0, max(max_cvr*1.5, 10)],
+            ticksuffix="%", gridcolor="rgba(0,0,0,0)", tickfont=dict(color=PASTEL['red']))))
+
+    dat = d['daily']
+    fig_d = go.Figure()
+    for a in sorted(dat['ad_type'].dropna().unique()):
+        s = dat[dat['ad_type']==a].sort_values('date')
+        fig_d.add_trace(go.Scatter(x=s['date'], y=s['conversions'], name=a, mode='lines+markers',
+            hovertemplate=f"<b>{a}</b><br>%{{x|%m/%d}}: %{{y:,.0f}}건<extra></extra>"))
+    apply_layout(fig_d, dict(height=300))
+    return fig_a, fig_d
+
+
+def _adv_figure(d: dict):
+    fig_av = px.bar(d['adv'].head(15), x='ad_revenue', y='advertiser', orientation='h',
+        color='margin_rate', color_continuous_scale='RdYlGn',
+        labels={'ad_revenue':'광고비(매출)','advertiser':'광고주','margin_rate':'마진율(%)'})
+    fig_av.update_traces(hovertemplate="<b>%{y}</b><br>매출: %{x:,.0f}원<extra></extra>")
+    apply_layout(fig_av, dict(height=420, yaxis=dict(autorange="reversed")))
+    return fig_av
+
+
+def _media_figure(d: dict):
+    fig_m = px.treemap(d['med'].head(20), path=['media_name'], values='ad_revenue',
+        color='margin_rate', color_continuous_scale='RdYlGn')
+    fig_m.update_traces(hovertemplate="<b>%{label}</b><br>매출: %{value:,.0f}원<extra></extra>")
+    fig_m.update_layout(height=420, margin=dict(t=10,b=10), paper_bgcolor="rgba(0,0,0,0)")
+    return fig_m
+
+
+def _render_conv(d: dict, key: tuple):
+    fig_a, fig_d = cached_figure(key + ("pc_conv",), lambda: _conv_figures(d))
+    cc1, cc2 = st.columns(2)
+    with cc1:
+        st.plotly_chart(fig_a, width='stretch')
+    with cc2:
+        st.dataframe(d['table'], width='stretch', hide_index=True, height=380)
+
+    st.markdown("##### 일별 광고타입별 전환수")
+    st.plotly_chart(fig_d, width='stretch')
+
+
+def _render_adv(d: dict, key: tuple):
+    a1, a2 = st.columns(2)
+    with a1:
+        st.plotly_chart(cached_figure(key + ("pc_adv",), lambda: _adv_figure(d)), width='stretch')
+    with a2:
+        st.dataframe(d['table'], width='stretch', hide_index=True, height=420)
+
+
+def _render_media(d: dict, key: tuple):
+    mc1, mc2 = st.columns(2)
+    with mc1:
+        st.plotly_chart(cached_figure(key + ("pc_media",), lambda: _media_figure(d)), width='stretch')
+    with mc2:
+        st.dataframe(d['table'], width='stretch', hide_index=True, height=420)
+
+
+def _render_filters(*frames: pd.DataFrame) -> dict:
+    """전역 드릴다운 필터 (선택지는 데이터 버전별 1회 생성되는 행 위치 인덱스에서, 프레임별 값의 합집합)"""
+    persist_widget_state(PC_FILTER_STATE)
+    indexes = [get_row_index(f, PC_FILTER_DIMS) for f in frames]
+    filters = {}
+    for col, (dim, label) in zip(st.columns(len(PC_FILTER_DIMS)), PC_FILTER_DIMS.items()):
+        options = sorted(set().union(*(index.values.get(dim, []) for index in indexes)))
+        with col:
+            filters[dim] = st.multiselect(label, options, key=f"pc_filter_{dim}", placeholder="전체")
+    return filters
+
+
+def _history_note(filters: dict, keys, raw_min, start) -> str | None:
+    """과거 집계에 없는 차원으로 필터한 경우 안내 (그 차원은 과거 행에서 결측이라 과거 구간이 제외됨)"""
+    missing = [PC_FILTER_DIMS[d] for d, v in filters.items() if v and d not in keys]
+    if missing and start < raw_min:
+        return f"ℹ️ {' · '.join(missing)} 필터는 {raw_min} 이후 원본 구간에만 적용됩니다 (이전 기간은 제외)."
+    return None
+
+
+def render_pointclick_dashboard(df: pd.DataFrame, history: pd.DataFrame | None = None,
+                                media_history: pd.DataFrame | None = None,
+                                ads_history: pd.DataFrame | None = None):
+    """포인트클릭 대시보드 렌더링
+
+    Args:
+        df: 최근 원본 행 (Raw 탭)
+        history: 원본 + 과거 광고주 일별 집계 (KPI · 광고타입 · 광고주 · 추이). 없으면 df 사용
+        media_history: 원본 + 과거 매체 일별 집계 (매체별, 매체 필터 시 KPI · 추이). 없으면 df 사용
+        ads_history: 원본 + 과거 광고주 × 광고 일별 목록 (광고 수). 없으면 df 사용
+    """
     if df.empty:
         st.warning("포인트클릭 데이터가 없습니다.")
         return
 
+    src, msrc, asrc = (h if h is not None and not h.empty else df for h in (history, media_history, ads_history))
     try:
-        dmin, dmax = df['date'].min().date(), df['date'].max().date()
+        raw_min = df['date'].min().date()
+        dmin, dmax = src['date'].min().date(), src['date'].max().date()
     except:
         st.error("날짜 데이터를 처리할 수 없습니다.")
         return
 
+    # 전역 필터: 인덱스 교집합으로 고른 행만 KPI · 상세 · 추이 · Raw에 전달
+    filters = _render_filters(src, msrc)
+    if any(filters.values()):
+        src, msrc, asrc = (filter_rows(f, PC_FILTER_DIMS, filters) for f in (src, msrc, asrc))
+        if src.empty and msrc.empty:
+            st.info("선택한 필터에 해당하는 데이터가 없습니다.")
+            return
+
+    # 데이터 버전(+필터)별 1회 생성되는 일별 누적합 큐브 (KPI · 상세 · 추이 공용)
+    # 매체 필터만 있으면 KPI · 추이는 매체 집계 큐브로 (광고주 집계에는 매체 차원이 없음)
+    by_media = bool(filters.get('media_name')) and not filters.get('advertiser')
+    if any(filters.values()):
+        st.caption(f"🔍 필터 적용: {len(msrc if by_media else src):,}행")
+    cube = get_daily_cube(src, PC_MEASURES, PC_RATIOS, PC_DIMS)
+
+    def media_cube():
+        return get_daily_cube(msrc, PC_MEASURES, PC_RATIOS, PC_MEDIA_DIMS)
+
+    total_cube, total_keys = (media_cube(), PC_HISTORY_KEYS['daily_media']) if by_media else (cube, PC_HISTORY_KEYS['daily'])
+    total_src = msrc if by_media else src
+    version = "|".join(data_version(f) for f in (src, msrc, asrc, df))
+
     @st.fragment
     def pc_kpi_section():
         st.markdown("## 📈 핵심 지표")
         kf, kt, queried = quick_date_picker(dmin, dmax, "pc_kpi", "어제")
+        mode = st.segmented_control("비교 기준", options=list(COMPARE_MODES.keys()),
+            format_func=COMPARE_MODES.get, key="pc_kpi_cmp_mode", default="prev") or "prev"
         with (st.spinner("조회 중...") if queried else nullcontext()):
-            kdf = df[(df['date'].dt.date >= kf) & (df['date'].dt.date <= kt)]
-            curr_sums, prev_sums, get_delta, get_rate_delta = get_comparison_metrics(df, kf, kt)
+            cmp = total_cube.compare(kf, kt, mode)
+            note = _history_note(filters, total_keys, raw_min, min(kf, shift_window(kf, kt, mode)[0]))
+            if note:
+                st.caption(note)
 
-            if kdf.empty:
+            if not cmp.has_data:
                 st.info("선택한 기간에 데이터가 없습니다.")
             else:
-                tr = curr_sums.get('ad_revenue', 0)
-                tm = curr_sums.get('margin', 0)
-                tc = curr_sums.get('clicks', 0)
-                tv = curr_sums.get('conversions', 0)
-                amr = safe_divide(tm, tr, default=0, scale=100)
-                acvr = safe_divide(tv, tc, default=0, scale=100)
-
                 m1,m2,m3,m4,m5 = st.columns(5)
-                m1.metric("광고비(매출)", format_won(tr), delta=f"{get_delta('ad_revenue'):+.1f}%")
-                m2.metric("마진", format_won(tm), delta=f"{get_delta('margin'):+.1f}%")
-                m3.metric("마진율", format_pct(amr), delta=f"{get_rate_delta('margin', 'ad_revenue'):+.1f}%p")
-                m4.metric("전환수", format_number(tv), delta=f"{get_delta('conversions'):+.1f}%")
-                m5.metric("평균 CVR", format_pct(acvr), delta=f"{get_rate_delta('conversions', 'clicks'):+.1f}%p")
+                m1.metric("광고비(매출)", format_won(cmp.value('ad_revenue')), delta=f"{cmp.delta('ad_revenue'):+.1f}%")
+                m2.metric("마진", format_won(cmp.value('margin')), delta=f"{cmp.delta('margin'):+.1f}%")
+                m3.metric("마진율", format_pct(cmp.value('margin_rate')), delta=f"{cmp.delta('margin_rate'):+.1f}%p")
+                m4.metric("전환수", format_number(cmp.value('conversions')), delta=f"{cmp.delta('conversions'):+.1f}%")
+                m5.metric("평균 CVR", format_pct(cmp.value('cvr')), delta=f"{cmp.delta('cvr'):+.1f}%p")
 
     @st.fragment
     def pc_detail_section():
         st.markdown("## 🔎 상세 분석")
+        persist_widget_state(PC_DETAIL_STATE)
         kf, kt, queried = quick_date_picker(dmin, dmax, "pc_detail", "전주")
         with (st.spinner("조회 중...") if queried else nullcontext()):
-            kdf = df[(df['date'].dt.date >= kf) & (df['date'].dt.date <= kt)]
             st.caption(f"📅 {kf} ~ {kt}")
 
-            if kdf.empty:
+            if total_cube.row_count(kf, kt) == 0:
                 st.info("선택한 기간에 데이터가 없습니다.")
                 return
 
-            tab_conv, tab_adv, tab_media, tab_raw = st.tabs(["🎯 광고타입별 전환", "📊 광고주별", "📡 매체별", "📋 Raw"])
-
-            with tab_conv:
-                at = kdf.groupby('ad_type', dropna=False).agg(
-                    clicks=('clicks','sum'), conversions=('conversions','sum'),
-                    ad_revenue=('ad_revenue','sum'), margin=('margin','sum')
-                ).reset_index()
-                at['cvr'] = at.apply(lambda row: safe_divide(row['conversions'], row['clicks'], default=0, scale=100), axis=1)
-                at['margin_rate'] = at.apply(lambda row: safe_divide(row['margin'], row['ad_revenue'], default=0, scale=100), axis=1)
-                at = at.sort_values('ad_revenue', ascending=False)
-
-                cc1, cc2 = st.columns(2)
-                with cc1:
-                    fig_a = go.Figure()
-                    fig_a.add_trace(go.Bar(x=at['ad_type'], y=at['clicks'], name='클릭수',
-                        marker_color=PASTEL['blue'], opacity=0.55, hovertemplate="클릭: %{y:,.0f}<extra></extra>"))
-                    fig_a.add_trace(go.Bar(x=at['ad_type'], y=at['conversions'], name='전환수',
-                        marker_color=PASTEL['green'], opacity=0.85, hovertemplate="전환: %{y:,.0f}<extra></extra>"))
-                    fig_a.add_trace(go.Scatter(x=at['ad_type'], y=at['cvr'], name='CVR', mode='lines+markers+text',
-                        text=[f"{v:.1f}%" for v in at['cvr']], textposition='top center', textfont=dict(size=9, color=PASTEL['red']),
-                        line=dict(color=PASTEL['red'], width=2.5), marker=dict(size=8),
-                        yaxis='y2', hovertemplate="CVR: %{y:.2f}%<extra></extra>"))
-                    max_cvr = at['cvr'].max() if not at.empty else 10
-                    apply_layout(fig_a, dict(barmode='group', height=380,
-                        yaxis2=dict(title="", overlaying='y', side='right', range=[0, max(max_cvr*1.5, 10)],
-                            ticksuffix="%", gridcolor="rgba(0,0,0,0)", tickfont=dict(color=PASTEL['red']))))
-                    st.plotly_chart(fig_a, width='stretch')
-                with cc2:
-                    d = at.copy()
-                    for c in ['clicks','conversions','ad_revenue','margin']:
-                        d[c] = d[c].apply(lambda x: f"{x:,.0f}")
-                    d['cvr'] = d['cvr'].apply(lambda x: f"{x:.2f}%")
-                    d['margin_rate'] = d['margin_rate'].apply(lambda x: f"{x:.1f}%")
-                    st.dataframe(d.rename(columns={'ad_type':'광고타입','clicks':'클릭수','conversions':'전환수',
-                        'ad_revenue':'광고비(매출)','margin':'마진','cvr':'CVR','margin_rate':'마진율'}),
-                        width='stretch', hide_index=True, height=380)
-
-                st.markdown("##### 일별 광고타입별 전환수")
-                dat = kdf.groupby(['date','ad_type'], dropna=False).agg(conversions=('conversions','sum')).reset_index()
-                fig_d = go.Figure()
-                for a in sorted(kdf['ad_type'].dropna().unique()):
-                    s = dat[dat['ad_type']==a].sort_values('date')
-                    fig_d.add_trace(go.Scatter(x=s['date'], y=s['conversions'], name=a, mode='lines+markers',
-                        hovertemplate=f"<b>{a}</b><br>%{{x|%m/%d}}: %{{y:,.0f}}건<extra></extra>"))
-                apply_layout(fig_d, dict(height=300))
-                st.plotly_chart(fig_d, width='stretch')
-
-            with tab_adv:
-                adv = kdf.groupby('advertiser', dropna=False).agg(
-                    ad_revenue=('ad_revenue','sum'), margin=('margin','sum'),
-                    conversions=('conversions','sum'), clicks=('clicks','sum'), ad_count=('ad_name','nunique')
-                ).reset_index()
-                adv['margin_rate'] = adv.apply(lambda row: safe_divide(row['margin'], row['ad_revenue'], default=0, scale=100), axis=1)
-                adv['cvr'] = adv.apply(lambda row: safe_divide(row['conversions'], row['clicks'], default=0, scale=100), axis=1)
-                adv = adv.sort_values('ad_revenue', ascending=False)
-
-                a1, a2 = st.columns(2)
-                with a1:
-                    fig_av = px.bar(adv.head(15), x='ad_revenue', y='advertiser', orientation='h',
-                        color='margin_rate', color_continuous_scale='RdYlGn',
-                        labels={'ad_revenue':'광고비(매출)','advertiser':'광고주','margin_rate':'마진율(%)'})
-                    fig_av.update_traces(hovertemplate="<b>%{y}</b><br>매출: %{x:,.0f}원<extra></extra>")
-                    apply_layout(fig_av, dict(height=420, yaxis=dict(autorange="reversed")))
-                    st.plotly_chart(fig_av, width='stretch')
-                with a2:
-                    da = adv.copy()
-                    for c in ['ad_revenue','margin','conversions','clicks','ad_count']:
-                        da[c] = da[c].apply(lambda x: f"{x:,.0f}")
-                    da['margin_rate'] = da['margin_rate'].apply(lambda x: f"{x:.1f}%")
-                    da['cvr'] = da['cvr'].apply(lambda x: f"{x:.1f}%")
-                    st.dataframe(da.rename(columns={'advertiser':'광고주','ad_revenue':'광고비(매출)','margin':'마진',
-                        'margin_rate':'마진율','conversions':'전환수','clicks':'클릭수','cvr':'CVR','ad_count':'광고수'}),
-                        width='stretch', hide_index=True, height=420)
-
-            with tab_media:
-                med = kdf.groupby('media_name', dropna=False).agg(
-                    ad_revenue=('ad_revenue','sum'), margin=('margin','sum'),
-                    conversions=('conversions','sum'), clicks=('clicks','sum')
-                ).reset_index()
-                med['margin_rate'] = med.apply(lambda row: safe_divide(row['margin'], row['ad_revenue'], default=0, scale=100), axis=1)
-                med['cvr'] = med.apply(lambda row: safe_divide(row['conversions'], row['clicks'], default=0, scale=100), axis=1)
-                med = med.sort_values('ad_revenue', ascending=False)
-
-                mc1, mc2 = st.columns(2)
-                with mc1:
-                    fig_m = px.treemap(med.head(20), path=['media_name'], values='ad_revenue',
-                        color='margin_rate', color_continuous_scale='RdYlGn')
-                    fig_m.update_traces(hovertemplate="<b>%{label}</b><br>매출: %{value:,.0f}원<extra></extra>")
-                    fig_m.update_layout(height=420, margin=dict(t=10,b=10), paper_bgcolor="rgba(0,0,0,0)")
-                    st.plotly_chart(fig_m, width='stretch')
-                with mc2:
-                    dm = med.copy()
-                    for c in ['ad_revenue','margin','conversions','clicks']:
-                        dm[c] = dm[c].apply(lambda x: f"{x:,.0f}")
-                    dm['margin_rate'] = dm['margin_rate'].apply(lambda x: f"{x:.1f}%")
-                    dm['cvr'] = dm['cvr'].apply(lambda x: f"{x:.1f}%")
-                    st.dataframe(dm.rename(columns={'media_name':'매체명','ad_revenue':'광고비(매출)','margin':'마진',
-                        'margin_rate':'마진율','conversions':'전환수','clicks':'클릭수','cvr':'CVR'}),
-                        width='stretch', hide_index=True, height=420)
-
-            with tab_raw:
-                raw = kdf.copy().sort_values('date', ascending=False)
-                rd = raw.copy()
-                rd['date'] = rd['date'].dt.strftime('%Y-%m-%d')
-                rd = rd[['date','publisher_type','ad_name','media_name','advertiser','os','ad_type','unit_price','clicks','conversions','cvr','ad_revenue','media_cost','margin','margin_rate']]
-                for c in ['unit_price','clicks','conversions','ad_revenue','media_cost','margin']:
-                    rd[c] = rd[c].apply(lambda x: f"{x:,.0f}")
-                rd['cvr'] = rd['cvr'].apply(lambda x: f"{x:.2f}%")
-                rd['margin_rate'] = rd['margin_rate'].apply(lambda x: f"{x:.1f}%")
-                st.dataframe(rd.rename(columns={'date':'일자','publisher_type':'퍼블리셔','ad_name':'광고명',
-                    'media_name':'매체명','advertiser':'광고주','os':'OS','ad_type':'광고타입','unit_price':'단가',
-                    'clicks':'클릭수','conversions':'전환수','cvr':'CVR','ad_revenue':'광고비','media_cost':'매체비',
-                    'margin':'마진','margin_rate':'마진율'}), width='stretch', hide_index=True, height=500)
-                csv = raw.to_csv(index=False).encode('utf-8-sig')
-                st.download_button("📥 CSV 다운로드", csv, file_name=f"포인트클릭_{kf}_{kt}.csv", mime="text/csv")
+            view = st.segmented_control("보기", options=list(PC_DETAIL_VIEWS.keys()),
+                format_func=PC_DETAIL_VIEWS.get, key="pc_detail_view",
+                label_visibility="collapsed") or "conv"
+            # 선택한 뷰만 계산 (데이터 버전 · 필터 · 기간 · 뷰별 메모)
+            if view == "raw":
+                if kf < raw_min:
+                    st.caption(f"ℹ️ 원본 행은 {raw_min} 이후만 제공됩니다. 이전 기간 합계는 광고타입 · 광고주 · 매체 보기에서 확인하세요.")
+                _render_raw(filter_rows(df, PC_FILTER_DIMS, filters, kf, kt), (version, kf, kt), f"포인트클릭_{kf}_{kt}")
+                return
+
+            # DuckDB가 있으면 차원별 합계 · 광고 수를 Arrow 테이블에서 SQL로 집계 (없으면 큐브)
+            ads_table = None
+            if view == "media":
+                view_cube, view_src, ads, keys = media_cube(), msrc, None, PC_HISTORY_KEYS['daily_media']
+            elif view == "adv":
+                ads_table = _arrow(asrc)
+                view_cube, view_src = cube, src
+                ads = get_daily_cube(asrc, [], count_dims=PC_COUNT_DIMS) if ads_table is None else None
+                keys = set(PC_HISTORY_KEYS['daily']) & set(PC_HISTORY_KEYS['daily_ads'])
+            else:
+                view_cube, view_src, ads, keys = cube, src, None, PC_HISTORY_KEYS['daily']
+            note = _history_note(filters, keys, raw_min, kf)
+            if note:
+                st.caption(note)
+            d = _pc_detail_data(version, kf, kt, view, view_cube, ads, _arrow(view_src), ads_table)
+            if view == "conv":
+                _render_conv(d, (version, kf, kt))
+            elif view == "adv":
+                _render_adv(d, (version, kf, kt))
+            else:
+                _render_media(d, (version, kf, kt))
 
     @st.fragment
     def pc_trend_section():
-        st.markdown("## 💰 매출 · 마진 추이 (주단위, 월요일 기준)")
+        st.markdown("## 💰 매출 · 마진 추이")
         tf, tt, queried = quick_date_picker(dmin, dmax, "pc_tr", "이전달1일")
+        freq = st.segmented_control("집계 단위", options=list(PERIOD_FREQS.keys()),
+            format_func=PERIOD_FREQS.get, key="pc_tr_freq", default="W") or "W"
         with (st.spinner("조회 중...") if queried else nullcontext()):
-            tdf = df[(df['date'].dt.date >= tf) & (df['date'].dt.date <= tt)]
-
-            if tdf.empty:
+            if total_cube.row_count(tf, tt) == 0:
                 st.info("선택한 기간에 데이터가 없습니다.")
             else:
-                wp = make_weekly(tdf, group_col='publisher_type')
-                if not wp.empty:
-                    wp['wl'] = wp['week'].apply(week_label)
-
-                wt = make_weekly(tdf)
-                if not wt.empty:
-                    wt['margin_rate'] = wt.apply(lambda row: safe_divide(row['margin'], row['ad_revenue'], default=0, scale=100), axis=1)
-                    wt['wl'] = wt['week'].apply(week_label)
-
-                if wp.empty or wt.empty:
-                    st.info("주간 데이터를 생성할 수 없습니다.")
+                note = _history_note(filters, total_keys, raw_min, tf)
+                if note:
+                    st.caption(note)
+                figs = cached_figure((version, "pc_trend", tf, tt, freq),
+                                     lambda: _pc_trend_figures(total_cube, tf, tt, freq, _arrow(total_src)))
+                if figs is None:
+                    st.info("기간별 데이터를 생성할 수 없습니다.")
                     return
 
-                pubs = sorted(wp['publisher_type'].dropna().unique().tolist())
-
                 cl, cr = st.columns(2)
-
                 with cl:
                     st.markdown("#### 광고비(매출)")
-                    fig = go.Figure()
-                    for i, p in enumerate(pubs):
-                        s = wp[wp['publisher_type']==p].sort_values('week')
-                        fig.add_trace(go.Bar(x=s['wl'], y=s['ad_revenue'], name=p, marker_color=PUB_COLORS[i%len(PUB_COLORS)],
-                            hovertemplate=f"<b>{p}</b><br>%{{y:,.0f}}원<extra></extra>"))
-                    apply_layout(fig, dict(barmode='stack', height=380, xaxis_tickangle=-45))
-                    set_y_korean_ticks(fig, wp['ad_revenue'].tolist())
-                    st.plotly_chart(fig, width='stretch')
-
+                    st.plotly_chart(figs[0], width='stretch')
                 with cr:
                     st.markdown("#### 마진 · 마진율")
-                    fig2 = go.Figure()
-                    for i, p in enumerate(pubs):
-                        s = wp[wp['publisher_type']==p].sort_values('week')
-                        fig2.add_trace(go.Bar(x=s['wl'], y=s['margin'], name=p, marker_color=PUB_COLORS[i%len(PUB_COLORS)],
-                            showlegend=False, hovertemplate=f"<b>{p}</b><br>%{{y:,.0f}}원<extra></extra>"))
-
-                    max_margin_rate = wt['margin_rate'].max() if not wt.empty else 10
-                    fig2.add_trace(go.Scatter(x=wt['wl'], y=wt['margin_rate'], name='마진율', mode='lines+markers+text',
-                        text=[f"{v:.1f}%" for v in wt['margin_rate']], textposition='top center',
-                        textfont=dict(size=9, color=PASTEL['yellow']), line=dict(color=PASTEL['yellow'], width=2.5),
-                        marker=dict(size=6, color=PASTEL['yellow']), yaxis='y2', hovertemplate="마진율: %{y:.1f}%<extra></extra>"))
-                    apply_layout(fig2, dict(barmode='stack', height=380, xaxis_tickangle=-45,
-                        yaxis2=dict(title="", overlaying='y', side='right', range=[0, max(max_margin_rate*1.5, 10)],
-                            ticksuffix="%", gridcolor="rgba(0,0,0,0)", tickfont=dict(size=10, color=PASTEL['yellow']))))
-                    set_y_korean_ticks(fig2, wp['margin'].tolist())
-                    st.plotly_chart(fig2, width='stretch')
+                    st.plotly_chart(figs[1], width='stretch')
 
     pc_kpi_section()
     st.markdown("---")
@@ -14,23 +14,37 @@ Google Sheets → Supabase 데이터 마이그레이션 스크립트
     ※ 스프레드시트가 파일별로 분리된 경우 개별 지정도 가능 (SPREADSHEET_ID가 없을 때 fallback):
     SPREADSHEET_ID_PC_DB, SPREADSHEET_ID_PC_GA
     SPREADSHEET_ID_CP_DB, SPREADSHEET_ID_CP_GA
+
+시트 캐시:
+    읽은 시트는 SHEET_CACHE_DIR(기본 .sheet_cache)에 Parquet 스냅샷으로 저장하고,
+    Drive modifiedTime이 같으면 다시 내려받지 않습니다. (--refresh-cache 로 무시)
 """
 
 import os
 import sys
 import json
+import glob
+import hashlib
 import argparse
+import shutil
 from datetime import datetime
+from functools import lru_cache
 
 import gspread
 import pandas as pd
 from google.oauth2.service_account import Credentials
 from supabase import create_client
 
+from config.schema import SCHEMAS
+
 # ============================================================
 # 설정
 # ============================================================
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/drive.metadata.readonly",   # 시트 캐시 검증용 modifiedTime
+]
+SHEET_CACHE_DIR = os.environ.get("SHEET_CACHE_DIR", ".sheet_cache")
 
 # 시트명 매핑: Supabase 테이블 → (구 env 변수명(fallback), 시트명)
 # SPREADSHEET_ID 단일 환경변수가 있으면 그것을 우선 사용
@@ -43,52 +57,12 @@ SHEET_TO_TABLE = {
     "cashplay_ga_user":   ("SPREADSHEET_ID_CP_GA", "캐시플레이_GA_USER"),
     "media_master":       ("SPREADSHEET_ID_PC_GA", "매체마스터"),
 }
-
-# 포인트클릭 DB 컬럼 매핑 (한글 → 영어)
-PC_DB_COL_MAP = {
-    '일자': 'date', '광고구분': 'ad_category', '매체타입': 'media_type',
-    '퍼블리셔타입': 'publisher_type', '광고명': 'ad_name', '매체명': 'media_name',
-    'CD': 'cd', '광고주명': 'advertiser', 'OS': 'os', '광고타입': 'ad_type',
-    '광고단가': 'unit_price', '클릭수': 'clicks', '전환수': 'conversions',
-    '광고비': 'ad_revenue', '매체수익금': 'media_cost', '매체정산비율': 'media_rate',
-    '마진금액': 'margin', '마진율': 'margin_rate', 'CVR': 'cvr',
-    '주차': 'week', '월별': 'month'
-}
-
-# 캐시플레이 DB 컬럼 매핑
-CP_DB_COL_MAP = {
-    '날짜': 'date',
-    '리워드(원)_유상': 'reward_paid', '리워드(원)_무상': 'reward_free', '리워드(원)_합계': 'reward_total',
-    '게임(원)_직거래': 'game_direct', '게임(원)_DSP': 'game_dsp', '게임(원)_RS': 'game_rs',
-    '게임(원)_인수': 'game_acquisition', '게임(원)_합계': 'game_total',
-    '게더링(원)_포인트클릭': 'gathering_pointclick',
-    'IAA(원)_레벨플레이': 'iaa_levelplay', 'IAA(원)_애드웨일': 'iaa_adwhale',
-    'IAA(원)_허블': 'iaa_hubble', 'IAA(원)_합계': 'iaa_total',
-    '오퍼월(원)_애드팝콘': 'offerwall_adpopcorn', '오퍼월(원)_포인트클릭': 'offerwall_pointclick',
-    '오퍼월(원)_아이브': 'offerwall_ive', '오퍼월(원)_애드포러스': 'offerwall_adforus',
-    '오퍼월(원)_애디슨': 'offerwall_addison', '오퍼월(원)_애드조': 'offerwall_adjo',
-    '오퍼월(원)_합계': 'offerwall_total'
-}
-
-# GA4 이벤트 컬럼 매핑 (customEvent:xxx → xxx)
-GA_EVENT_COL_MAP = {
-    'customEvent:page_name': 'page_name',
-    'customEvent:page_type': 'page_type',
-    'customEvent:media_key': 'media_key',
-    'customEvent:page': 'page',
-    'customEvent:button_id': 'button_id',
-}
-
-# 매체마스터 컬럼 매핑
-MEDIA_COL_MAP = {
-    '매체키': 'media_key',
-    '매체명': 'media_name',
-}
-
+# 시트 헤더(한글 · customEvent:*) → 컬럼명 매핑과 타입 변환은 config.schema.SCHEMAS 기준
 
 # ============================================================
 # 클라이언트
 # ============================================================
+@lru_cache(maxsize=1)
 def get_gspread_client():
     creds_json = json.loads(os.environ["GCP_SERVICE_ACCOUNT"])
     creds = Credentials.from_service_account_info(creds_json, scopes=SCOPES)
@@ -104,11 +78,64 @@ def get_supabase_client():
 # ============================================================
 # Google Sheets 읽기
 # ============================================================
+@lru_cache(maxsize=None)
+def _open_spreadsheet(spreadsheet_id: str):
+    """같은 스프레드시트의 여러 시트를 읽을 때 메타데이터 조회는 1회만"""
+    return get_gspread_client().open_by_key(spreadsheet_id)
+
+
+_MODIFIED_TIMES: dict = {}   # spreadsheet_id → Drive modifiedTime (실행 중 캐시)
+
+
+def _sheet_modified_time(gc, spreadsheet_id: str) -> str | None:
+    """Drive modifiedTime (스프레드시트 단위, 실행 중 1회만 조회). 실패 시 None → 캐시 미사용"""
+    if spreadsheet_id not in _MODIFIED_TIMES:
+        try:
+            _MODIFIED_TIMES[spreadsheet_id] = gc.http_client.get_file_drive_metadata(spreadsheet_id)["modifiedTime"]
+        except Exception as e:
+            print(f"[warn] modifiedTime 조회 실패 → 시트 캐시 미사용: {e}")
+            _MODIFIED_TIMES[spreadsheet_id] = None
+    return _MODIFIED_TIMES[spreadsheet_id]
+
+
+def _cache_path(spreadsheet_id: str, sheet_name: str, modified_time: str) -> tuple[str, str]:
+    """(시트별 접두어, 스냅샷 경로) — 파일명은 (시트, modifiedTime) 내용 주소"""
+    prefix = hashlib.sha1(f"{spreadsheet_id}|{sheet_name}".encode()).hexdigest()[:16]
+    version = hashlib.sha1(modified_time.encode()).hexdigest()[:16]
+    return prefix, os.path.join(SHEET_CACHE_DIR, f"{prefix}-{version}.parquet")
+
+
+def _read_cached(path: str) -> pd.DataFrame | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception as e:   # pyarrow 미설치 · 손상 파일
+        print(f"[warn] 시트 캐시 읽기 실패 ({e}) → 다시 내려받음")
+        return None
+
+
+def _write_cached(df: pd.DataFrame, prefix: str, path: str):
+    """스냅샷 저장 후 같은 시트의 이전 스냅샷 정리 (저장 실패는 무시)"""
+    try:
+        os.makedirs(SHEET_CACHE_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"[warn] 시트 캐시 저장 생략: {e}")
+        return
+    for old in glob.glob(os.path.join(SHEET_CACHE_DIR, f"{prefix}-*.parquet")):
+        if old != path:
+            os.remove(old)
+
+
 def read_sheet(sheet_name: str, fallback_id_env: str = None) -> pd.DataFrame:
     """Google Sheets에서 전체 데이터 읽기.
 
     SPREADSHEET_ID 환경변수를 우선 사용하고,
     없으면 fallback_id_env 이름의 개별 환경변수를 시도합니다.
+    Drive modifiedTime이 로컬 스냅샷과 같으면 시트를 내려받지 않고 스냅샷을 사용합니다.
     """
     # 단일 파일 우선
     spreadsheet_id = os.environ.get("SPREADSHEET_ID", "").strip()
@@ -126,14 +153,24 @@ def read_sheet(sheet_name: str, fallback_id_env: str = None) -> pd.DataFrame:
 
     gc = get_gspread_client()
     try:
-        sh = gc.open_by_key(spreadsheet_id)
-        ws = sh.worksheet(sheet_name)
+        cache = None
+        modified_time = _sheet_modified_time(gc, spreadsheet_id)
+        if modified_time:
+            cache = _cache_path(spreadsheet_id, sheet_name, modified_time)
+            df = _read_cached(cache[1])
+            if df is not None:
+                print(f"[read] '{sheet_name}' → {len(df)}행 (캐시, 수정 {modified_time})")
+                return df
+
+        ws = _open_spreadsheet(spreadsheet_id).worksheet(sheet_name)
         data = ws.get_all_values()
         if not data or len(data) < 2:
             print(f"[WARN] '{sheet_name}' 시트에 데이터가 없습니다.")
             return pd.DataFrame()
         df = pd.DataFrame(data[1:], columns=data[0])
         print(f"[read] '{sheet_name}' → {len(df)}행 읽기 완료")
+        if cache:
+            _write_cached(df, *cache)
         return df
     except Exception as e:
         print(f"[ERROR] '{sheet_name}' 읽기 실패: {e}")
@@ -143,115 +180,43 @@ def read_sheet(sheet_name: str, fallback_id_env: str = None) -> pd.DataFrame:
 # ============================================================
 # 전처리 함수
 # ============================================================
-def _to_numeric(val):
-    if val is None or val == "" or val == "-":
-        return 0
-    try:
-        v = str(val).replace(",", "")
-        f = float(v)
-        return int(f) if f == int(f) else round(f, 6)
-    except (ValueError, TypeError):
-        return 0
+def _process(df: pd.DataFrame, table_name: str) -> list:
+    """시트 → 적재 행 (스키마 별칭으로 컬럼명 변경 후 스키마 타입으로 일괄 변환, date 없는 행 제외)"""
+    schema = SCHEMAS[table_name]
+    df = df.rename(columns=schema.renames)
+    if any(c.name not in df.columns for c in schema.columns if not c.nullable):
+        return []
+    # 시트에 없는 컬럼은 빈 값(숫자 0 · 텍스트 NULL), 스키마에 없는 보조 컬럼은 제외
+    return schema.cast_rows(df.reindex(columns=schema.names()).to_dict('records'))
 
 
 def process_pointclick_db(df: pd.DataFrame) -> list:
-    df = df.rename(columns=PC_DB_COL_MAP)
-    if 'date' not in df.columns:
-        return []
-
-    numeric_cols = ['unit_price', 'clicks', 'conversions', 'ad_revenue', 'media_cost',
-                    'media_rate', 'margin', 'margin_rate', 'cvr']
-    rows = []
-    for _, row in df.iterrows():
-        date_val = str(row.get('date', '')).strip()
-        if not date_val or date_val == 'nan':
-            continue
-        rec = {'date': date_val}
-        for col in PC_DB_COL_MAP.values():
-            if col == 'date':
-                continue
-            val = row.get(col, '')
-            if col in numeric_cols:
-                rec[col] = _to_numeric(val)
-            else:
-                rec[col] = str(val) if val and str(val) != 'nan' else None
-        rows.append(rec)
-    return rows
+    return _process(df, "pointclick_db")
 
 
 def process_cashplay_db(df: pd.DataFrame) -> list:
-    df = df.rename(columns=CP_DB_COL_MAP)
-    if 'date' not in df.columns:
-        return []
-
-    numeric_cols = [c for c in CP_DB_COL_MAP.values() if c != 'date']
-    rows = []
-    for _, row in df.iterrows():
-        date_val = str(row.get('date', '')).strip()
-        if not date_val or date_val == 'nan':
-            continue
-        rec = {'date': date_val}
-        for col in numeric_cols:
-            rec[col] = _to_numeric(row.get(col, 0))
-        rows.append(rec)
-    return rows
+    return _process(df, "cashplay_db")
 
 
 def process_ga_event(df: pd.DataFrame, table_name: str) -> list:
     """GA4 이벤트 데이터 전처리 (customEvent:* 컬럼명 변환)"""
-    df = df.rename(columns=GA_EVENT_COL_MAP)
-    if 'date' not in df.columns:
-        return []
-
-    numeric_cols = {'eventCount', 'sessions', 'screenPageViews',
-                    'averageSessionDuration', 'engagementRate', 'userEngagementDuration'}
-    rows = []
-    for _, row in df.iterrows():
-        date_val = str(row.get('date', '')).strip()
-        if not date_val or date_val == 'nan':
-            continue
-        rec = {}
-        for col in df.columns:
-            val = row.get(col)
-            if col == 'date':
-                rec[col] = date_val
-            elif col in numeric_cols:
-                rec[col] = _to_numeric(val)
-            else:
-                rec[col] = str(val) if val and str(val) != 'nan' else None
-        rows.append(rec)
+    # 매체명은 media_master로 조회 시점에 매핑 (시트에 조인된 media_name은 스키마에 없어 적재하지 않음)
+    rows = _process(df, table_name)
+    for rec in rows:
+        # 합산 가능한 총 세션시간 (평균 세션시간 × 세션 수)
+        rec['session_duration'] = rec['averageSessionDuration'] * rec['sessions']
     return rows
 
 
-def process_ga_user(df: pd.DataFrame) -> list:
+def process_ga_user(df: pd.DataFrame, table_name: str) -> list:
     """GA4 사용자 데이터 전처리"""
-    if 'date' not in df.columns:
-        return []
-
-    numeric_cols = {'activeUsers', 'active7DayUsers', 'active28DayUsers', 'newUsers', 'sessions'}
-    rows = []
-    for _, row in df.iterrows():
-        date_val = str(row.get('date', '')).strip()
-        if not date_val or date_val == 'nan':
-            continue
-        rec = {'date': date_val}
-        for col in numeric_cols:
-            rec[col] = _to_numeric(row.get(col, 0))
-        rows.append(rec)
-    return rows
+    return _process(df, table_name)
 
 
 def process_media_master(df: pd.DataFrame) -> list:
-    df = df.rename(columns=MEDIA_COL_MAP)
-    if 'media_key' not in df.columns:
-        return []
-    rows = []
-    for _, row in df.iterrows():
-        key = str(row.get('media_key', '')).strip()
-        name = str(row.get('media_name', '')).strip()
-        if key and key != 'nan':
-            rows.append({'media_key': key, 'media_name': name if name != 'nan' else ''})
-    return rows
+    rows = _process(df, "media_master")
+    return [{'media_key': rec['media_key'].strip(), 'media_name': (rec['media_name'] or '').strip()}
+            for rec in rows if rec['media_key'].strip()]
 
 
 # ============================================================
@@ -292,6 +257,8 @@ def migrate_pointclick_db(client):
     print("[delete] pointclick_db 기존 데이터 전체 삭제 중...")
     client.table("pointclick_db").delete().neq("id", 0).execute()
     insert_to_supabase(client, "pointclick_db", rows)
+    # 장기 추이용 일별 집계 갱신
+    client.rpc("refresh_pointclick_db_daily").execute()
 
 
 def migrate_cashplay_db(client):
@@ -314,6 +281,8 @@ def migrate_pointclick_ga(client):
     print("[delete] pointclick_ga 기존 데이터 전체 삭제 중...")
     client.table("pointclick_ga").delete().neq("id", 0).execute()
     insert_to_supabase(client, "pointclick_ga", rows)
+    # 대시보드용 GA 일별 집계 갱신
+    client.rpc("refresh_pointclick_ga_daily").execute()
 
 
 def migrate_pointclick_ga_user(client):
@@ -321,7 +290,7 @@ def migrate_pointclick_ga_user(client):
     df = read_sheet("포인트클릭_GA_USER", fallback_id_env="SPREADSHEET_ID_PC_GA")
     if df.empty:
         return
-    rows = process_ga_user(df)
+    rows = process_ga_user(df, "pointclick_ga_user")
     print(f"[process] {len(rows)}행 전처리 완료")
     insert_to_supabase(client, "pointclick_ga_user", rows, on_conflict="date")
 
@@ -336,6 +305,8 @@ def migrate_cashplay_ga(client):
     print("[delete] cashplay_ga 기존 데이터 전체 삭제 중...")
     client.table("cashplay_ga").delete().neq("id", 0).execute()
     insert_to_supabase(client, "cashplay_ga", rows)
+    # 대시보드용 GA 일별 집계 갱신
+    client.rpc("refresh_cashplay_ga_daily").execute()
 
 
 def migrate_cashplay_ga_user(client):
@@ -343,7 +314,7 @@ def migrate_cashplay_ga_user(client):
     df = read_sheet("캐시플레이_GA_USER", fallback_id_env="SPREADSHEET_ID_CP_GA")
     if df.empty:
         return
-    rows = process_ga_user(df)
+    rows = process_ga_user(df, "cashplay_ga_user")
     print(f"[process] {len(rows)}행 전처리 완료")
     insert_to_supabase(client, "cashplay_ga_user", rows, on_conflict="date")
 
@@ -356,6 +327,9 @@ def migrate_media_master(client):
     rows = process_media_master(df)
     print(f"[process] {len(rows)}개 매체 전처리 완료")
     insert_to_supabase(client, "media_master", rows, on_conflict="media_key")
+    # 시트 기준으로 덮어썼으므로 버전 초기화 → 다음 create_media_master.py 실행 시 MySQL과 전체 diff
+    # (버전이 없는 동안 대시보드 load_media는 SUPABASE_CACHE_TTL 주기로 다시 읽음)
+    client.table("sync_state").delete().eq("table_name", "media_master").execute()
 
 
 # ============================================================
@@ -381,9 +355,16 @@ def main():
         choices=list(MIGRATE_FUNCS.keys()) + ["all"],
         help="마이그레이션할 테이블 (기본: all)"
     )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="로컬 시트 캐시를 비우고 모든 시트를 다시 내려받기"
+    )
     args = parser.parse_args()
 
     tables = list(MIGRATE_FUNCS.keys()) if "all" in args.tables else args.tables
+    if args.refresh_cache:
+        shutil.rmtree(SHEET_CACHE_DIR, ignore_errors=True)
 
     print(f"[migrate] 시작: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"[migrate] 대상 테이블: {', '.join(tables)}")
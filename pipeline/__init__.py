@@ -0,0 +1 @@
+"""동기화 스크립트 공용 모듈 (GitHub Actions 환경: pandas/streamlit 비의존)"""
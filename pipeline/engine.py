@@ -0,0 +1,329 @@
+"""선언형 동기화 엔진
+
+각 소스는 SyncSpec(추출 → 변환 → 적재 전략)으로 선언하고,
+스트리밍 적재 · 병렬 청크 · 재시도 · 날짜 단위 체크포인트 · 실행 지표는 엔진이 한 번만 구현한다.
+
+    spec = SyncSpec(name="pointclick_db", table="pointclick_db",
+                    extract=mysql_extractor(SQL, connect, params=lambda dates: (dates[0],)),
+                    load="replace", per_date=True)
+    run(spec, ["2026-03-15"])
+
+적재 전략:
+    "upsert"  : key 컬럼 기준 upsert (재시도 안전)
+    "replace" : 단위 날짜 구간을 한 번에 삭제 후 insert (첫 배치 도착 시 삭제 → 추출 실패 시 기존 데이터 보존,
+                적재 중 실패하면 단위 전체를 삭제부터 다시 실행)
+    callable  : load(client, rows, metrics) → 적재 행 수 (단위 전체 행을 모아 한 번 호출)
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, Iterable
+
+KST = timezone(timedelta(hours=9))
+CHECKPOINT_DIR = os.environ.get("SYNC_CHECKPOINT_DIR", ".sync_checkpoint")
+
+
+def get_supabase_client():
+    from supabase import create_client
+    return create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+
+
+# ── 날짜 ──────────────────────────────────────────────────────
+def date_range(start: str, end: str) -> list[str]:
+    """start ~ end (YYYY-MM-DD, 양끝 포함) 날짜 리스트"""
+    s = datetime.strptime(start, "%Y-%m-%d")
+    days = (datetime.strptime(end, "%Y-%m-%d") - s).days + 1
+    return [(s + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+
+
+def recent_dates(days: int) -> list[str]:
+    """전일(KST) 기준 최근 N일 날짜 리스트 (오래된 날짜부터)"""
+    end = datetime.now(KST) - timedelta(days=1)
+    return [(end - timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days - 1, -1, -1)]
+
+
+# ── 값 변환 ───────────────────────────────────────────────────
+def format_value(val):
+    """DB 값 → JSON 적재 값 (날짜는 문자열, 정수로 떨어지는 실수는 int)"""
+    if isinstance(val, (datetime, date)):
+        return val.strftime("%Y-%m-%d")
+    if isinstance(val, Decimal):
+        # SUM 결과 등 정수 Decimal은 float을 거치지 않고 바로 int (BIGINT 컬럼 적재)
+        if val == val.to_integral_value():
+            return int(val)
+        val = float(val)
+    if isinstance(val, float):
+        f = round(val, 6)
+        return int(f) if f == int(f) else f
+    return val
+
+
+def format_rows(rows: list[dict]) -> list[dict]:
+    return [{k: format_value(v) for k, v in row.items()} for row in rows]
+
+
+# ── 재시도 ────────────────────────────────────────────────────
+def retry(fn, *args, attempts: int = 4, base_delay: float = 1.0, label: str = "sync",
+          metrics: "SyncMetrics | None" = None, **kwargs):
+    """예외 발생 시 지수 백오프(full jitter)로 재시도 (멱등 요청에만 사용)"""
+    for attempt in range(attempts + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            if metrics is not None:
+                metrics.add(retries=1)
+            delay = random.uniform(0, base_delay * 2 ** attempt)
+            print(f"[warn] {label} 실패 ({type(e).__name__}: {e}), {delay:.1f}초 후 재시도 "
+                  f"({attempt + 1}/{attempts})")
+            time.sleep(delay)
+
+
+# ── 추출기 ────────────────────────────────────────────────────
+def mysql_extractor(sql: str, connect: Callable, params: Callable | None = None,
+                    batch_size: int = 5000) -> Callable:
+    """MySQL 쿼리 추출기 (서버 측 커서 + fetchmany 배치 스트리밍)
+
+    connect: pymysql 연결 생성 함수 (cursorclass=SSDictCursor 권장)
+    params: 단위 날짜 리스트 → 쿼리 파라미터 (None이면 파라미터 없음)
+    """
+    def extract(dates: list[str]) -> Iterable[list[dict]]:
+        conn = connect()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params(dates) if params else None)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield format_rows(rows)
+        finally:
+            conn.close()
+    return extract
+
+
+# ── 스펙 · 지표 ───────────────────────────────────────────────
+@dataclass
+class SyncSpec:
+    """소스 1개의 선언
+
+    extract: 단위 날짜 리스트 → 행 배치(list[dict]) 이터러블
+    transform: 배치 → 배치 (선택)
+    per_date: True면 날짜별로 추출·적재하고 완료 날짜를 체크포인트 (여러 날짜 재실행 시 이어서 진행)
+    skip_existing: True면 대상 테이블에 이미 있는 날짜는 건너뜀 (run(force=True)로 무시,
+                   날짜당 1행인 테이블용 — 존재 여부를 한 번의 in 조회로 확인)
+    """
+    name: str
+    table: str
+    extract: Callable
+    transform: Callable | None = None
+    load: str | Callable = "upsert"
+    key: str = "date"
+    date_column: str = "date"
+    per_date: bool = False
+    skip_existing: bool = False
+    refresh_rpc: str | None = None
+    chunk_size: int = 1000
+    max_workers: int = 4
+
+
+class SyncMetrics:
+    """실행 지표 (스레드 안전 카운터 + 경과 시간)"""
+
+    FIELDS = ("extracted", "loaded", "requests", "retries", "skipped")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        for f in self.FIELDS:
+            setattr(self, f, 0)
+
+    def add(self, **counts):
+        with self.lock:
+            for k, v in counts.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    def report(self):
+        print(f"[sync] {self.name}: 추출 {self.extracted}행 · 적재 {self.loaded}행 · "
+              f"요청 {self.requests}회 · 재시도 {self.retries}회 · 건너뜀 {self.skipped}일 · "
+              f"{time.monotonic() - self.started:.1f}s")
+
+
+# ── 체크포인트 ────────────────────────────────────────────────
+class _Checkpoint:
+    """완료된 날짜 단위 기록 (같은 스펙 · 같은 날짜 목록으로 재실행하면 남은 날짜만 진행)"""
+
+    def __init__(self, name: str, dates: list[str], checkpoint_dir: str = CHECKPOINT_DIR):
+        digest = hashlib.sha1(f"{name}|{','.join(dates)}".encode()).hexdigest()[:16]
+        self.path = os.path.join(checkpoint_dir, f"{name}-{digest}.json")
+
+    def load(self) -> set:
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, encoding="utf-8") as f:
+            return set(json.load(f))
+
+    def save(self, done: set):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(sorted(done), f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ── 실행 ──────────────────────────────────────────────────────
+def existing_dates(client, spec: SyncSpec, dates: list[str], metrics: SyncMetrics) -> set:
+    """대상 테이블에 이미 있는 날짜 (한 번의 요청)"""
+    resp = retry(client.table(spec.table).select(spec.date_column)
+                 .in_(spec.date_column, dates).execute, label=f"{spec.table} 조회", metrics=metrics)
+    metrics.add(requests=1)
+    return {row[spec.date_column] for row in resp.data or []}
+
+
+def _write_chunk(client, spec: SyncSpec, chunk: list[dict], metrics: SyncMetrics):
+    if spec.load == "upsert":
+        retry(client.table(spec.table).upsert(chunk, on_conflict=spec.key).execute,
+              label=f"{spec.table} upsert", metrics=metrics)
+    else:
+        # insert는 청크만 재시도하면 중복 위험 → 실패하면 _replay_unit이 단위 전체를 삭제부터 다시 실행
+        client.table(spec.table).insert(chunk).execute()
+    metrics.add(requests=1, loaded=len(chunk))
+
+
+def _clear_unit(client, spec: SyncSpec, unit: list[str], metrics: SyncMetrics):
+    retry(client.table(spec.table).delete().in_(spec.date_column, unit).execute,
+          label=f"{spec.table} 삭제", metrics=metrics)
+    metrics.add(requests=1)
+
+
+def _run_unit(client, spec: SyncSpec, unit: list[str], pool: ThreadPoolExecutor,
+              metrics: SyncMetrics, state: dict | None = None) -> int:
+    """단위(날짜 1개 또는 전체 구간) 추출 → 변환 → 적재
+
+    state: replace 적재에서 삭제 여부를 호출 측에 알리는 dict (state["cleared"])
+    """
+    loaded_before = metrics.loaded
+    collected = [] if callable(spec.load) else None
+    cleared = bool(state and state.get("cleared"))   # 재실행 시 호출 측이 이미 비운 경우
+    pending = set()
+
+    def drain(limit: int):
+        nonlocal pending
+        while len(pending) > limit:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                fut.result()
+
+    try:
+        for batch in spec.extract(unit):
+            metrics.add(extracted=len(batch))
+            if spec.transform:
+                batch = spec.transform(batch)
+            if not batch:
+                continue
+            if collected is not None:
+                collected.extend(batch)
+                continue
+            if spec.load == "replace" and not cleared:
+                _clear_unit(client, spec, unit, metrics)
+                cleared = True
+                if state is not None:
+                    state["cleared"] = True
+            for i in range(0, len(batch), spec.chunk_size):
+                pending.add(pool.submit(_write_chunk, client, spec, batch[i:i + spec.chunk_size], metrics))
+                drain(spec.max_workers * 2)   # 진행 중인 청크 수 제한 → 메모리 상한
+        drain(0)
+    finally:
+        wait(pending)
+
+    if collected is not None:
+        return spec.load(client, collected, metrics) if collected else 0
+    return metrics.loaded - loaded_before
+
+
+def _replay_unit(client, spec: SyncSpec, unit: list[str], pool: ThreadPoolExecutor,
+                 metrics: SyncMetrics) -> int:
+    """replace 단위 실행 — 실패하면 단위 전체(추출 → 삭제 → insert)를 백오프 후 다시 실행
+
+    실패한 시도가 insert한 청크는 다음 시도가 먼저 삭제하므로 중복되지 않는다.
+    (이전 시도가 삭제 전에 실패했다면 기존 데이터 보존 규칙대로 첫 배치 도착 시 삭제)
+    """
+    state = {"cleared": False}
+
+    def attempt() -> int:
+        extracted, loaded = metrics.extracted, metrics.loaded
+        if state["cleared"] and unit:
+            _clear_unit(client, spec, unit, metrics)
+        try:
+            return _run_unit(client, spec, unit, pool, metrics, state)
+        except Exception:
+            # 실패한 시도의 행 수는 지표에서 되돌림 (다음 시도가 다시 셈)
+            metrics.add(extracted=extracted - metrics.extracted, loaded=loaded - metrics.loaded)
+            raise
+
+    return retry(attempt, label=f"{spec.table} {unit[0] if unit else '전체'} 단위", metrics=metrics)
+
+
+def run(spec: SyncSpec, dates: list[str], client=None, force: bool = False) -> SyncMetrics:
+    """스펙 실행 후 지표 반환 (dates가 비어 있으면 날짜 조건 없는 단일 단위 — replace 적재는 불가)"""
+    if spec.load == "replace" and not dates:
+        # 삭제 범위가 없으면 재실행마다 같은 행이 중복 삽입됨
+        raise ValueError(f"{spec.name}: replace 적재에는 날짜가 필요합니다")
+    client = client or get_supabase_client()
+    metrics = SyncMetrics(spec.name)
+
+    if spec.skip_existing and not force and dates:
+        present = existing_dates(client, spec, dates, metrics)
+        for d in sorted(present & set(dates)):
+            print(f"[sync] {d} 데이터가 이미 존재합니다. 건너뜁니다. (--force 로 덮어쓰기 가능)")
+        metrics.add(skipped=len(present & set(dates)))
+        dates = [d for d in dates if d not in present]
+        if not dates:
+            metrics.report()
+            return metrics
+
+    units = [[d] for d in dates] if spec.per_date else [dates]
+    checkpoint = _Checkpoint(spec.name, dates) if spec.per_date and len(units) > 1 else None
+    done = checkpoint.load() if checkpoint else set()
+    if done:
+        print(f"[sync] {spec.name} 체크포인트: {len(done)}일 완료분 건너뜀")
+
+    total = 0
+    with ThreadPoolExecutor(max_workers=spec.max_workers) as pool:
+        for unit in units:
+            if unit and unit[0] in done:
+                continue
+            n = (_replay_unit if spec.load == "replace" else _run_unit)(client, spec, unit, pool, metrics)
+            total += n
+            label = f"{unit[0]} " if spec.per_date else ""
+            print(f"[sync] {label}→ {spec.table} {n}행 적재")
+            if checkpoint:
+                done.add(unit[0])
+                checkpoint.save(done)
+
+    if checkpoint:
+        checkpoint.clear()
+
+    if spec.refresh_rpc and total:
+        try:
+            client.rpc(spec.refresh_rpc).execute()
+            metrics.add(requests=1)
+            print(f"[sync] {spec.refresh_rpc} 갱신 완료")
+        except Exception as e:
+            print(f"[warn] {spec.refresh_rpc} 갱신 실패: {e}")
+
+    metrics.report()
+    return metrics
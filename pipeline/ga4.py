@@ -0,0 +1,333 @@
+"""GA4 Data API 공용 모듈 (요청 스케줄러 · 컬럼 단위 응답 파싱)
+
+응답 파싱: proto-plus 래퍼는 필드 접근마다 변환 비용이 커서 원본 protobuf 메시지에서
+컬럼별로 값을 한 번에 뽑고, 날짜/리퍼러처럼 고유값이 적은 변환은 값별로 1회만 수행한다.
+"""
+import hashlib
+import json
+import os
+import random
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from urllib.parse import urlparse
+
+from google.api_core import exceptions as gexc
+from google.oauth2.service_account import Credentials
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+from google.analytics.data_v1beta.types import MetricType, RunReportRequest, RunReportResponse
+
+from pipeline.engine import KST
+
+
+def sanitize_col(name: str) -> str:
+    """GA4 컬럼명을 Supabase 컬럼명으로 변환 (customEvent:xxx → xxx)"""
+    if name.startswith("customEvent:"):
+        return name.split(":", 1)[1]
+    return name
+
+
+def _format_date(val: str) -> str:
+    """YYYYMMDD → YYYY-MM-DD"""
+    if len(val) == 8 and val.isdigit():
+        return f"{val[:4]}-{val[4:6]}-{val[6:]}"
+    return val
+
+
+def _referrer_normalizer(internal_domain: str):
+    """내부 도메인 리퍼러는 경로만, 외부 도메인은 (external)로 정규화"""
+    def normalize(val: str) -> str:
+        if not val:
+            return val
+        try:
+            parsed = urlparse(val)
+            if parsed.hostname and internal_domain in parsed.hostname:
+                return parsed.path or "/"
+            if parsed.hostname:
+                return "(external)"
+        except Exception:
+            pass
+        return val
+    return normalize
+
+
+def _memo_map(fn, values: list) -> list:
+    """고유값별로 fn을 1회만 호출하여 리스트 변환"""
+    cache = {}
+    out = []
+    for v in values:
+        r = cache.get(v)
+        if r is None and v not in cache:
+            r = cache[v] = fn(v)
+        out.append(r)
+    return out
+
+
+def parse_columns(response, dim_names: list, metric_names: list, internal_domain: str = "") -> dict:
+    """GA4 RunReportResponse → {Supabase 컬럼명: 값 리스트}
+
+    dim_names / metric_names: 요청한 차원 / 지표 이름 (GA4 API 이름 그대로, 요청 순서)
+    """
+    pb = RunReportResponse.pb(response) if isinstance(response, RunReportResponse) else response
+    rows = pb.rows
+
+    columns = {}
+    for i, name in enumerate(dim_names):
+        values = [r.dimension_values[i].value for r in rows]
+        if name == "date":
+            values = _memo_map(_format_date, values)
+        elif name == "pageReferrer" and internal_domain:
+            values = _memo_map(_referrer_normalizer(internal_domain), values)
+        columns[sanitize_col(name)] = values
+
+    for j, name in enumerate(metric_names):
+        # 정수 지표(이벤트 수 · 세션 수 · 사용자 수)는 int 그대로 → BIGINT 컬럼 적재
+        integer = j < len(pb.metric_headers) and pb.metric_headers[j].type_ == MetricType.TYPE_INTEGER
+        values = list(map(int if integer else float, (r.metric_values[j].value for r in rows)))
+        if name == "engagementRate":
+            values = [round(v * 100, 2) for v in values]
+        columns[sanitize_col(name)] = values
+
+    return columns
+
+
+def to_records(columns: dict) -> list[dict]:
+    """컬럼 dict → Supabase insert용 행 dict 리스트"""
+    names = list(columns)
+    return [dict(zip(names, vals)) for vals in zip(*columns.values())]
+
+
+# ============================================================
+# GA4 클라이언트 · 요청 스케줄러
+# ============================================================
+SCOPES = ["https://www.googleapis.com/auth/analytics.readonly"]
+
+# 재시도 대상 (일시적 오류 · 할당량 초과)
+RETRYABLE = (
+    gexc.ResourceExhausted, gexc.TooManyRequests, gexc.ServiceUnavailable,
+    gexc.DeadlineExceeded, gexc.InternalServerError,
+)
+# 한 페이지가 너무 커서 시간 초과된 경우 → 같은 요청을 반복하지 않고 페이지를 반으로 나눠 재시도
+SPLITTABLE = (gexc.DeadlineExceeded,)
+
+# 페이지 체크포인트는 실행한 머신의 로컬 디스크에만 남는다 (sync_state 등 서버에 저장하지 않음).
+# GitHub Actions 러너는 매번 새로 시작하므로 같은 머신에서 실패 직후 다시 실행할 때만 이어서 조회된다.
+CHECKPOINT_DIR = os.environ.get("GA4_CHECKPOINT_DIR", ".ga4_checkpoint")
+CHECKPOINT_MAX_AGE = 6 * 3600   # 초 — 이보다 오래된 체크포인트는 버림
+# GA4는 최근 며칠 데이터가 계속 갱신되어 행 순서 · 수가 바뀜 → 이 구간이 포함된 요청은 체크포인트하지 않음
+# (다른 시점에 받은 페이지를 offset으로 이으면 행이 중복 · 누락됨)
+FRESH_DAYS = 3
+
+
+def get_client() -> BetaAnalyticsDataClient:
+    """GCP_SERVICE_ACCOUNT 환경변수(JSON)로 GA4 Data API 클라이언트 생성"""
+    creds_json = json.loads(os.environ["GCP_SERVICE_ACCOUNT"])
+    creds = Credentials.from_service_account_info(creds_json, scopes=SCOPES)
+    return BetaAnalyticsDataClient(credentials=creds)
+
+
+def with_retries(fn, *args, max_retries: int = 5, base_delay: float = 2.0, label: str = "GA4",
+                 no_retry: tuple = (), **kwargs):
+    """일시적 오류 시 지수 백오프(full jitter)로 재시도 (no_retry 예외는 즉시 전달)"""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn(*args, **kwargs)
+        except RETRYABLE as e:
+            if attempt == max_retries or isinstance(e, no_retry):
+                raise
+            delay = random.uniform(0, base_delay * 2 ** attempt)
+            print(f"[warn] {label} 요청 실패 ({type(e).__name__}), {delay:.1f}초 후 재시도 "
+                  f"({attempt + 1}/{max_retries})")
+            time.sleep(delay)
+
+
+class ReportScheduler:
+    """RunReport 페이지 요청 스케줄러
+
+    - 응답의 property_quota(남은 토큰 · 동시 요청 수)에 맞춰 동시 요청 수를 조절
+    - 일시적 오류는 지터 백오프로 재시도, 시간 초과/할당량 초과가 반복되는 페이지는 반으로 분할
+    - 완료된 페이지를 체크포인트 디렉터리(로컬 전용)에 저장해 재실행 시 남은 구간만 조회
+      요청 · 기간 지문과 생성 시각을 함께 저장하고, 지문이 다르거나 CHECKPOINT_MAX_AGE보다 오래됐으면 버린다.
+      최근 FRESH_DAYS일이 포함된 기간은 체크포인트하지 않는다.
+    """
+
+    def __init__(self, client, page_size: int = 100000, max_workers: int = 4,
+                 max_retries: int = 5, base_delay: float = 2.0, min_page_size: int = 5000,
+                 checkpoint_dir: str = CHECKPOINT_DIR):
+        self.client = client
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.min_page_size = min_page_size
+        self.checkpoint_dir = checkpoint_dir
+        self.quota = None
+        self.tokens_per_page = 0
+
+    # ── 체크포인트 ────────────────────────────────────────────
+    @staticmethod
+    def _fingerprint(request: RunReportRequest) -> str:
+        """offset/limit을 제외한 요청 내용(속성 · 기간 · 차원 · 지표 · 필터)의 지문"""
+        key_req = RunReportRequest(request)
+        key_req.offset = 0
+        key_req.limit = 0
+        key_req.return_property_quota = False
+        return hashlib.sha256(RunReportRequest.serialize(key_req)).hexdigest()
+
+    @staticmethod
+    def _resumable(request: RunReportRequest) -> bool:
+        """모든 조회 기간이 최근 FRESH_DAYS일 이전에 끝나는 요청만 체크포인트 대상"""
+        cutoff = datetime.now(KST).date() - timedelta(days=FRESH_DAYS)
+        for r in request.date_ranges:
+            try:
+                if date.fromisoformat(r.end_date) >= cutoff:
+                    return False
+            except ValueError:   # "yesterday" · "7daysAgo" 등 상대 날짜
+                return False
+        return bool(request.date_ranges)
+
+    @staticmethod
+    def _load_pages(path: str, fingerprint: str) -> tuple[dict, int | None]:
+        pages, row_count = {}, None
+        if not os.path.isdir(path):
+            return pages, row_count
+        try:
+            with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        age = time.time() - manifest.get("created", 0)
+        if manifest.get("fingerprint") != fingerprint or age > CHECKPOINT_MAX_AGE:
+            print(f"[warn] 체크포인트 {path} 폐기 (요청 불일치 또는 {CHECKPOINT_MAX_AGE // 3600}시간 경과)")
+            shutil.rmtree(path, ignore_errors=True)
+            return pages, row_count
+        for name in os.listdir(path):
+            if name == "manifest.json" or not name.endswith(".json"):
+                continue
+            with open(os.path.join(path, name), encoding="utf-8") as f:
+                page = json.load(f)
+            pages[page["offset"]] = page["rows"]
+            row_count = page["row_count"]
+        return pages, row_count
+
+    @staticmethod
+    def _save_manifest(path: str, fingerprint: str, request: RunReportRequest):
+        os.makedirs(path, exist_ok=True)
+        window = [[r.start_date, r.end_date] for r in request.date_ranges]
+        with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "created": time.time(), "window": window}, f)
+
+    @staticmethod
+    def _save_page(path: str | None, offset: int, row_count: int, rows: list):
+        if path is None:
+            return
+        os.makedirs(path, exist_ok=True)
+        tmp = os.path.join(path, f".{offset}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"offset": offset, "row_count": row_count, "rows": rows}, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(path, f"{offset:012d}.json"))
+
+    # ── 할당량 기반 동시성 ────────────────────────────────────
+    def _update_quota(self, response):
+        quota = response.property_quota
+        if quota.tokens_per_hour.consumed or quota.tokens_per_hour.remaining:
+            self.quota = quota
+            self.tokens_per_page = max(self.tokens_per_page, quota.tokens_per_hour.consumed)
+
+    def _workers(self) -> int:
+        """남은 동시 요청 수 · 시간당 토큰으로 이번 배치의 동시 요청 수 결정"""
+        if self.quota is None:
+            return 1
+        workers = min(self.max_workers, max(self.quota.concurrent_requests.remaining, 1))
+        if self.tokens_per_page:
+            affordable = self.quota.tokens_per_hour.remaining // self.tokens_per_page
+            if affordable < workers * 2:
+                print(f"[warn] GA4 시간당 토큰 잔여 {self.quota.tokens_per_hour.remaining} "
+                      f"(페이지당 약 {self.tokens_per_page}) → 동시 요청 축소")
+            workers = min(workers, max(affordable // 2, 1))
+        return workers
+
+    # ── 페이지 조회 ───────────────────────────────────────────
+    def _fetch_page(self, request: RunReportRequest, offset: int, limit: int, parse):
+        req = RunReportRequest(request)
+        req.offset = offset
+        req.limit = limit
+        req.return_property_quota = True
+        # 분할 가능한 크기의 페이지는 시간 초과 시 재시도 대신 분할
+        splittable = SPLITTABLE if limit // 2 >= self.min_page_size else ()
+        response = with_retries(self.client.run_report, req, max_retries=self.max_retries,
+                                base_delay=self.base_delay, label=f"offset {offset}",
+                                no_retry=splittable)
+        return response, parse(response)
+
+    def run(self, request: RunReportRequest, parse, label: str = "GA4") -> list:
+        """전체 페이지 조회 후 parse(response) 결과를 offset 순으로 이어 붙여 반환"""
+        # 체크포인트 위치는 요청 지문 앞 16자리 (최근 FRESH_DAYS일이 포함되면 체크포인트 없음)
+        fingerprint = self._fingerprint(request)
+        path = os.path.join(self.checkpoint_dir, fingerprint[:16]) if self._resumable(request) else None
+        pages, row_count = self._load_pages(path, fingerprint) if path else ({}, None)
+        if pages:
+            print(f"[sync] {label} 체크포인트 {len(pages)}페이지 재사용")
+
+        if row_count is None:
+            if path:
+                self._save_manifest(path, fingerprint, request)
+            response, rows = self._fetch_page(request, 0, self.page_size, parse)
+            self._update_quota(response)
+            row_count = response.row_count
+            pages[0] = rows
+            self._save_page(path, 0, row_count, rows)
+            print(f"[sync] {label} 조회 중: {len(rows)} / {row_count}행")
+
+        # 아직 조회하지 않은 구간 (체크포인트 페이지 사이의 빈 구간 포함)
+        pending, pos = [], 0
+        for off in sorted(pages):
+            if off > pos:
+                pending.extend(self._split(pos, off))
+            pos = max(pos, off + len(pages[off]))
+        if pos < row_count:
+            pending.extend(self._split(pos, row_count))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending:
+                n = self._workers()
+                batch, pending = pending[:n], pending[n:]
+                futures = {pool.submit(self._fetch_page, request, off, lim, parse): (off, lim)
+                           for off, lim in batch}
+                failed = None
+                for fut, (off, lim) in futures.items():
+                    try:
+                        response, rows = fut.result()
+                    except SPLITTABLE as e:
+                        if lim // 2 < self.min_page_size:
+                            failed = e
+                            continue
+                        # 큰 페이지 시간 초과 → 이후 페이지 크기를 줄이고 해당 구간 분할
+                        self.page_size = max(lim // 2, self.min_page_size)
+                        print(f"[warn] {label} offset {off} 실패 ({type(e).__name__}), "
+                              f"페이지 크기 {self.page_size}로 분할")
+                        pending.extend(self._split(off, off + lim))
+                        continue
+                    except Exception as e:
+                        failed = e
+                        continue
+                    self._update_quota(response)
+                    pages[off] = rows
+                    self._save_page(path, off, row_count, rows)
+                if failed is not None:
+                    # 같은 배치에서 성공한 페이지는 저장된 상태 → 재실행 시 남은 구간만 조회
+                    if path:
+                        print(f"[warn] {label} 조회 중단: 완료된 페이지는 {path}에 보존")
+                    raise failed
+                done = sum(len(r) for r in pages.values())
+                print(f"[sync] {label} 조회 중: {done} / {row_count}행")
+
+        rows = [row for off in sorted(pages) for row in pages[off]]
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+        return rows
+
+    def _split(self, start: int, end: int) -> list[tuple[int, int]]:
+        """[start, end) 구간을 현재 페이지 크기로 분할"""
+        return [(off, min(self.page_size, end - off)) for off in range(start, end, self.page_size)]
@@ -18,15 +18,15 @@ CREATE TABLE IF NOT EXISTS pointclick_db (
     advertiser      TEXT,
     os              TEXT,
     ad_type         TEXT,
-    unit_price      NUMERIC,
+    unit_price      BIGINT,
     clicks          INTEGER,
     conversions     INTEGER,
-    ad_revenue      NUMERIC,
-    media_cost      NUMERIC,
-    media_rate      NUMERIC,
-    margin          NUMERIC,
-    margin_rate     NUMERIC,
-    cvr             NUMERIC,
+    ad_revenue      BIGINT,
+    media_cost      BIGINT,
+    media_rate      DOUBLE PRECISION,
+    margin          BIGINT,
+    margin_rate     DOUBLE PRECISION,
+    cvr             DOUBLE PRECISION,
     week            TEXT,
     month           TEXT
 );
@@ -38,26 +38,26 @@ CREATE INDEX IF NOT EXISTS idx_pointclick_db_date ON pointclick_db(date);
 -- ─────────────────────────────────────────────────────────────
 CREATE TABLE IF NOT EXISTS cashplay_db (
     date                    DATE    PRIMARY KEY,
-    reward_paid             NUMERIC DEFAULT 0,
-    reward_free             NUMERIC DEFAULT 0,
-    reward_total            NUMERIC DEFAULT 0,
-    game_direct             NUMERIC DEFAULT 0,
-    game_dsp                NUMERIC DEFAULT 0,
-    game_rs                 NUMERIC DEFAULT 0,
-    game_acquisition        NUMERIC DEFAULT 0,
-    game_total              NUMERIC DEFAULT 0,
-    gathering_pointclick    NUMERIC DEFAULT 0,
-    iaa_levelplay           NUMERIC DEFAULT 0,
-    iaa_adwhale             NUMERIC DEFAULT 0,
-    iaa_hubble              NUMERIC DEFAULT 0,
-    iaa_total               NUMERIC DEFAULT 0,
-    offerwall_adpopcorn     NUMERIC DEFAULT 0,
-    offerwall_pointclick    NUMERIC DEFAULT 0,
-    offerwall_ive           NUMERIC DEFAULT 0,
-    offerwall_adforus       NUMERIC DEFAULT 0,
-    offerwall_addison       NUMERIC DEFAULT 0,
-    offerwall_adjo          NUMERIC DEFAULT 0,
-    offerwall_total         NUMERIC DEFAULT 0
+    reward_paid             BIGINT  DEFAULT 0,
+    reward_free             BIGINT  DEFAULT 0,
+    reward_total            BIGINT  DEFAULT 0,
+    game_direct             BIGINT  DEFAULT 0,
+    game_dsp                BIGINT  DEFAULT 0,
+    game_rs                 BIGINT  DEFAULT 0,
+    game_acquisition        BIGINT  DEFAULT 0,
+    game_total              BIGINT  DEFAULT 0,
+    gathering_pointclick    BIGINT  DEFAULT 0,
+    iaa_levelplay           BIGINT  DEFAULT 0,
+    iaa_adwhale             BIGINT  DEFAULT 0,
+    iaa_hubble              BIGINT  DEFAULT 0,
+    iaa_total               BIGINT  DEFAULT 0,
+    offerwall_adpopcorn     BIGINT  DEFAULT 0,
+    offerwall_pointclick    BIGINT  DEFAULT 0,
+    offerwall_ive           BIGINT  DEFAULT 0,
+    offerwall_adforus       BIGINT  DEFAULT 0,
+    offerwall_addison       BIGINT  DEFAULT 0,
+    offerwall_adjo          BIGINT  DEFAULT 0,
+    offerwall_total         BIGINT  DEFAULT 0
 );
 
 -- ─────────────────────────────────────────────────────────────
@@ -71,28 +71,36 @@ CREATE TABLE IF NOT EXISTS pointclick_ga (
     "pagePath"                  TEXT,
     page_name                   TEXT,
     page_type                   TEXT,
-    media_key                   TEXT,
-    media_name                  TEXT,
-    "eventCount"                NUMERIC,
-    sessions                    NUMERIC,
-    "screenPageViews"           NUMERIC,
-    "averageSessionDuration"    NUMERIC,
-    "engagementRate"            NUMERIC,
-    "userEngagementDuration"    NUMERIC
+    media_key                   TEXT,       -- 매체명은 media_master로 조회 시점에 매핑
+    "eventCount"                BIGINT,
+    sessions                    BIGINT,
+    "screenPageViews"           BIGINT,
+    "averageSessionDuration"    DOUBLE PRECISION,
+    "engagementRate"            DOUBLE PRECISION,
+    "userEngagementDuration"    DOUBLE PRECISION,
+    session_duration            DOUBLE PRECISION  -- averageSessionDuration × sessions (합산 가능한 총 세션시간)
 );
 
 CREATE INDEX IF NOT EXISTS idx_pointclick_ga_date ON pointclick_ga(date);
 
+-- 기존 테이블 보정: 총 세션시간 컬럼 추가 및 과거 행 채우기
+--                  적재 시점에 조인하던 media_name 제거 (매체명은 대시보드가 media_key → media_master로
+--                  조회 시점에 매핑하므로 매체명 변경이 과거 데이터에 즉시 반영됨 · 9. 참고)
+ALTER TABLE pointclick_ga ADD COLUMN IF NOT EXISTS session_duration DOUBLE PRECISION;
+ALTER TABLE pointclick_ga DROP COLUMN IF EXISTS media_name;
+UPDATE pointclick_ga SET session_duration = "averageSessionDuration" * sessions
+WHERE session_duration IS NULL;
+
 -- ─────────────────────────────────────────────────────────────
 -- 4. 포인트클릭 GA4 사용자 지표 (DAU/WAU/MAU)
 -- ─────────────────────────────────────────────────────────────
 CREATE TABLE IF NOT EXISTS pointclick_ga_user (
     date                DATE    PRIMARY KEY,
-    "activeUsers"       NUMERIC,
-    "active7DayUsers"   NUMERIC,
-    "active28DayUsers"  NUMERIC,
-    "newUsers"          NUMERIC,
-    sessions            NUMERIC
+    "activeUsers"       BIGINT,
+    "active7DayUsers"   BIGINT,
+    "active28DayUsers"  BIGINT,
+    "newUsers"          BIGINT,
+    sessions            BIGINT
 );
 
 -- ─────────────────────────────────────────────────────────────
@@ -107,26 +115,32 @@ CREATE TABLE IF NOT EXISTS cashplay_ga (
     page                        TEXT,
     page_type                   TEXT,
     button_id                   TEXT,
-    "eventCount"                NUMERIC,
-    sessions                    NUMERIC,
-    "screenPageViews"           NUMERIC,
-    "averageSessionDuration"    NUMERIC,
-    "engagementRate"            NUMERIC,
-    "userEngagementDuration"    NUMERIC
+    "eventCount"                BIGINT,
+    sessions                    BIGINT,
+    "screenPageViews"           BIGINT,
+    "averageSessionDuration"    DOUBLE PRECISION,
+    "engagementRate"            DOUBLE PRECISION,
+    "userEngagementDuration"    DOUBLE PRECISION,
+    session_duration            DOUBLE PRECISION  -- averageSessionDuration × sessions (합산 가능한 총 세션시간)
 );
 
 CREATE INDEX IF NOT EXISTS idx_cashplay_ga_date ON cashplay_ga(date);
 
+-- 기존 테이블 보정: 총 세션시간 컬럼 추가 및 과거 행 채우기
+ALTER TABLE cashplay_ga ADD COLUMN IF NOT EXISTS session_duration DOUBLE PRECISION;
+UPDATE cashplay_ga SET session_duration = "averageSessionDuration" * sessions
+WHERE session_duration IS NULL;
+
 -- ─────────────────────────────────────────────────────────────
 -- 6. 캐시플레이 GA4 사용자 지표 (DAU/WAU/MAU)
 -- ─────────────────────────────────────────────────────────────
 CREATE TABLE IF NOT EXISTS cashplay_ga_user (
     date                DATE    PRIMARY KEY,
-    "activeUsers"       NUMERIC,
-    "active7DayUsers"   NUMERIC,
-    "active28DayUsers"  NUMERIC,
-    "newUsers"          NUMERIC,
-    sessions            NUMERIC
+    "activeUsers"       BIGINT,
+    "active7DayUsers"   BIGINT,
+    "active28DayUsers"  BIGINT,
+    "newUsers"          BIGINT,
+    sessions            BIGINT
 );
 
 -- ─────────────────────────────────────────────────────────────
@@ -137,6 +151,252 @@ CREATE TABLE IF NOT EXISTS media_master (
     media_name  TEXT NOT NULL
 );
 
+-- ─────────────────────────────────────────────────────────────
+-- 기존 테이블 보정: NUMERIC → 원 단위 금액 · 건수는 BIGINT, 비율 · 시간은 DOUBLE PRECISION
+--   (위 CREATE TABLE 정의와 일치. 고정 폭 타입이라 PostgREST 직렬화 · 대시보드 파싱이 가볍다)
+--   금액은 원 단위로 반올림된다. 아직 NUMERIC인 컬럼만 테이블별 ALTER 1회로 바꾸므로
+--   반복 실행해도 테이블을 다시 쓰지 않는다.
+--
+-- 집계 뷰(8 · 9) 재생성: 아래 목록의 정의 버전이 뷰 COMMENT와 다르거나, 원본 테이블에
+--   타입을 바꿀 NUMERIC 컬럼이 남아 있는 뷰만 삭제하고 8 · 9의 CREATE ... IF NOT EXISTS가 다시 만든다.
+--   뷰 정의를 바꿀 때는 여기 버전과 8 · 9의 COMMENT를 함께 올린다. 변경이 없으면 아무것도 삭제하지 않는다.
+-- ─────────────────────────────────────────────────────────────
+DO $$
+DECLARE
+    v RECORD;
+BEGIN
+    FOR v IN
+        SELECT m.matviewname
+        FROM pg_matviews m
+        JOIN (VALUES
+            ('pointclick_db_daily',        'pointclick_db', '2'),
+            ('pointclick_db_daily_media',  'pointclick_db', '1'),
+            ('pointclick_db_daily_ads',    'pointclick_db', '1'),
+            ('pointclick_ga_page_daily',   'pointclick_ga', '2'),
+            ('pointclick_ga_event_daily',  'pointclick_ga', '1'),
+            ('cashplay_ga_page_daily',     'cashplay_ga',   '1'),
+            ('cashplay_ga_event_daily',    'cashplay_ga',   '1')
+        ) AS e(view_name, source_table, version) ON e.view_name = m.matviewname
+        WHERE m.schemaname = 'public'
+          AND (obj_description(format('public.%I', m.matviewname)::regclass, 'pg_class') IS DISTINCT FROM e.version
+               OR EXISTS (SELECT 1 FROM information_schema.columns c
+                          WHERE c.table_schema = 'public' AND c.table_name = e.source_table
+                            AND c.data_type = 'numeric'))
+    LOOP
+        EXECUTE format('DROP MATERIALIZED VIEW %I', v.matviewname);
+    END LOOP;
+END $$;
+
+-- 일 단위 인덱스는 8 · 9의 (date, 그룹 키) 고유 인덱스로 대체 (CONCURRENTLY 갱신에 필요)
+DROP INDEX IF EXISTS idx_pointclick_db_daily_date, idx_pointclick_ga_page_daily_date, idx_pointclick_ga_event_daily_date,
+                     idx_cashplay_ga_page_daily_date, idx_cashplay_ga_event_daily_date;
+
+DO $$
+DECLARE
+    t RECORD;
+BEGIN
+    FOR t IN
+        SELECT table_name,
+               string_agg(format('ALTER COLUMN %I TYPE %s USING %s', column_name, new_type,
+                                 CASE WHEN new_type = 'BIGINT' THEN format('ROUND(%I)', column_name)
+                                      ELSE quote_ident(column_name) END), ', ') AS clauses
+        FROM (
+            SELECT table_name, column_name,
+                   CASE WHEN column_name IN ('media_rate', 'margin_rate', 'cvr', 'averageSessionDuration',
+                                             'engagementRate', 'userEngagementDuration', 'session_duration')
+                        THEN 'DOUBLE PRECISION' ELSE 'BIGINT' END AS new_type
+            FROM information_schema.columns
+            WHERE table_schema = 'public' AND data_type = 'numeric'
+              AND table_name IN ('pointclick_db', 'cashplay_db', 'pointclick_ga', 'pointclick_ga_user',
+                                 'cashplay_ga', 'cashplay_ga_user')
+        ) c
+        GROUP BY table_name
+    LOOP
+        EXECUTE format('ALTER TABLE %I %s', t.table_name, t.clauses);
+    END LOOP;
+END $$;
+
+-- ─────────────────────────────────────────────────────────────
+-- 8. 포인트클릭 일별 집계 (장기 추이 · 전년 비교용 서버 측 집계)
+--    대시보드는 최근 90일은 pointclick_db 원본, 그 이전은 이 집계를 읽는다.
+--    sync_pointclick.py 적재 후 refresh_pointclick_db_daily() 로 갱신.
+--    광고 × 매체 조합으로 묶으면 원본과 행 수가 거의 같으므로 좁은 집계 3종으로 나눈다.
+--      pointclick_db_daily        광고주 · 광고타입 (KPI · 추이 · 광고타입 · 광고주별)
+--      pointclick_db_daily_media  매체 (매체별, 매체 필터 시 KPI · 추이)
+--      pointclick_db_daily_ads    광고주 × 광고 목록 (광고주별 광고 수, 지표 없음)
+--    os 는 대시보드 전역 OS 필터가 과거 구간에도 적용되도록 모두 포함한다.
+--    갱신 함수(8 · 9 공통)는 SECURITY DEFINER이므로 search_path를 고정하고 service_role만 실행할 수 있다.
+--    그룹 키 고유 인덱스로 CONCURRENTLY 갱신해 갱신 중에도 대시보드 조회가 막히지 않는다.
+-- ─────────────────────────────────────────────────────────────
+CREATE MATERIALIZED VIEW IF NOT EXISTS pointclick_db_daily AS
+SELECT
+    date,
+    publisher_type,
+    ad_type,
+    advertiser,
+    os,
+    SUM(clicks)                 AS clicks,
+    SUM(conversions)            AS conversions,
+    SUM(ad_revenue)::BIGINT     AS ad_revenue,      -- SUM(BIGINT)은 NUMERIC → 원본과 같은 BIGINT로 고정
+    SUM(media_cost)::BIGINT     AS media_cost,
+    SUM(margin)::BIGINT         AS margin
+FROM pointclick_db
+GROUP BY date, publisher_type, ad_type, advertiser, os;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pointclick_db_daily_key ON pointclick_db_daily(date, publisher_type, ad_type, advertiser, os);
+COMMENT ON MATERIALIZED VIEW pointclick_db_daily IS '2';   -- 정의 버전 (보정 블록 목록과 일치)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS pointclick_db_daily_media AS
+SELECT
+    date,
+    publisher_type,
+    media_name,
+    os,
+    SUM(clicks)                 AS clicks,
+    SUM(conversions)            AS conversions,
+    SUM(ad_revenue)::BIGINT     AS ad_revenue,
+    SUM(media_cost)::BIGINT     AS media_cost,
+    SUM(margin)::BIGINT         AS margin
+FROM pointclick_db
+GROUP BY date, publisher_type, media_name, os;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pointclick_db_daily_media_key ON pointclick_db_daily_media(date, publisher_type, media_name, os);
+COMMENT ON MATERIALIZED VIEW pointclick_db_daily_media IS '1';   -- 정의 버전 (보정 블록 목록과 일치)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS pointclick_db_daily_ads AS
+SELECT
+    date,
+    advertiser,
+    ad_name,
+    os
+FROM pointclick_db
+GROUP BY date, advertiser, ad_name, os;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pointclick_db_daily_ads_key ON pointclick_db_daily_ads(date, advertiser, ad_name, os);
+COMMENT ON MATERIALIZED VIEW pointclick_db_daily_ads IS '1';   -- 정의 버전 (보정 블록 목록과 일치)
+
+CREATE OR REPLACE FUNCTION refresh_pointclick_db_daily()
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+    REFRESH MATERIALIZED VIEW CONCURRENTLY pointclick_db_daily;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY pointclick_db_daily_media;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY pointclick_db_daily_ads;
+$$;
+
+REVOKE EXECUTE ON FUNCTION refresh_pointclick_db_daily() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_pointclick_db_daily() TO service_role;
+
+-- ─────────────────────────────────────────────────────────────
+-- 9. GA4 일별 집계 (대시보드 조회용 서버 측 집계)
+--    대시보드는 pageTitle / eventName / 일 단위로만 집계하므로
+--    pagePath · page_name 등 세부 차원을 접어 전송량을 줄인다.
+--    포인트클릭 페이지 집계는 media_key를 남겨 대시보드가 media_master로 매체명을 조회 시점에 매핑한다
+--    (원본에 media_name을 저장하지 않으므로 매체명 변경이 과거 데이터에도 즉시 반영).
+--    평균 세션시간은 평균값을 다시 평균내지 않도록 총 세션시간(session_duration)과
+--    세션 수 합계로 보관하고, 조회 측에서 session_duration / sessions 로 계산한다.
+--    sync_ga4_*.py 적재 후 refresh_*_ga_daily() 로 갱신.
+-- ─────────────────────────────────────────────────────────────
+CREATE MATERIALIZED VIEW IF NOT EXISTS pointclick_ga_page_daily AS
+SELECT
+    date,
+    "pageTitle",
+    "eventName",
+    media_key,
+    SUM("eventCount")::BIGINT       AS "eventCount",
+    SUM(sessions)::BIGINT           AS sessions,
+    SUM("screenPageViews")::BIGINT  AS "screenPageViews",
+    SUM(COALESCE(session_duration, "averageSessionDuration" * sessions)) AS session_duration
+FROM pointclick_ga
+GROUP BY date, "pageTitle", "eventName", media_key;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pointclick_ga_page_daily_key ON pointclick_ga_page_daily(date, "pageTitle", "eventName", media_key);
+COMMENT ON MATERIALIZED VIEW pointclick_ga_page_daily IS '2';   -- 정의 버전 (보정 블록 목록과 일치)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS pointclick_ga_event_daily AS
+SELECT
+    date,
+    "eventName",
+    SUM("eventCount")::BIGINT       AS "eventCount",
+    SUM(sessions)::BIGINT           AS sessions,
+    SUM("screenPageViews")::BIGINT  AS "screenPageViews",
+    SUM(COALESCE(session_duration, "averageSessionDuration" * sessions)) AS session_duration
+FROM pointclick_ga
+GROUP BY date, "eventName";
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_pointclick_ga_event_daily_key ON pointclick_ga_event_daily(date, "eventName");
+COMMENT ON MATERIALIZED VIEW pointclick_ga_event_daily IS '1';   -- 정의 버전 (보정 블록 목록과 일치)
+
+CREATE OR REPLACE FUNCTION refresh_pointclick_ga_daily()
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+    REFRESH MATERIALIZED VIEW CONCURRENTLY pointclick_ga_page_daily;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY pointclick_ga_event_daily;
+$$;
+
+REVOKE EXECUTE ON FUNCTION refresh_pointclick_ga_daily() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_pointclick_ga_daily() TO service_role;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS cashplay_ga_page_daily AS
+SELECT
+    date,
+    "pageTitle",
+    "eventName",
+    SUM("eventCount")::BIGINT       AS "eventCount",
+    SUM(sessions)::BIGINT           AS sessions,
+    SUM("screenPageViews")::BIGINT  AS "screenPageViews",
+    SUM(COALESCE(session_duration, "averageSessionDuration" * sessions)) AS session_duration
+FROM cashplay_ga
+GROUP BY date, "pageTitle", "eventName";
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cashplay_ga_page_daily_key ON cashplay_ga_page_daily(date, "pageTitle", "eventName");
+COMMENT ON MATERIALIZED VIEW cashplay_ga_page_daily IS '1';   -- 정의 버전 (보정 블록 목록과 일치)
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS cashplay_ga_event_daily AS
+SELECT
+    date,
+    "eventName",
+    SUM("eventCount")::BIGINT       AS "eventCount",
+    SUM(sessions)::BIGINT           AS sessions,
+    SUM("screenPageViews")::BIGINT  AS "screenPageViews",
+    SUM(COALESCE(session_duration, "averageSessionDuration" * sessions)) AS session_duration
+FROM cashplay_ga
+GROUP BY date, "eventName";
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cashplay_ga_event_daily_key ON cashplay_ga_event_daily(date, "eventName");
+COMMENT ON MATERIALIZED VIEW cashplay_ga_event_daily IS '1';   -- 정의 버전 (보정 블록 목록과 일치)
+
+CREATE OR REPLACE FUNCTION refresh_cashplay_ga_daily()
+RETURNS void
+LANGUAGE sql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+    REFRESH MATERIALIZED VIEW CONCURRENTLY cashplay_ga_page_daily;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY cashplay_ga_event_daily;
+$$;
+
+REVOKE EXECUTE ON FUNCTION refresh_cashplay_ga_daily() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION refresh_cashplay_ga_daily() TO service_role;
+
+-- ─────────────────────────────────────────────────────────────
+-- 10. 동기화 상태 (테이블별 데이터 버전)
+--     create_media_master.py가 변경이 있을 때만 version을 갱신하고,
+--     대시보드(utils.data_loader.load_media)는 version을 매체 캐시 키로 써서 바뀐 경우에만 다시 읽는다.
+-- ─────────────────────────────────────────────────────────────
+CREATE TABLE IF NOT EXISTS sync_state (
+    table_name  TEXT PRIMARY KEY,
+    version     TEXT NOT NULL,          -- (media_key, media_name) 해시의 전체 다이제스트
+    row_count   INTEGER,
+    changed     INTEGER,                -- 직전 동기화에서 추가·변경·삭제된 키 수
+    synced_at   TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- ─────────────────────────────────────────────────────────────
 -- RLS (Row Level Security) - 대시보드는 service_role key 사용으로
 -- 별도 정책 없이 접근 가능. 필요 시 아래 주석 해제하여 설정.
@@ -148,3 +408,4 @@ CREATE TABLE IF NOT EXISTS media_master (
 -- ALTER TABLE cashplay_ga ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE cashplay_ga_user ENABLE ROW LEVEL SECURITY;
 -- ALTER TABLE media_master ENABLE ROW LEVEL SECURITY;
+-- ALTER TABLE sync_state ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,201 @@
+"""
+GA4 자동 적재 스크립트 (Supabase 버전) — 포인트클릭 · 캐시플레이 공용
+- GA4에서 전일자 데이터를 조회하여 Supabase에 upsert
+- 쿼리 분리 (서비스별 테이블):
+    *_ga      → 이벤트/페이지 차원 + 이벤트 지표
+    *_ga_user → date 차원만 + 사용자 지표 (DAU/WAU/MAU 정확한 값)
+- 두 서비스는 속성 ID · 스트림 · 테이블 · 커스텀 차원만 다르므로 GA4Site로 선언하고
+  동기화 스펙(이벤트 / 사용자)은 build_specs가 같은 방식으로 만든다.
+- GitHub Actions에서 매일 오전 9시(KST) 실행
+
+    python sync_ga4.py pointclick [days]
+    python sync_ga4.py cashplay [days]
+"""
+
+import os
+import sys
+from dataclasses import dataclass
+
+from google.analytics.data_v1beta.types import (
+    DateRange,
+    Dimension,
+    Metric,
+    RunReportRequest,
+    FilterExpression,
+    Filter,
+)
+
+from pipeline.engine import SyncSpec, recent_dates, run
+from pipeline.ga4 import ReportScheduler, get_client, parse_columns, to_records
+
+# ============================================================
+# 설정
+# ============================================================
+DEFAULT_DAYS = 7
+
+
+@dataclass(frozen=True)
+class GA4Site:
+    """서비스 1개의 GA4 수집 설정"""
+    label: str
+    property_env: str             # GA4 속성 ID 환경변수
+    stream_name: str              # streamName 필터 (운영 스트림만)
+    internal_domain: str          # 내부 유입 제외 도메인
+    event_table: str
+    user_table: str
+    refresh_rpc: str              # 대시보드용 일별 집계(materialized view) 갱신
+    custom_dimensions: tuple      # 서비스별 customEvent 차원
+
+
+SITES = {
+    "pointclick": GA4Site(
+        label="포인트클릭",
+        property_env="GA4_POINTCLICK_PROPERTY_ID",
+        stream_name="포인트클릭 - 운영 환경",
+        internal_domain="ad.pointclick.co.kr",
+        event_table="pointclick_ga",
+        user_table="pointclick_ga_user",
+        refresh_rpc="refresh_pointclick_ga_daily",
+        custom_dimensions=("customEvent:page_name", "customEvent:page_type", "customEvent:media_key"),
+    ),
+    "cashplay": GA4Site(
+        label="캐시플레이",
+        property_env="GA4_CASHPLAY_PROPERTY_ID",
+        stream_name="캐시플레이",
+        internal_domain="app.cashplay.io",
+        event_table="cashplay_ga",
+        user_table="cashplay_ga_user",
+        refresh_rpc="refresh_cashplay_ga_daily",
+        custom_dimensions=("customEvent:page", "customEvent:page_type", "customEvent:button_id"),
+    ),
+}
+
+
+def _stream_filter(site: GA4Site):
+    return FilterExpression(
+        filter=Filter(
+            field_name="streamName",
+            string_filter=Filter.StringFilter(
+                match_type=Filter.StringFilter.MatchType.EXACT,
+                value=site.stream_name,
+            ),
+        )
+    )
+
+
+def fetch_ga4_event_data(site: GA4Site, property_id: str, start_date: str, end_date: str) -> list[dict]:
+    client = get_client()
+
+    dimensions = [
+        Dimension(name="date"),
+        Dimension(name="eventName"),
+        Dimension(name="pageTitle"),
+        Dimension(name="pagePath"),
+        *(Dimension(name=name) for name in site.custom_dimensions),
+    ]
+    metrics = [
+        Metric(name="eventCount"),
+        Metric(name="sessions"),
+        Metric(name="screenPageViews"),
+        Metric(name="averageSessionDuration"),
+        Metric(name="engagementRate"),
+        Metric(name="userEngagementDuration"),
+    ]
+
+    # 원본 헤더 (GA4 API 이름 그대로) → Supabase 컬럼명 변환은 파싱 시 컬럼 단위로 1회
+    dim_names = [d.name for d in dimensions]
+    metric_names = [m.name for m in metrics]
+
+    request = RunReportRequest(
+        property=property_id,
+        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
+        dimension_filter=_stream_filter(site),
+        dimensions=dimensions,
+        metrics=metrics,
+    )
+
+    def parse(response):
+        cols = parse_columns(response, dim_names, metric_names, site.internal_domain)
+        # 평균 세션시간은 재집계가 불가능하므로 합산 가능한 총 세션시간을 함께 적재
+        cols["session_duration"] = [a * s for a, s in zip(cols["averageSessionDuration"], cols["sessions"])]
+        return to_records(cols)
+
+    return ReportScheduler(client).run(request, parse, label=site.event_table)
+
+
+def fetch_ga4_user_data(site: GA4Site, property_id: str, start_date: str, end_date: str) -> list[dict]:
+    client = get_client()
+
+    dimensions = [Dimension(name="date")]
+    metrics = [
+        Metric(name="activeUsers"),
+        Metric(name="active7DayUsers"),
+        Metric(name="active28DayUsers"),
+        Metric(name="newUsers"),
+        Metric(name="sessions"),
+    ]
+    dim_names = [d.name for d in dimensions]
+    metric_names = [m.name for m in metrics]
+
+    request = RunReportRequest(
+        property=property_id,
+        date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
+        dimension_filter=_stream_filter(site),
+        dimensions=dimensions,
+        metrics=metrics,
+    )
+
+    def parse(response):
+        return to_records(parse_columns(response, dim_names, metric_names))
+
+    return ReportScheduler(client).run(request, parse, label=site.user_table)
+
+
+def build_specs(site: GA4Site, property_id: str) -> tuple[SyncSpec, SyncSpec]:
+    """이벤트(날짜 구간 교체) / 사용자(date 기준 upsert) 동기화 스펙"""
+    event = SyncSpec(
+        name=f"{site.event_table} 이벤트",
+        table=site.event_table,
+        extract=lambda dates: [fetch_ga4_event_data(site, property_id, dates[0], dates[-1])],
+        load="replace",            # 수집 기간 날짜를 한 번에 삭제 후 재삽입
+        refresh_rpc=site.refresh_rpc,
+    )
+    user = SyncSpec(
+        name=f"{site.user_table} 사용자",
+        table=site.user_table,
+        extract=lambda dates: [fetch_ga4_user_data(site, property_id, dates[0], dates[-1])],
+        load="upsert",
+        key="date",
+    )
+    return event, user
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in SITES:
+        print(f"[ERROR] 사용법: python sync_ga4.py {{{'|'.join(SITES)}}} [days]")
+        sys.exit(1)
+    site = SITES[sys.argv[1]]
+    property_id = os.environ.get(site.property_env)
+
+    if not property_id:
+        print(f"[ERROR] {site.property_env} 환경변수가 설정되지 않았습니다.")
+        sys.exit(1)
+
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_DAYS
+    dates = recent_dates(days)
+
+    print(f"[sync] {site.label} GA4 데이터 수집")
+    print(f"[sync] 기간: {dates[0]} ~ {dates[-1]} ({days}일)")
+    print(f"[sync] Property ID: {property_id}")
+
+    event_spec, user_spec = build_specs(site, property_id)
+
+    # ── 이벤트 데이터 → *_ga (+ 일별 집계 갱신) ──
+    run(event_spec, dates)
+
+    # ── 사용자 데이터 → *_ga_user ──
+    run(user_spec, dates)
+
+
+if __name__ == "__main__":
+    main()
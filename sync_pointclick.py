@@ -1,23 +1,23 @@
 """
 포인트클릭_DB 자동 적재 스크립트 (Supabase 버전)
 - MySQL에서 전일자 데이터를 조회하여 Supabase pointclick_db 테이블에 upsert
+- 날짜 단위로 기존 데이터를 비우고 서버 측 커서로 스트리밍 적재 (pipeline.engine)
 - GitHub Actions에서 매일 오전 9시(KST) 실행
 """
 
 import os
 import sys
-from datetime import datetime, date, timedelta, timezone
-
-KST = timezone(timedelta(hours=9))
-from decimal import Decimal
 
 import pymysql
-from supabase import create_client
+
+from config.schema import SCHEMAS
+from pipeline.engine import SyncSpec, date_range, mysql_extractor, recent_dates, run
 
 # ============================================================
 # 설정
 # ============================================================
 TABLE_NAME = "pointclick_db"
+DAILY_REFRESH_RPC = "refresh_pointclick_db_daily"   # 일별 집계(materialized view) 갱신
 
 SQL_QUERY = """
 SELECT
@@ -67,98 +67,36 @@ def get_mysql_connection():
         password=os.environ["MYSQL_PASSWORD"],
         database=os.environ["MYSQL_DATABASE"],
         charset="utf8mb4",
-        cursorclass=pymysql.cursors.DictCursor,
+        cursorclass=pymysql.cursors.SSDictCursor,
     )
 
 
-def get_supabase_client():
-    url = os.environ["SUPABASE_URL"]
-    key = os.environ["SUPABASE_KEY"]
-    return create_client(url, key)
-
-
-def fetch_data_from_mysql(target_date: str) -> list[dict]:
-    """MySQL에서 target_date 데이터를 조회하여 dict 리스트로 반환."""
-    conn = get_mysql_connection()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute(SQL_QUERY, (target_date,))
-            rows = cursor.fetchall()
-    finally:
-        conn.close()
-
-    result = []
-    for row in rows:
-        formatted = {}
-        for key, val in row.items():
-            if val is None:
-                formatted[key] = None
-            elif isinstance(val, (datetime, date)):
-                formatted[key] = val.strftime("%Y-%m-%d")
-            elif isinstance(val, (float, Decimal)):
-                f = round(float(val), 6)
-                formatted[key] = int(f) if f == int(f) else f
-            else:
-                formatted[key] = val
-        result.append(formatted)
-
-    return result
-
-
-def check_date_exists(client, target_date: str) -> bool:
-    """Supabase 테이블에 해당 날짜 데이터가 이미 있는지 확인."""
-    response = client.table(TABLE_NAME).select("date").eq("date", target_date).limit(1).execute()
-    return len(response.data) > 0
-
-
-def delete_date_data(client, target_date: str):
-    """해당 날짜 데이터 삭제 (재적재를 위해)."""
-    client.table(TABLE_NAME).delete().eq("date", target_date).execute()
-    print(f"[sync] {target_date} 기존 데이터 삭제 완료")
-
-
-def insert_to_supabase(client, rows: list[dict]) -> int:
-    """Supabase에 데이터 일괄 삽입 (1000행 단위 청크)."""
-    chunk_size = 1000
-    total = 0
-    for i in range(0, len(rows), chunk_size):
-        chunk = rows[i:i + chunk_size]
-        client.table(TABLE_NAME).insert(chunk).execute()
-        total += len(chunk)
-        print(f"[sync] Supabase 삽입 중: {total}/{len(rows)}행")
-    return total
+SPEC = SyncSpec(
+    name="포인트클릭 DB",
+    table=TABLE_NAME,
+    extract=mysql_extractor(SQL_QUERY, get_mysql_connection, params=lambda dates: (dates[0],)),
+    transform=SCHEMAS[TABLE_NAME].cast_rows,   # 금액은 원 단위 int (BIGINT), 비율은 float
+    load="replace",            # 날짜 단위로 기존 데이터 삭제 후 재적재
+    per_date=True,
+    refresh_rpc=DAILY_REFRESH_RPC,
+)
 
 
 def main():
-    # 대상 날짜: 전일자 (또는 인자로 지정)
-    if len(sys.argv) > 1:
-        target_date = sys.argv[1]
+    # 대상 날짜: 전일자 (또는 인자로 지정, 두 개면 시작~끝 범위)
+    if len(sys.argv) > 2:
+        target_dates = date_range(sys.argv[1], sys.argv[2])
+    elif len(sys.argv) > 1:
+        target_dates = [sys.argv[1]]
     else:
-        yesterday = datetime.now(KST) - timedelta(days=1)
-        target_date = yesterday.strftime("%Y-%m-%d")
+        target_dates = recent_dates(1)
 
     print(f"[sync] 포인트클릭 DB 동기화 시작")
-    print(f"[sync] 대상 날짜: {target_date}")
-
-    client = get_supabase_client()
-
-    # 1. 중복 체크
-    if check_date_exists(client, target_date):
-        print(f"[sync] {target_date} 데이터가 이미 존재합니다. 삭제 후 재적재합니다.")
-        delete_date_data(client, target_date)
-
-    # 2. MySQL에서 데이터 조회
-    rows = fetch_data_from_mysql(target_date)
-
-    if not rows:
-        print(f"[sync] {target_date} 데이터가 MySQL에 없습니다.")
-        return
-
-    print(f"[sync] MySQL에서 {len(rows)}행 조회 완료")
+    print(f"[sync] 대상 날짜: {', '.join(target_dates)}")
 
-    # 3. Supabase에 삽입
-    count = insert_to_supabase(client, rows)
-    print(f"[sync] Supabase {TABLE_NAME}에 {count}행 적재 완료")
+    metrics = run(SPEC, target_dates)
+    if not metrics.extracted:
+        print(f"[sync] {', '.join(target_dates)} 데이터가 MySQL에 없습니다.")
 
 
 if __name__ == "__main__":
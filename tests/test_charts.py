@@ -0,0 +1,25 @@
+import plotly.graph_objects as go
+
+from utils import charts
+
+
+def test_cached_figure_returns_fresh_specs_within_byte_budget(monkeypatch):
+    charts._get_figure_store.clear()
+    calls = []
+
+    def build():
+        calls.append(1)
+        return go.Figure(go.Bar(x=[1, 2], y=[3, 4])), None
+
+    first, empty = charts.cached_figure(("v", "a"), build)
+    first['layout']['title'] = "changed"
+    second, _ = charts.cached_figure(("v", "a"), build)
+
+    # 캐시 적중이어도 호출마다 새 dict → 한 세션의 수정이 다른 세션에 번지지 않음
+    assert len(calls) == 1 and empty is None
+    assert 'title' not in second['layout'] and second['data'][0]['type'] == 'bar'
+
+    store = charts._get_figure_store()
+    monkeypatch.setattr(charts, "FIGURE_CACHE_BYTES", store.nbytes + 1)
+    charts.cached_figure(("v", "b"), build)
+    assert list(store.entries) == [("v", "b")] and store.nbytes <= charts.FIGURE_CACHE_BYTES
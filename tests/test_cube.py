@@ -0,0 +1,20 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.cube import DailyCube
+
+
+def test_distinct_count_ignores_missing_target():
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2026-01-01', '2026-01-01', '2026-01-02', '2026-01-02', '2026-01-02']),
+        'advertiser': ['A', 'A', 'A', 'B', 'C'],
+        'ad_name': ['a1', np.nan, 'a2', 'b1', np.nan],
+        'clicks': [1, 2, 3, 4, 5],
+    })
+    cube = DailyCube(df, ['clicks'], count_dims=[('advertiser', 'ad_name')])
+
+    counts = cube.distinct_count(('advertiser', 'ad_name'), date(2026, 1, 1), date(2026, 1, 2))
+    expected = df.groupby('advertiser')['ad_name'].nunique()
+    assert counts.set_index('advertiser')['count'].to_dict() == expected.to_dict() == {'A': 2, 'B': 1, 'C': 0}
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import map_media_name
+
+
+def test_map_media_name_uses_master_and_keeps_unknown_keys():
+    media = pd.DataFrame({'media_key': ['m1', 'm2'], 'media_name': ['매체A', '매체B']})
+    keys = pd.Series(['m2', 'm1', 'm9', np.nan, 'm2'])
+
+    names = map_media_name(keys, media)
+
+    assert isinstance(names.dtype, pd.CategoricalDtype)
+    assert names.iloc[:3].tolist() == ['매체B', '매체A', 'm9']
+    assert names.iloc[4] == '매체B'
+
+
+def _patch_supabase(monkeypatch, fetch):
+    import streamlit as st
+    from utils import data_loader
+    monkeypatch.setattr(type(st.secrets), "__getitem__", lambda self, k: k)
+    monkeypatch.setattr(data_loader, "_fetch_supabase_table", fetch)
+    data_loader._get_store.clear()
+    return data_loader
+
+
+def test_failed_fetch_backs_off_instead_of_refetching_every_rerun(monkeypatch):
+    calls = []
+
+    def fetch(url, key, table, *args):
+        calls.append(table)
+        raise ConnectionError("supabase down")
+
+    data_loader = _patch_supabase(monkeypatch, fetch)
+    clock = [1000.0]
+    monkeypatch.setattr(data_loader.time, "monotonic", lambda: clock[0])
+
+    for _ in range(3):
+        assert data_loader.load_supabase_data("t").empty
+    assert len(calls) == 1
+
+    clock[0] += data_loader.SUPABASE_RETRY_BACKOFF + 1
+    data_loader.load_supabase_data("t")
+    assert len(calls) == 2
+
+
+def test_store_keeps_only_recently_requested_entries(monkeypatch):
+    data_loader = _patch_supabase(monkeypatch, lambda url, key, table, *args: pd.DataFrame({'x': [1]}))
+    monkeypatch.setattr(data_loader, "SUPABASE_MAX_ENTRIES", 2)
+
+    for table in ["a", "b", "a", "c"]:
+        data_loader.load_supabase_data(table)
+
+    assert [k[0] for k in data_loader._get_store().entries] == ["a", "c"]
+
+
+def test_failed_background_refresh_waits_before_next_refresh(monkeypatch):
+    calls = []
+
+    def fetch(url, key, table, *args):
+        calls.append(table)
+        if len(calls) > 1:
+            raise ConnectionError("supabase down")
+        return pd.DataFrame({'x': [1]})
+
+    data_loader = _patch_supabase(monkeypatch, fetch)
+    clock = [1000.0]
+    monkeypatch.setattr(data_loader.time, "monotonic", lambda: clock[0])
+    store = data_loader._get_store()
+
+    first = data_loader.load_supabase_data("t")
+    clock[0] += data_loader.SUPABASE_CACHE_TTL
+    for _ in range(3):
+        assert data_loader.load_supabase_data("t") is first   # 오래된 결과는 그대로 반환
+        for future in list(store.inflight.values()):
+            future.exception()
+    assert len(calls) == 2
+
+    clock[0] += data_loader.SUPABASE_RETRY_BACKOFF + 1
+    data_loader.load_supabase_data("t")
+    for future in list(store.inflight.values()):
+        future.exception()
+    assert len(calls) == 3
@@ -0,0 +1,46 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils import duck
+from utils.cube import DailyCube, ratio_columns
+
+RATIOS = {'cvr': ('conversions', 'clicks')}
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame({
+        'date': pd.Timestamp('2026-01-01') + pd.to_timedelta(rng.integers(0, 20, n), unit='D'),
+        'ad_type': rng.choice(['CPA', 'CPC', None], n),
+        'ad_name': rng.choice(['a', 'b', 'c', None], n),
+        'clicks': rng.integers(0, 50, n),
+        'conversions': rng.integers(0, 5, n),
+    })
+
+
+def _sorted(frame: pd.DataFrame, keys) -> pd.DataFrame:
+    return frame.sort_values(keys, na_position='last', ignore_index=True)
+
+
+def test_group_by_matches_cube():
+    df = _frame()
+    cube = DailyCube(df, ['clicks', 'conversions'], RATIOS, dims=['ad_type'], count_dims=[('ad_type', 'ad_name')])
+    table = duck.arrow_table(("test_duck",), df)
+    kf, kt = date(2026, 1, 3), date(2026, 1, 12)
+
+    by = ratio_columns(duck.group_by(table, 'ad_type', cube.measures, kf, kt), RATIOS)
+    pd.testing.assert_frame_equal(_sorted(by, ['ad_type']), _sorted(cube.by('ad_type', kf, kt), ['ad_type'])[by.columns],
+                                  check_dtype=False)
+
+    daily = ratio_columns(duck.group_by(table, 'ad_type', cube.measures, kf, kt, daily=True), RATIOS)
+    expected = cube.daily(kf, kt, 'ad_type')
+    pd.testing.assert_frame_equal(_sorted(daily.drop(columns='rows'), ['date', 'ad_type']),
+                                  _sorted(expected, ['date', 'ad_type']), check_dtype=False)
+
+    counts = duck.distinct_count(table, 'ad_type', 'ad_name', kf, kt)
+    pd.testing.assert_frame_equal(_sorted(counts, ['ad_type']),
+                                  _sorted(cube.distinct_count(('ad_type', 'ad_name'), kf, kt), ['ad_type']),
+                                  check_dtype=False)
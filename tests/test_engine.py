@@ -0,0 +1,68 @@
+import pytest
+
+from pipeline import engine
+from pipeline.engine import SyncSpec, run
+
+
+class FakeTable:
+    """delete().in_().execute() / insert().execute()만 흉내내는 Supabase 테이블"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def delete(self):
+        return self
+
+    def in_(self, column, values):
+        self._delete = lambda: self.db.__setitem__(
+            'rows', [r for r in self.db['rows'] if r[column] not in values])
+        return self
+
+    def insert(self, chunk):
+        def execute():
+            self.db['inserts'] += 1
+            if self.db['inserts'] == self.db['fail_at']:
+                raise ConnectionError("insert timeout")
+            self.db['rows'].extend(chunk)
+        self._insert = execute
+        return self
+
+    def execute(self):
+        if hasattr(self, '_insert'):
+            return self._insert()
+        return self._delete()
+
+
+class FakeClient:
+    def __init__(self, rows, fail_at=None):
+        self.db = {'rows': list(rows), 'inserts': 0, 'fail_at': fail_at}
+
+    def table(self, name):
+        return FakeTable(self.db)
+
+
+def test_replace_replays_whole_unit_after_insert_failure(monkeypatch):
+    monkeypatch.setattr(engine.time, "sleep", lambda s: None)
+    stale = [{'date': '2026-03-01', 'v': -1}, {'date': '2026-02-28', 'v': 0}]
+    client = FakeClient(stale, fail_at=2)   # 첫 청크 적재 후 두 번째 청크 실패
+    fresh = [{'date': '2026-03-01', 'v': i} for i in range(5)]
+    spec = SyncSpec(name="t", table="t", extract=lambda dates: iter([fresh[:2], fresh[2:]]),
+                    load="replace", chunk_size=2, max_workers=1)
+
+    metrics = run(spec, ['2026-03-01'], client=client)
+
+    # 실패한 시도가 남긴 청크는 재실행 시 삭제되어 중복 없이 새 행만 남음 (다른 날짜는 보존)
+    assert sorted(r['v'] for r in client.db['rows'] if r['date'] == '2026-03-01') == [0, 1, 2, 3, 4]
+    assert {'date': '2026-02-28', 'v': 0} in client.db['rows']
+    assert metrics.retries == 1
+    assert metrics.loaded == metrics.extracted == 5
+
+
+def test_replace_without_dates_is_rejected():
+    client = FakeClient([{'date': '2026-03-01', 'v': 0}])
+    spec = SyncSpec(name="t", table="t", extract=lambda dates: iter([[{'date': '2026-03-01', 'v': 1}]]),
+                    load="replace")
+
+    with pytest.raises(ValueError):
+        run(spec, [], client=client)
+    assert client.db['rows'] == [{'date': '2026-03-01', 'v': 0}]
@@ -0,0 +1,29 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils import export
+
+
+def test_chunked_export_round_trips_and_evicts_files_by_size(monkeypatch):
+    export._get_export_store.clear()
+    monkeypatch.setattr(export, "CSV_CHUNK_ROWS", 3)
+    df = pd.DataFrame({
+        'date': pd.date_range('2026-01-01', periods=7),
+        'name': ['가', None, '다', '라', None, '바', '사'],   # 청크마다 null 구성이 달라도 스키마 유지
+        'v': np.arange(7, dtype='int64'),
+    })
+
+    csv = export.export_bytes(df, ("v1",), "csv")
+    assert csv.startswith(b"\xef\xbb\xbf") and csv.count(b"\xef\xbb\xbf") == 1
+    assert pd.read_csv(io.BytesIO(csv))['v'].tolist() == list(range(7))
+    assert pd.read_parquet(io.BytesIO(export.export_bytes(df, ("v1",), "parquet"))).equals(df)
+
+    store = export._get_export_store()
+    (old_path, _), (new_path, _) = store.entries.values()
+    monkeypatch.setattr(export, "EXPORT_CACHE_BYTES", os.path.getsize(new_path))
+    export.export_bytes(df.head(1), ("v2",), "csv")
+    assert list(store.entries) == [(("v2",), "csv")]
+    assert not os.path.exists(old_path) and not os.path.exists(new_path)
@@ -0,0 +1,26 @@
+from datetime import date
+
+import pandas as pd
+
+from utils.ga import GaCube
+
+
+def test_session_metrics_use_page_view_rows_only():
+    # 같은 세션 10개가 page_view · click 행에 모두 잡힘 → 이벤트 행을 더하면 세션이 두 배
+    df = pd.DataFrame({
+        'date': pd.to_datetime(['2026-01-01'] * 4),
+        'pageTitle': ['홈', '홈', '상세', '상세'],
+        'eventName': ['page_view', 'click', 'page_view', 'scroll'],
+        'eventCount': [30, 12, 8, 5],
+        'sessions': [10, 4, 5, 5],
+        'session_duration': [600.0, 400.0, 500.0, 500.0],
+        'activeUsers': [9, 4, 5, 5],
+    })
+    ga = GaCube(df)
+    day = date(2026, 1, 1)
+
+    assert 'activeUsers' not in ga.metrics
+    assert ga.avg_duration(day, day) == round((600 + 500) / (10 + 5), 2)
+    dur = ga.page_duration(day, day).set_index('pageTitle')
+    assert dur.loc['홈', '세션수'] == 10 and dur.loc['홈', '평균세션시간'] == 60
+    assert dur.loc['상세', '세션수'] == 5 and dur.loc['상세', '평균세션시간'] == 100
@@ -0,0 +1,76 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+from google.analytics.data_v1beta.types import (
+    DateRange, Dimension, DimensionValue, Metric, MetricValue, Row, RunReportRequest, RunReportResponse,
+)
+from google.api_core import exceptions as gexc
+
+from pipeline.engine import KST
+from pipeline.ga4 import ReportScheduler, parse_columns, to_records
+
+N = 30
+
+
+class FakeClient:
+    """offset 순서의 행 N개를 돌려주는 GA4 클라이언트 (fail_at offset에서 1회 실패)"""
+
+    def __init__(self, fail_at=None):
+        self.offsets, self.fail_at = [], fail_at
+
+    def run_report(self, req):
+        self.offsets.append(req.offset)
+        if req.offset == self.fail_at:
+            self.fail_at = None
+            raise gexc.PermissionDenied("boom")
+        rows = [Row(dimension_values=[DimensionValue(value=str(i))], metric_values=[MetricValue(value="1")])
+                for i in range(req.offset, min(N, req.offset + req.limit))]
+        return RunReportResponse(rows=rows, row_count=N)
+
+
+def _request(end_days_ago: int) -> RunReportRequest:
+    end = (datetime.now(KST) - timedelta(days=end_days_ago)).strftime("%Y-%m-%d")
+    return RunReportRequest(property="properties/1", date_ranges=[DateRange(start_date="2025-01-01", end_date=end)],
+                            dimensions=[Dimension(name="x")], metrics=[Metric(name="m")])
+
+
+def _run(client, request, checkpoint_dir):
+    parse = lambda r: to_records(parse_columns(r, ["x"], ["m"]))
+    return ReportScheduler(client, page_size=10, min_page_size=10, checkpoint_dir=str(checkpoint_dir)).run(request, parse)
+
+
+def _crash_then_resume(request, checkpoint_dir):
+    try:
+        _run(FakeClient(fail_at=20), request, checkpoint_dir)
+    except gexc.PermissionDenied:
+        pass
+    client = FakeClient()
+    rows = _run(client, request, checkpoint_dir)
+    assert [int(r["x"]) for r in rows] == list(range(N))
+    return sorted(client.offsets)
+
+
+def test_checkpoint_resumes_settled_window(tmp_path):
+    assert _crash_then_resume(_request(30), tmp_path) == [20]
+    assert os.listdir(tmp_path) == []
+
+
+def test_checkpoint_skipped_for_recent_window(tmp_path):
+    # 최근 3일이 포함된 기간은 GA4 값이 바뀌므로 처음부터 다시 조회
+    assert _crash_then_resume(_request(1), tmp_path) == [0, 10, 20]
+
+
+def test_stale_checkpoint_is_discarded(tmp_path):
+    request = _request(30)
+    try:
+        _run(FakeClient(fail_at=20), request, tmp_path)
+    except gexc.PermissionDenied:
+        pass
+    (path,) = tmp_path.iterdir()
+    manifest = json.loads((path / "manifest.json").read_text())
+    (path / "manifest.json").write_text(json.dumps({**manifest, "created": 0}))
+
+    client = FakeClient()
+    assert len(_run(client, request, tmp_path)) == N
+    assert sorted(client.offsets) == [0, 10, 20]
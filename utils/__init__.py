@@ -1,9 +1,18 @@
-from .data_loader import load_supabase_data, load_pointclick, load_cashplay, load_ga4, load_media_master
+from .data_loader import (
+    load_supabase_data, clear_supabase_cache, data_version, stitch_history,
+    load_pointclick, load_cashplay, load_ga4, load_media
+)
 from .metrics import (
-    safe_divide, get_comparison_metrics, make_weekly,
+    safe_divide, make_weekly, make_periodic, period_start, PERIOD_FREQS,
     format_won, format_number, format_pct
 )
+from .cube import (
+    COMPARE_MODES, DailyCube, Comparison, get_daily_cube, slice_by_date, shift_window,
+    RowIndex, get_row_index, filter_rows
+)
+from .ga import GaCube, GA_USER_METRICS, get_ga_cube
 from .charts import (
-    apply_layout, set_y_korean_ticks, fmt_axis_won,
-    week_label, quick_date_picker
+    apply_layout, set_y_korean_ticks, fmt_axis_won, cached_figure,
+    week_label, period_label, quick_date_picker, persist_widget_state
 )
+from .export import EXPORT_FORMATS, export_buttons, export_bytes, export_file
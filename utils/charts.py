@@ -1,5 +1,10 @@
 """차트 및 UI 유틸리티"""
+import json
+import threading
+from collections import OrderedDict
+
 import pandas as pd
+import plotly.io as pio
 import numpy as np
 import streamlit as st
 from datetime import datetime, timedelta, date
@@ -15,6 +20,16 @@ def week_label(d):
         return str(d)
 
 
+def period_label(d, freq='W'):
+    """집계 구간 레이블 생성 (주: 기간, 월: 'YY년 M월')"""
+    if freq == 'M':
+        try:
+            return f"{d:%y}년 {d.month}월"
+        except:
+            return str(d)
+    return week_label(d)
+
+
 def fmt_axis_won(val):
     """축 레이블용 원화 포맷"""
     if pd.isna(val):
@@ -78,6 +93,86 @@ def apply_layout(fig, extra=None):
     return fig
 
 
+# 직렬화된 Figure 보관 상한 (JSON 바이트 합계, 초과 시 가장 오래 사용하지 않은 항목부터 제거)
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class _FigureStore:
+    """키 → Figure JSON 문자열 (세션 간 공유, 크기 제한 LRU)
+
+    go.Figure는 가변 객체라 그대로 공유하면 한 세션의 수정이 다른 세션에 번지므로
+    불변인 JSON 문자열로 보관하고, 꺼낼 때마다 새 dict로 풀어 준다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # key → (json 문자열 또는 튜플, 바이트 수)
+        self.nbytes = 0
+
+    def get(self, key):
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit is not None:
+                self.entries.move_to_end(key)
+            return hit
+
+    def put(self, key, spec, size: int):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if size > FIGURE_CACHE_BYTES:
+                return
+            self.entries[key] = (spec, size)
+            self.nbytes += size
+            while self.nbytes > FIGURE_CACHE_BYTES:
+                _, (_, n) = self.entries.popitem(last=False)
+                self.nbytes -= n
+
+
+@st.cache_resource(show_spinner=False)
+def _get_figure_store() -> _FigureStore:
+    return _FigureStore()
+
+
+def _dump(fig):
+    return None if fig is None else pio.to_json(fig, validate=False)
+
+
+def _load(spec):
+    if isinstance(spec, tuple):
+        return tuple(_load(s) for s in spec)
+    return None if spec is None else json.loads(spec)
+
+
+def cached_figure(key: tuple, build):
+    """(데이터 버전, 섹션, 기간, 옵션) 키로 완성된 Figure 스펙을 재사용 (바이트 상한 LRU, 세션 간 공유)
+
+    build: 인자 없는 생성 함수 → Figure (또는 Figure 튜플 / None). 캐시 미스일 때만 호출.
+    반환값은 호출마다 새로 만든 plotly dict(또는 그 튜플)이므로 st.plotly_chart에 그대로 넘긴다.
+    """
+    key = tuple(key)
+    store = _get_figure_store()
+    hit = store.get(key)
+    if hit is None:
+        fig = build()
+        spec = tuple(_dump(f) for f in fig) if isinstance(fig, tuple) else _dump(fig)
+        size = sum(len(s) for s in spec if s) if isinstance(spec, tuple) else len(spec or "")
+        store.put(key, spec, size)
+        hit = (spec, size)
+    return _load(hit[0])
+
+
+def persist_widget_state(defaults: dict):
+    """위젯 값을 session state로 유지 (기본값 포함)
+
+    quick_date_picker의 조회 버튼(st.rerun)보다 뒤에 그려지는 위젯은 중단된 실행에서 보이지 않은
+    위젯으로 정리되어 값이 초기화되므로, 해당 위젯은 default 없이 만들고 이 함수로 값을 유지한다.
+    """
+    for key, default in defaults.items():
+        st.session_state[key] = st.session_state.get(key, default)
+
+
 def quick_date_picker(data_min, data_max, prefix, default_mode="이번달"):
     """빠른 날짜 선택기"""
     today = date.today()
@@ -0,0 +1,317 @@
+"""일별 누적합 큐브 및 기간 비교 엔진"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datetime import date, timedelta
+from .metrics import safe_divide
+from .data_loader import data_version
+
+
+# 비교 기준 (현재 기간 → 비교 기간)
+COMPARE_MODES = {
+    "prev": "직전 동일 기간",
+    "wow":  "전주 동기간",
+    "mom":  "전월 동기간",
+    "yoy":  "전년 동기간",
+}
+
+
+def shift_window(start: date, end: date, mode: str) -> tuple[date, date]:
+    """현재 기간에 대응하는 비교 기간 계산"""
+    if mode == "prev":
+        duration = (end - start).days + 1
+        prev_end = start - timedelta(days=1)
+        return prev_end - timedelta(days=duration - 1), prev_end
+    if mode == "wow":
+        return start - timedelta(days=7), end - timedelta(days=7)
+    if mode == "mom":
+        off = pd.DateOffset(months=1)
+    elif mode == "yoy":
+        off = pd.DateOffset(years=1)
+    else:
+        raise ValueError(f"지원하지 않는 비교 기준: {mode}")
+    return (pd.Timestamp(start) - off).date(), (pd.Timestamp(end) - off).date()
+
+
+class Comparison:
+    """현재 기간 vs 비교 기간 결과"""
+
+    def __init__(self, curr: pd.Series, prev: pd.Series, ratios: dict,
+                 curr_rows: int, prev_rows: int):
+        self.curr = curr
+        self.prev = prev
+        self.ratios = ratios
+        self.curr_rows = curr_rows
+        self.prev_rows = prev_rows
+
+    @property
+    def has_data(self) -> bool:
+        return self.curr_rows > 0
+
+    def _value(self, sums: pd.Series, name: str, scale=100):
+        if name in self.ratios:
+            num, den = self.ratios[name]
+            return safe_divide(sums.get(num, 0), sums.get(den, 0), default=0, scale=scale)
+        return sums.get(name, 0)
+
+    def value(self, name: str):
+        """현재 기간 값 (비율 지표는 구성요소 합계로 계산)"""
+        return self._value(self.curr, name)
+
+    def prev_value(self, name: str):
+        """비교 기간 값"""
+        return self._value(self.prev, name)
+
+    def delta(self, name: str) -> float:
+        """증감: 합산 지표는 변화율(%), 비율 지표는 차이(%p)"""
+        c, p = self.value(name), self.prev_value(name)
+        if name in self.ratios:
+            return round(c - p, 1)
+        return safe_divide(c - p, p, default=0, scale=100)
+
+
+def ratio_columns(frame: pd.DataFrame, ratios: dict) -> pd.DataFrame:
+    """구성요소 합계 컬럼으로 비율 컬럼 추가 (safe_divide와 동일 규칙, 벡터 연산)"""
+    for name, (num, den) in ratios.items():
+        if num in frame.columns and den in frame.columns:
+            n = frame[num].to_numpy(dtype=float)
+            d = frame[den].to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r = np.where(d != 0, n / d * 100, 0.0)
+            frame[name] = np.round(np.nan_to_num(r, nan=0.0, posinf=0.0, neginf=0.0), 2)
+    return frame
+
+
+def _factorize(df: pd.DataFrame, cols: tuple) -> tuple[np.ndarray, pd.DataFrame]:
+    """차원 컬럼(들) → (행별 코드, 코드별 라벨 DataFrame). 결측값도 하나의 값으로 취급"""
+    keys = df[list(cols)]
+    codes = keys.groupby(list(cols), dropna=False, sort=False).ngroup().to_numpy()
+    first = np.unique(codes, return_index=True)[1]
+    labels = keys.iloc[first].reset_index(drop=True)
+    return codes, labels
+
+
+class DailyCube:
+    """일별 합계를 날짜축 누적합으로 저장한 큐브
+
+    임의 기간 합계 = cum[끝+1] - cum[시작] 으로 지표당 O(1)에 계산한다.
+    비율 지표(cvr, margin_rate 등)는 합산하지 않고 ratios에 정의된 분자/분모 합계로 계산한다.
+
+    dims: 날짜 × 차원값별 누적합을 추가로 유지할 차원 (컬럼명 또는 컬럼명 튜플)
+    count_dims: 지표 없이 행 수만 유지할 차원 (기간 내 고유값 수 계산용)
+    """
+
+    def __init__(self, df: pd.DataFrame, measures, ratios: dict | None = None,
+                 dims=(), count_dims=(), date_col: str = 'date'):
+        self.measures = [m for m in measures if m in df.columns]
+        self.ratios = dict(ratios or {})
+
+        days = df[date_col].dt.normalize()
+        self.start = days.min().date()
+        self.end = days.max().date()
+        self.n_days = (self.end - self.start).days + 1
+
+        day_idx = (days - pd.Timestamp(self.start)).dt.days.to_numpy()
+        values = df[self.measures].to_numpy(dtype=float) if self.measures else np.empty((len(df), 0))
+
+        cum, cum_rows = self._accumulate(day_idx, np.zeros(len(df), dtype=np.int64), 1, values)
+        self.cum, self.cum_rows = cum[:, 0, :], cum_rows[:, 0]
+
+        # 차원별 누적합: cum shape = (n_days + 1, 차원값 수, 지표 수)
+        self.dims = {}
+        for dim in dims:
+            cols = (dim,) if isinstance(dim, str) else tuple(dim)
+            codes, labels = _factorize(df, cols)
+            cum, cum_rows = self._accumulate(day_idx, codes, len(labels), values)
+            self.dims[dim] = (labels, cum, cum_rows)
+        for dim in count_dims:
+            cols = (dim,) if isinstance(dim, str) else tuple(dim)
+            codes, labels = _factorize(df, cols)
+            _, cum_rows = self._accumulate(day_idx, codes, len(labels), values[:, :0])
+            self.dims[dim] = (labels, None, cum_rows)
+
+    def _accumulate(self, day_idx: np.ndarray, codes: np.ndarray, n_values: int, values: np.ndarray):
+        """(날짜, 차원값) 버킷별 합계를 bincount로 구한 뒤 날짜축 누적합"""
+        flat = day_idx * n_values + codes
+        size = self.n_days * n_values
+        daily = np.stack(
+            [np.bincount(flat, weights=values[:, k], minlength=size) for k in range(values.shape[1])],
+            axis=-1,
+        ) if values.shape[1] else np.zeros((size, 0))
+        rows = np.bincount(flat, minlength=size)
+
+        daily = daily.reshape(self.n_days, n_values, values.shape[1])
+        rows = rows.reshape(self.n_days, n_values)
+        cum = np.concatenate([np.zeros((1,) + daily.shape[1:]), daily.cumsum(axis=0)])
+        cum_rows = np.concatenate([np.zeros((1, n_values), dtype=np.int64), rows.cumsum(axis=0)])
+        return cum, cum_rows
+
+    def _bounds(self, start: date, end: date) -> tuple[int, int]:
+        """[start, end] 기간 → 누적합 배열 위치 (데이터 범위로 clamp)"""
+        i = min(max((start - self.start).days, 0), self.n_days)
+        j = min(max((end - self.start).days + 1, 0), self.n_days)
+        return i, max(i, j)
+
+    def totals(self, start: date, end: date) -> pd.Series:
+        """기간 합계"""
+        i, j = self._bounds(start, end)
+        return pd.Series(self.cum[j] - self.cum[i], index=self.measures)
+
+    def row_count(self, start: date, end: date) -> int:
+        """기간 내 원본 행 수"""
+        i, j = self._bounds(start, end)
+        return int(self.cum_rows[j] - self.cum_rows[i])
+
+    def by(self, dim, start: date, end: date) -> pd.DataFrame:
+        """기간 내 차원값별 합계 (+ 비율 컬럼, 행 수 rows). 해당 기간에 행이 없는 값은 제외"""
+        labels, cum, cum_rows = self.dims[dim]
+        i, j = self._bounds(start, end)
+        rows = cum_rows[j] - cum_rows[i]
+        keep = rows > 0
+        frame = labels[keep].reset_index(drop=True)
+        if cum is not None:
+            sums = (cum[j] - cum[i])[keep]
+            for k, m in enumerate(self.measures):
+                frame[m] = sums[:, k]
+        frame['rows'] = rows[keep]
+        return ratio_columns(frame, self.ratios)
+
+    def distinct_count(self, dim: tuple, start: date, end: date) -> pd.DataFrame:
+        """count_dims의 (그룹 컬럼, 대상 컬럼) 쌍으로 기간 내 그룹별 고유값 수 계산
+
+        nunique()와 같이 대상 컬럼의 결측값은 세지 않는다 (결측만 있는 그룹은 0).
+        """
+        pairs = self.by(dim, start, end)
+        present = pairs[dim[-1]].notna().astype(int)
+        return present.groupby([pairs[c] for c in dim[:-1]], dropna=False).sum().rename('count').reset_index()
+
+    def daily(self, start: date, end: date, dim=None) -> pd.DataFrame:
+        """기간 내 일별 합계 (dim 지정 시 일 × 차원값). 행이 없는 날짜/값은 제외"""
+        i, j = self._bounds(start, end)
+        if dim is None:
+            vals = np.diff(self.cum[i:j + 1], axis=0)
+            rows = np.diff(self.cum_rows[i:j + 1])
+            day_pos = np.flatnonzero(rows > 0)
+            frame = pd.DataFrame(vals[day_pos], columns=self.measures)
+        else:
+            labels, cum, cum_rows = self.dims[dim]
+            rows = np.diff(cum_rows[i:j + 1], axis=0)
+            day_pos, val_pos = np.nonzero(rows > 0)
+            frame = labels.iloc[val_pos].reset_index(drop=True)
+            if cum is not None:
+                vals = np.diff(cum[i:j + 1], axis=0)[day_pos, val_pos]
+                for k, m in enumerate(self.measures):
+                    frame[m] = vals[:, k]
+        frame.insert(0, 'date', pd.Timestamp(self.start) + pd.to_timedelta(i + day_pos, unit='D'))
+        return ratio_columns(frame, self.ratios)
+
+    def compare(self, start: date, end: date, mode: str = "prev") -> Comparison:
+        """현재 기간 vs 비교 기간 (prev/wow/mom/yoy)"""
+        ps, pe = shift_window(start, end, mode)
+        return Comparison(
+            self.totals(start, end), self.totals(ps, pe), self.ratios,
+            self.row_count(start, end), self.row_count(ps, pe),
+        )
+
+
+def slice_by_date(df: pd.DataFrame, start: date, end: date, date_col: str = 'date') -> pd.DataFrame:
+    """날짜 기간으로 원본 행 선택 (날짜순 정렬된 프레임은 이진 탐색으로 슬라이스)"""
+    dates = df[date_col]
+    lo, hi = pd.Timestamp(start), pd.Timestamp(end) + pd.Timedelta(days=1)
+    if dates.is_monotonic_increasing:
+        i, j = dates.searchsorted(lo, 'left'), dates.searchsorted(hi, 'left')
+        return df.iloc[i:j]
+    return df[(dates >= lo) & (dates < hi)]
+
+
+class RowIndex:
+    """차원값별 행 위치 인덱스 (범주 코드 → 오름차순 행 위치 배열)
+
+    여러 값 필터 · 기간 조건을 위치 배열 교집합으로 계산하므로
+    필터를 바꿔도 원본 컬럼을 다시 비교하지 않는다. 결측값은 어떤 필터에도 매칭되지 않는다.
+    """
+
+    def __init__(self, df: pd.DataFrame, dims, date_col: str = 'date'):
+        self.n_rows = len(df)
+        self.values, self._positions = {}, {}
+        for dim in dims:
+            codes, uniques = pd.factorize(df[dim], sort=True)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.values[dim] = list(uniques)
+            self._positions[dim] = {v: order[bounds[k]:bounds[k + 1]] for k, v in enumerate(uniques)}
+
+        days = df[date_col].to_numpy().astype('datetime64[D]')
+        self._date_order = np.argsort(days, kind='stable')
+        self._days = days[self._date_order]
+
+    def positions(self, filters: dict, start: date | None = None, end: date | None = None) -> np.ndarray | None:
+        """모든 조건(차원 내 값은 OR, 차원 · 기간 간 AND)을 만족하는 행 위치. 조건이 없으면 None(전체)"""
+        sets = []
+        for dim, values in filters.items():
+            if values:
+                pos = self._positions[dim]
+                hits = [pos[v] for v in values if v in pos]
+                sets.append(np.sort(np.concatenate(hits)) if hits else np.empty(0, dtype=np.intp))
+        if start is not None and end is not None:
+            i = np.searchsorted(self._days, np.datetime64(start, 'D'), 'left')
+            j = np.searchsorted(self._days, np.datetime64(end, 'D'), 'right')
+            sets.append(np.sort(self._date_order[i:j]))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        out = sets[0]
+        for s in sets[1:]:
+            out = np.intersect1d(out, s, assume_unique=True)
+        return out
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _build_row_index(version: str, _df: pd.DataFrame, dims: tuple) -> RowIndex:
+    return RowIndex(_df, dims)
+
+
+def get_row_index(df: pd.DataFrame, dims) -> RowIndex:
+    """데이터 버전별로 1회만 생성되는 행 위치 인덱스 (df에 있는 차원만)"""
+    dims = tuple(d for d in dims if d in df.columns)
+    return _build_row_index(data_version(df), df, dims)
+
+
+def _filter_key(filters: dict) -> tuple:
+    return tuple((d, tuple(sorted(v))) for d, v in filters.items() if v)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _filter_rows(version: str, _df: pd.DataFrame, dims: tuple, key: tuple, start, end) -> pd.DataFrame:
+    index = get_row_index(_df, dims)
+    out = _df.take(index.positions(dict(key), start, end))
+    out.attrs = {**_df.attrs, 'data_version': f"{version}|{key}|{start}|{end}"}
+    return out
+
+
+def filter_rows(df: pd.DataFrame, dims, filters: dict,
+                start: date | None = None, end: date | None = None) -> pd.DataFrame:
+    """값 필터(+기간) 적용 프레임 (인덱스 교집합, 조건별 1회 · 세션 간 공유)
+
+    dims: 인덱스를 만들 필터 차원 전체 (필터 조합이 바뀌어도 같은 인덱스를 재사용)
+    결과에는 원본 버전 + 조건으로 만든 data_version이 기록되어 큐브 · 차트 캐시 키로 그대로 쓸 수 있다.
+    필터가 없으면 기간 슬라이스(또는 원본)를 그대로 반환한다.
+    """
+    key = _filter_key({d: v for d, v in filters.items() if d in df.columns})
+    if not key:
+        return df if start is None or end is None else slice_by_date(df, start, end)
+    return _filter_rows(data_version(df), df, tuple(dims), key, start, end)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _build_daily_cube(version: str, _df: pd.DataFrame, measures: tuple, ratios: tuple,
+                      dims: tuple, count_dims: tuple) -> DailyCube:
+    return DailyCube(_df, measures, dict(ratios), dims, count_dims)
+
+
+def get_daily_cube(df: pd.DataFrame, measures, ratios: dict | None = None,
+                   dims=(), count_dims=()) -> DailyCube:
+    """데이터 버전별로 1회만 생성되어 모든 fragment·세션이 공유하는 일별 큐브"""
+    ratio_items = tuple(sorted((k, tuple(v)) for k, v in (ratios or {}).items()))
+    return _build_daily_cube(data_version(df), df, tuple(measures), ratio_items,
+                             tuple(dims), tuple(count_dims))
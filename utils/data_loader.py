@@ -1,11 +1,21 @@
 """데이터 로딩 및 전처리 (Supabase 기반)"""
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import date, timedelta
 from functools import wraps
 import concurrent.futures
+import importlib.util
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from config.schema import SCHEMAS, PANDAS_DTYPES
 from .metrics import safe_divide
 
+logger = logging.getLogger(__name__)
+
 
 def safe_execution(default_return=None, error_message="오류가 발생했습니다"):
     def decorator(func):
@@ -22,74 +32,367 @@ def safe_execution(default_return=None, error_message="오류가 발생했습니
     return decorator
 
 
-@st.cache_data(ttl=3600, show_spinner=False)
-def load_supabase_data(table_name: str, recent_days: int = None) -> pd.DataFrame:
-    """Supabase에서 데이터 로드 (count 쿼리 없이 병렬 청크 페칭)
+SUPABASE_CACHE_TTL = 3600
+SUPABASE_RETRY_BACKOFF = 60      # 초 — 페칭 실패 후 첫 재시도까지 대기 (연속 실패마다 2배, 최대 TTL)
+SUPABASE_MAX_ENTRIES = 16        # 보관 항목 수 상한 (가장 오래 요청되지 않은 항목부터 제거)
+SUPABASE_IDLE_EVICT = 6 * 3600   # 초 — 이 시간 동안 요청되지 않은 항목은 제거
 
-    Args:
-        table_name: Supabase 테이블명
-        recent_days: 최근 N일만 조회 (None이면 전체)
-    """
-    try:
-        supabase_url = st.secrets["SUPABASE_URL"]
-        supabase_key = st.secrets["SUPABASE_KEY"]
 
-        CHUNK = 1000
-        cutoff = None
-        if recent_days is not None:
-            cutoff = (date.today() - timedelta(days=recent_days)).isoformat()
+class _SupabaseStore:
+    """프로세스 공용 Supabase 로드 결과 저장소
+
+    - single-flight: 같은 키로 동시에 들어온 miss는 진행 중인 1회 페칭 결과를 함께 기다림
+    - stale-while-revalidate: TTL이 지난 결과는 즉시 반환하고 백그라운드에서 갱신
+    - 실패 백오프: 페칭이 실패한 키는 대기 시간이 지날 때까지 다시 페칭하지 않음
+      (장애 중 rerun마다 모든 세션이 전체 페칭을 반복하지 않도록)
+    - 상한: 요청 순서(LRU)로 SUPABASE_MAX_ENTRIES개까지, 오래 요청되지 않은 항목은 제거
+    """
 
-        # ── 1. 첫 번째 청크로 데이터 존재 확인 + 총 행 수 조회 ──────────────
-        from supabase import create_client
-        first_client = create_client(supabase_url, supabase_key)
-        first_q = first_client.table(table_name).select("*", count="exact")
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: OrderedDict = OrderedDict()   # key → (DataFrame, fetched_at), 최근 요청 순
+        self.used: dict = {}                        # key → 마지막 요청 시각
+        self.inflight: dict = {}                    # key → Future
+        self.failures: dict = {}                    # key → (연속 실패 수, 재시도 가능 시각, 예외)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="supabase-refresh"
+        )
+
+    # 아래 메서드는 lock을 잡은 상태에서 호출
+    def touch(self, key, now: float):
+        self.used[key] = now
+        if key in self.entries:
+            self.entries.move_to_end(key)
+
+    def put(self, key, df: pd.DataFrame, now: float):
+        self.entries[key] = (df, now)
+        self.failures.pop(key, None)
+        self.touch(key, now)
+        self.evict(now)
+
+    def fail(self, key, error: Exception, now: float) -> float:
+        """실패 기록 → 다음 재시도까지 대기 시간(초) 반환"""
+        count = self.failures.get(key, (0, 0, None))[0] + 1
+        backoff = min(SUPABASE_RETRY_BACKOFF * 2 ** (count - 1), SUPABASE_CACHE_TTL)
+        self.failures[key] = (count, now + backoff, error)
+        return backoff
+
+    def cooling_down(self, key, now: float) -> bool:
+        failure = self.failures.get(key)
+        return failure is not None and now < failure[1]
+
+    def evict(self, now: float):
+        for key in [k for k in self.entries if now - self.used.get(k, now) > SUPABASE_IDLE_EVICT]:
+            self.entries.pop(key)
+        while len(self.entries) > SUPABASE_MAX_ENTRIES:
+            self.entries.popitem(last=False)
+        for key in [k for k in self.used if k not in self.entries and k not in self.inflight]:
+            self.used.pop(key)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_store() -> _SupabaseStore:
+    return _SupabaseStore()
+
+
+def _arrow_types(types: dict) -> dict:
+    import pyarrow as pa
+    arrow = {'TEXT': pa.string(), 'INTEGER': pa.int64(), 'BIGINT': pa.int64(),
+             'NUMERIC': pa.float64(), 'DOUBLE PRECISION': pa.float64(), 'DATE': pa.timestamp('us')}
+    return {c: arrow[t] for c, t in types.items() if t in arrow}
+
+
+def _parse_csv(chunks: list[str], table_name: str) -> pd.DataFrame:
+    """PostgREST CSV 청크(각각 헤더 포함) → 스키마 타입 컬럼으로 한 번에 파싱
+
+    JSON(list of dict)처럼 행마다 dict를 만들거나 컬럼명을 반복하지 않고,
+    dtype 추론 없이 스키마 레지스트리(config.schema)의 타입으로 바로 읽는다.
+    NULL은 빈 칸, 빈 문자열은 ""로 전송되므로 따옴표 없는 빈 칸만 결측으로 처리한다.
+    """
+    header = chunks[0].partition("\n")[0]
+    data = io.BytesIO()
+    data.write(chunks[0].rstrip("\n").encode())
+    for chunk in chunks[1:]:
+        rows = chunk.partition("\n")[2].rstrip("\n")
+        if rows:
+            data.write(b"\n" + rows.encode())
+    data.seek(0)
+    types = SCHEMAS[table_name].types() if table_name in SCHEMAS else {}
+
+    if importlib.util.find_spec("pyarrow"):
+        import pyarrow.csv as pcsv
+        table = pcsv.read_csv(data, convert_options=pcsv.ConvertOptions(
+            column_types=_arrow_types(types), null_values=[""],
+            strings_can_be_null=True, quoted_strings_can_be_null=False,
+        ))
+        # 정수 컬럼은 NULL이 없으면 int64 그대로, 있으면 float64(NaN) → _conform에서 0으로 채운 뒤 int64
+        return table.to_pandas()
+
+    columns = header.replace('"', '').split(",")
+    return pd.read_csv(
+        data,
+        dtype={c: PANDAS_DTYPES[types[c]] for c in columns if types.get(c, 'DATE') != 'DATE'},
+        parse_dates=[c for c in columns if types.get(c) == 'DATE'],
+        keep_default_na=False, na_values=[""], float_precision="round_trip",
+    )
+
+
+def _fetch_supabase_table(url: str, key: str, table_name: str, recent_days: int = None,
+                          columns: str = "*", before_days: int = None) -> pd.DataFrame:
+    """Supabase 테이블 페칭 (CSV 전송 · 병렬 청크). 실패 시 예외를 그대로 전파"""
+    from supabase import create_client
+
+    CHUNK = 1000
+    cutoff = None
+    if recent_days is not None:
+        cutoff = (date.today() - timedelta(days=recent_days)).isoformat()
+    upper = None
+    if before_days is not None:
+        upper = (date.today() - timedelta(days=before_days)).isoformat()
+
+    def _window(q):
         if cutoff:
-            first_q = first_q.gte("date", cutoff)
-        first_resp = first_q.order("date").range(0, CHUNK - 1).execute()
+            q = q.gte("date", cutoff)
+        if upper:
+            q = q.lt("date", upper)
+        return q
+
+    # ── 1. 첫 번째 청크로 데이터 존재 확인 + 총 행 수 조회 ──────────────
+    first_client = create_client(url, key)
+    first_q = _window(first_client.table(table_name).select(columns, count="exact"))
+    first_resp = first_q.order("date").range(0, CHUNK - 1).csv().execute()
+
+    first_data = first_resp.data if isinstance(first_resp.data, str) else ""
+    if "\n" not in first_data.strip():
+        return pd.DataFrame()
+    total = first_resp.count or CHUNK
 
-        first_data = first_resp.data or []
-        total = first_resp.count or len(first_data)
+    # ── 2. 나머지 청크 병렬 페칭 (오프셋 순서대로 이어 붙임) ───────────────
+    remaining_offsets = list(range(CHUNK, total, CHUNK))
 
-        if not first_data:
-            return pd.DataFrame()
+    def fetch_chunk(offset: int) -> str:
+        c = create_client(url, key)
+        q = _window(c.table(table_name).select(columns))
+        data = q.order("date").range(offset, offset + CHUNK - 1).csv().execute().data
+        return data if isinstance(data, str) else ""
 
-        # 데이터가 1청크 이하면 바로 반환 (추가 쿼리 불필요)
-        if total <= CHUNK:
-            df = pd.DataFrame(first_data)
-            if 'date' in df.columns:
-                df = df.sort_values('date').reset_index(drop=True)
-            return df
+    chunks = [first_data]
+    if remaining_offsets:
+        max_workers = min(10, len(remaining_offsets))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            chunks += list(executor.map(fetch_chunk, remaining_offsets))
 
-        # ── 2. 나머지 청크 병렬 페칭 ─────────────────────────────────────────
-        remaining_offsets = list(range(CHUNK, total, CHUNK))
+    df = _parse_csv(chunks, table_name)
+    if 'date' in df.columns:
+        df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    return df
 
-        def fetch_chunk(offset: int) -> list:
-            c = create_client(supabase_url, supabase_key)
-            q = c.table(table_name).select("*")
-            if cutoff:
-                q = q.gte("date", cutoff)
-            return q.order("date").range(offset, offset + CHUNK - 1).execute().data or []
 
-        all_data: list = list(first_data)
-        max_workers = min(10, len(remaining_offsets))
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(fetch_chunk, off): off for off in remaining_offsets}
-            for future in concurrent.futures.as_completed(futures):
-                chunk = future.result()
-                if chunk:
-                    all_data.extend(chunk)
-
-        df = pd.DataFrame(all_data)
-        if 'date' in df.columns:
-            df = df.sort_values('date').reset_index(drop=True)
+def _stamp_version(df: pd.DataFrame, cache_key: tuple) -> pd.DataFrame:
+    """페칭 결과에 데이터 버전 기록 (파생 캐시의 키로 사용)"""
+    df.attrs['data_version'] = f"{cache_key}@{time.time():.0f}"
+    return df
+
+
+def data_version(df: pd.DataFrame) -> str:
+    """DataFrame의 데이터 버전
+
+    load_supabase_data가 기록한 버전을 우선 사용하고,
+    없으면 내용 해시로 대체한다.
+    """
+    version = df.attrs.get('data_version')
+    if version:
+        return version
+    return str(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+def _refresh_in_background(store: _SupabaseStore, cache_key: tuple, url: str, key: str) -> pd.DataFrame:
+    """캐시 항목 백그라운드 갱신 · 선적재 (실패 시 기존 결과 유지)
+
+    같은 키로 기다리는 요청이 결과를 받을 수 있도록 DataFrame을 반환하고, 실패는 예외로 전달한다.
+    """
+    try:
+        df = _stamp_version(_fetch_supabase_table(url, key, *cache_key), cache_key)
+        with store.lock:
+            store.put(cache_key, df, time.monotonic())
         return df
+    except Exception as e:
+        with store.lock:
+            backoff = store.fail(cache_key, e, time.monotonic())
+        logger.warning("Supabase 백그라운드 갱신 실패 %s: %s (%.0f초 후 재시도)", cache_key, e, backoff)
+        raise
+    finally:
+        with store.lock:
+            store.inflight.pop(cache_key, None)
 
+
+def load_supabase_data(table_name: str, recent_days: int = None, columns: str = "*",
+                       before_days: int = None) -> pd.DataFrame:
+    """Supabase에서 데이터 로드 (single-flight + stale-while-revalidate 캐시)
+
+    같은 (table_name, recent_days, columns, before_days) 요청이 동시에 들어오면 한 번만 페칭하고,
+    TTL이 지난 결과는 바로 반환한 뒤 백그라운드에서 갱신한다.
+    반환된 DataFrame은 세션 간 공유되므로 직접 수정하지 않는다.
+
+    Args:
+        table_name: Supabase 테이블명
+        recent_days: 최근 N일만 조회 (None이면 전체)
+        columns: 조회할 컬럼 (PostgREST select 형식, 기본 전체)
+        before_days: 최근 N일 이전 데이터만 조회 (None이면 오늘까지)
+    """
+    try:
+        supabase_url = st.secrets["SUPABASE_URL"]
+        supabase_key = st.secrets["SUPABASE_KEY"]
     except KeyError as e:
         st.error(f"❌ 설정 오류: {e} 키가 Secrets에 없습니다. SUPABASE_URL / SUPABASE_KEY를 확인하세요.")
         return pd.DataFrame()
+
+    store = _get_store()
+    cache_key = (table_name, recent_days, columns, before_days)
+
+    with store.lock:
+        now = time.monotonic()
+        store.touch(cache_key, now)
+        entry = store.entries.get(cache_key)
+        if entry is not None:
+            df, fetched_at = entry
+            if (now - fetched_at >= SUPABASE_CACHE_TTL and cache_key not in store.inflight
+                    and not store.cooling_down(cache_key, now)):
+                store.inflight[cache_key] = store.executor.submit(
+                    _refresh_in_background, store, cache_key, supabase_url, supabase_key
+                )
+            return df
+
+        future = store.inflight.get(cache_key)
+        if future is None and store.cooling_down(cache_key, now):
+            # 직전 페칭이 실패한 키: 대기 시간 동안은 다시 페칭하지 않고 같은 오류를 표시
+            st.error(f"❌ Supabase 데이터 로드 중 오류 [{table_name}]: {store.failures[cache_key][2]} (잠시 후 재시도)")
+            return pd.DataFrame()
+        is_owner = future is None
+        if is_owner:
+            future = concurrent.futures.Future()
+            store.inflight[cache_key] = future
+
+    try:
+        if not is_owner:
+            return future.result()
+
+        try:
+            df = _stamp_version(_fetch_supabase_table(supabase_url, supabase_key, *cache_key), cache_key)
+        except Exception as e:
+            with store.lock:
+                store.fail(cache_key, e, time.monotonic())
+            future.set_exception(e)
+            raise
+        with store.lock:
+            store.put(cache_key, df, time.monotonic())
+        future.set_result(df)
+        return df
+
     except Exception as e:
         st.error(f"❌ Supabase 데이터 로드 중 오류 [{table_name}]: {e}")
         return pd.DataFrame()
+    finally:
+        if is_owner:
+            with store.lock:
+                if store.inflight.get(cache_key) is future:
+                    store.inflight.pop(cache_key, None)
+
+
+def prefetch_supabase_data(table_name: str, recent_days: int = None, columns: str = "*",
+                           before_days: int = None):
+    """load_supabase_data 결과를 백그라운드에서 미리 채움 (이미 있거나 진행 중이면 무시)
+
+    진행 중인 선적재는 single-flight 대상이므로, 사용자가 해당 페이지로 이동하면
+    새로 페칭하지 않고 그 결과를 기다린다.
+    """
+    try:
+        supabase_url = st.secrets["SUPABASE_URL"]
+        supabase_key = st.secrets["SUPABASE_KEY"]
+    except KeyError:
+        return
+
+    store = _get_store()
+    cache_key = (table_name, recent_days, columns, before_days)
+    with store.lock:
+        now = time.monotonic()
+        if cache_key in store.entries or cache_key in store.inflight or store.cooling_down(cache_key, now):
+            return
+        store.touch(cache_key, now)
+        store.inflight[cache_key] = store.executor.submit(
+            _refresh_in_background, store, cache_key, supabase_url, supabase_key
+        )
+
+
+def clear_supabase_cache():
+    """load_supabase_data 캐시 전체 비우기 (진행 중인 페칭은 그대로 완료됨)"""
+    store = _get_store()
+    with store.lock:
+        store.entries.clear()
+        store.failures.clear()
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _stitch_history(version: str, _recent: pd.DataFrame, _history: pd.DataFrame, columns: tuple) -> pd.DataFrame:
+    cols = list(columns)
+    cutoff = _recent['date'].min()
+    old = _history.loc[_history['date'] < cutoff, [c for c in cols if c in _history.columns]]
+    new = _recent[cols]
+    # 집계에 없는 차원은 원본과 같은 dtype의 결측 컬럼으로 (object로 풀리지 않도록)
+    old = old.assign(**{c: pd.Series(index=old.index, dtype=new[c].dtype) for c in cols if c not in old.columns})[cols]
+    # 범주형 컬럼은 범주를 합쳐 맞춰야 연결 후에도 category로 유지됨 (다르면 object로 풀림)
+    for c in old.columns:
+        if isinstance(old[c].dtype, pd.CategoricalDtype) and isinstance(new[c].dtype, pd.CategoricalDtype):
+            dtype = pd.CategoricalDtype(old[c].cat.categories.union(new[c].cat.categories))
+            old, new = old.assign(**{c: old[c].astype(dtype)}), new.assign(**{c: new[c].astype(dtype)})
+    df = pd.concat([old, new], ignore_index=True)
+    df.attrs['data_version'] = version
+    return df
+
+
+def stitch_history(recent: pd.DataFrame, history: pd.DataFrame, columns) -> pd.DataFrame:
+    """최근 원본 + 과거 서버 측 집계를 하나의 프레임으로 연결 (겹치는 날짜는 원본 우선)
+
+    지표 합계는 원본/집계 행 어느 쪽이든 같으므로 큐브·추이 계산에 그대로 사용할 수 있다.
+    """
+    if history.empty:
+        return recent
+    if recent.empty:
+        return history
+    version = f"{data_version(recent)}+{data_version(history)}"
+    return _stitch_history(version, recent, history, tuple(columns))
+
+
+def _conform(df: pd.DataFrame, table: str, fill: bool = True) -> pd.DataFrame:
+    """스키마 레지스트리 기준 컬럼명 · dtype 정규화 (한 번의 assign)
+
+    별칭(한글 헤더 · 소문자 컬럼명)을 컬럼명으로 바꾸고, dtype이 이미 맞는 컬럼(CSV 전송 결과)은 그대로 둔 채
+    나머지만 변환한다. 범주형 힌트 컬럼은 category로, fill=True면 숫자 결측은 0으로 채우고
+    정수(INTEGER · BIGINT) 컬럼은 int64로 맞춘다 (fill=False이고 결측이 있으면 Int64로 유지).
+    """
+    schema = SCHEMAS[table]
+    df = df.rename(columns=schema.renames)
+    cast = {}
+    for name in df.columns.intersection(list(schema.by_name)):
+        col, s = schema.by_name[name], df[name]
+        if col.sql == 'DATE':
+            if not pd.api.types.is_datetime64_any_dtype(s):
+                cast[name] = pd.to_datetime(s, errors='coerce')
+        elif col.numeric:
+            out = s
+            if not pd.api.types.is_numeric_dtype(out):
+                # 문자열로 들어온 값 (구 시트 데이터 등): 천 단위 콤마 제거, '-' 등은 결측
+                out = pd.to_numeric(out.astype('str').str.replace(',', '', regex=False), errors='coerce')
+            if fill and out.hasnans:
+                out = out.fillna(0)
+            dtype = 'int64' if col.integer and (fill or not out.hasnans) else col.dtype
+            if str(out.dtype) != dtype:
+                out = out.round().astype(dtype) if col.integer else out.astype(dtype)
+            if out is not s:
+                cast[name] = out
+        elif str(s.dtype) != col.dtype:
+            cast[name] = s.astype(col.dtype)
+    return df.assign(**cast) if cast else df
 
 
 @st.cache_data(ttl=3600, show_spinner=False)
@@ -99,29 +402,13 @@ def load_pointclick(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
 
-    # Supabase는 이미 영어 컬럼명으로 저장됨 (하위 호환: 한글 컬럼명도 처리)
-    col_map = {
-        '일자': 'date', '광고구분': 'ad_category', '매체타입': 'media_type',
-        '퍼블리셔타입': 'publisher_type', '광고명': 'ad_name', '매체명': 'media_name',
-        'CD': 'cd', '광고주명': 'advertiser', 'OS': 'os', '광고타입': 'ad_type',
-        '광고단가': 'unit_price', '클릭수': 'clicks', '전환수': 'conversions',
-        '광고비': 'ad_revenue', '매체수익금': 'media_cost', '매체정산비율': 'media_rate',
-        '마진금액': 'margin', '마진율': 'margin_rate', 'CVR': 'cvr',
-        '주차': 'week', '월별': 'month'
-    }
-    df = df.rename(columns=col_map)
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    # 컬럼명 · dtype은 스키마 레지스트리 기준 (하위 호환: 한글 컬럼명도 처리)
+    df = _conform(df, 'pointclick_db')
 
     if df['date'].isna().all():
         st.error("⚠️ 유효한 날짜 데이터가 없습니다.")
         return pd.DataFrame()
 
-    numeric_cols = ['unit_price', 'clicks', 'conversions', 'ad_revenue', 'media_cost',
-                    'media_rate', 'margin', 'margin_rate', 'cvr']
-    for c in numeric_cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
-
     df = df[df['date'].notna()].copy()
 
     # id 컬럼 제거 (Supabase 자동생성)
@@ -137,32 +424,13 @@ def load_cashplay(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
 
-    # Supabase는 이미 영어 컬럼명으로 저장됨 (하위 호환: 한글 컬럼명도 처리)
-    col_map = {
-        '날짜': 'date',
-        '리워드(원)_유상': 'reward_paid', '리워드(원)_무상': 'reward_free', '리워드(원)_합계': 'reward_total',
-        '게임(원)_직거래': 'game_direct', '게임(원)_DSP': 'game_dsp', '게임(원)_RS': 'game_rs',
-        '게임(원)_인수': 'game_acquisition', '게임(원)_합계': 'game_total',
-        '게더링(원)_포인트클릭': 'gathering_pointclick',
-        'IAA(원)_레벨플레이': 'iaa_levelplay', 'IAA(원)_애드웨일': 'iaa_adwhale',
-        'IAA(원)_허블': 'iaa_hubble', 'IAA(원)_합계': 'iaa_total',
-        '오퍼월(원)_애드팝콘': 'offerwall_adpopcorn', '오퍼월(원)_포인트클릭': 'offerwall_pointclick',
-        '오퍼월(원)_아이브': 'offerwall_ive', '오퍼월(원)_애드포러스': 'offerwall_adforus',
-        '오퍼월(원)_애디슨': 'offerwall_addison', '오퍼월(원)_애드조': 'offerwall_adjo',
-        '오퍼월(원)_합계': 'offerwall_total'
-    }
-    df = df.rename(columns=col_map)
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    # 컬럼명 · dtype은 스키마 레지스트리 기준 (하위 호환: 한글 컬럼명, '-' 등 문자열 값도 처리)
+    df = _conform(df, 'cashplay_db')
 
     if df['date'].isna().all():
         st.error("⚠️ 유효한 날짜 데이터가 없습니다.")
         return pd.DataFrame()
 
-    numeric_cols = [c for c in df.columns if c != 'date']
-    for c in numeric_cols:
-        df[c] = df[c].replace('-', 0) if df[c].dtype == object else df[c]
-        df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
-
     df = df[df['date'].notna()].copy()
     df['revenue_total'] = df['game_total'] + df['gathering_pointclick'] + df['iaa_total'] + df['offerwall_total']
     df['cost_total'] = df['reward_total']
@@ -181,11 +449,7 @@ def load_media_master(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
 
-    col_map = {
-        '매체키': 'media_key',
-        '매체명': 'media_name'
-    }
-    df = df.rename(columns=col_map)
+    df = df.rename(columns=SCHEMAS['media_master'].renames)
 
     if 'media_key' not in df.columns or 'media_name' not in df.columns:
         st.error("⚠️ 매체 마스터에 필수 컬럼(media_key, media_name)이 없습니다.")
@@ -195,52 +459,101 @@ def load_media_master(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@st.cache_data(ttl=300, show_spinner=False)
+def get_sync_version(table_name: str) -> str:
+    """sync_state에 기록된 테이블 데이터 버전 (없거나 조회 실패 시 빈 문자열)"""
+    from supabase import create_client
+    try:
+        client = create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"])
+        rows = (client.table("sync_state").select("version")
+                .eq("table_name", table_name).limit(1).execute().data or [])
+    except Exception as e:
+        logger.warning("sync_state 조회 실패 [%s]: %s", table_name, e)
+        return ""
+    return rows[0]["version"] if rows else ""
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _load_media(table_name: str, version: str) -> pd.DataFrame:
+    from supabase import create_client
+    client = create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"])
+    rows, offset, CHUNK = [], 0, 1000
+    while True:
+        page = (client.table(table_name).select("media_key,media_name")
+                .order("media_key").range(offset, offset + CHUNK - 1).execute().data or [])
+        rows.extend(page)
+        if len(page) < CHUNK:
+            break
+        offset += CHUNK
+    return pd.DataFrame(rows, columns=['media_key', 'media_name'])
+
+
+def load_media(table_name: str = "media_master") -> pd.DataFrame:
+    """매체 마스터 (media_key → media_name, sync_state 버전이 바뀔 때만 다시 읽음)
+
+    create_media_master.py가 변경이 있을 때만 버전을 갱신하므로 평상시에는 버전 조회(5분 캐시)만
+    발생한다. 버전이 없으면(미기록 · 조회 실패) SUPABASE_CACHE_TTL 구간마다 다시 읽는다.
+    """
+    version = get_sync_version(table_name) or f"ttl-{int(time.time() // SUPABASE_CACHE_TTL)}"
+    try:
+        return load_media_master(_load_media(table_name, version))
+    except Exception as e:
+        st.error(f"❌ 매체 마스터 로드 중 오류: {e}")
+        return pd.DataFrame()
+
+
+def map_media_name(keys: pd.Series, media: pd.DataFrame) -> pd.Series:
+    """media_key → 범주형 media_name (마스터에 없는 키는 키 그대로)
+
+    행 단위가 아니라 고유 키 단위로 한 번만 조회한 뒤 코드 배열로 펼친다.
+    """
+    lookup = pd.Series(media['media_name'].to_numpy(), index=media['media_key'].astype(str))
+    cat = keys.astype(str).astype('category')
+    uniq = cat.cat.categories
+    names = lookup.reindex(uniq).to_numpy(dtype=object)
+    missing = pd.isna(names)
+    names[missing] = uniq.to_numpy(dtype=object)[missing]
+    # 키 코드 → 매체명 코드 (결측 키는 -1 유지)
+    name_codes, name_levels = pd.factorize(names)
+    codes = cat.cat.codes.to_numpy()
+    codes = np.where(codes >= 0, name_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(codes, name_levels), index=keys.index)
+
+
 @st.cache_data(ttl=3600, show_spinner=False)
 @safe_execution(default_return=pd.DataFrame(), error_message="GA4 데이터 처리 중 오류")
-def load_ga4(df: pd.DataFrame) -> pd.DataFrame:
+def load_ga4(df: pd.DataFrame, media: pd.DataFrame | None = None, *, table: str) -> pd.DataFrame:
     """GA4 데이터 전처리 (공통)
 
-    Supabase(PostgreSQL)는 quoted 컬럼명도 소문자로 내려줄 수 있으므로
-    camelCase 컬럼명을 복원한다.
+    컬럼명(PostgreSQL 소문자 컬럼 → camelCase 복원) · dtype은 스키마 레지스트리의 table 정의를 따른다.
+    media(load_media 결과)가 주어지면 media_key로 매체명을 조회 시점에 매핑한다.
     """
     if df.empty:
         return df
 
-    # PostgreSQL 소문자 컬럼 → GA4 API 원본 camelCase 복원
-    camel_restore = {
-        'eventname': 'eventName',
-        'pagetitle': 'pageTitle',
-        'pagepath': 'pagePath',
-        'eventcount': 'eventCount',
-        'screenpageviews': 'screenPageViews',
-        'averagesessionduration': 'averageSessionDuration',
-        'engagementrate': 'engagementRate',
-        'userengagementduration': 'userEngagementDuration',
-        'activeusers': 'activeUsers',
-        'active7dayusers': 'active7DayUsers',
-        'active28dayusers': 'active28DayUsers',
-        'newusers': 'newUsers',
-    }
-    df = df.rename(columns={k: v for k, v in camel_restore.items() if k in df.columns})
-
-    # 날짜 컬럼 처리
-    if 'date' in df.columns or '날짜' in df.columns:
-        date_col = 'date' if 'date' in df.columns else '날짜'
-        df['date'] = pd.to_datetime(df[date_col], errors='coerce')
+    df = _conform(df, table, fill=False)
 
+    if 'date' in df.columns:
         if df['date'].isna().all():
             st.error("⚠️ 유효한 날짜 데이터가 없습니다.")
             return pd.DataFrame()
 
         df = df[df['date'].notna()].copy()
 
-    # 숫자 컬럼 변환 (문자열로 저장된 경우 대비)
-    skip_cols = {'date', '날짜', 'id', 'eventName', 'pageTitle', 'pagePath',
-                 'page_name', 'page_type', 'media_key', 'media_name',
-                 'page', 'button_id'}
-    for col in df.columns:
-        if col not in skip_cols:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    # 총 세션시간 (합산 가능): 컬럼이 없거나 비어 있는 과거 행은 평균 세션시간 × 세션 수로 보정
+    if {'averageSessionDuration', 'sessions'} <= set(df.columns):
+        backfill = df['averageSessionDuration'] * df['sessions']
+        if 'session_duration' in df.columns:
+            df['session_duration'] = df['session_duration'].fillna(backfill)
+        else:
+            df['session_duration'] = backfill
+
+    # 숫자 결측은 0 · 정수 컬럼은 int64 (보정 후)
+    df = _conform(df, table)
+
+    # 매체명: 적재 시점 조인 대신 media_master로 매핑 → 매체명 변경이 과거 데이터에도 즉시 반영
+    if media is not None and not media.empty and 'media_key' in df.columns:
+        df['media_name'] = map_media_name(df['media_key'], media)
 
     # id 컬럼 제거 (Supabase 자동생성)
     df = df.drop(columns=['id'], errors='ignore')
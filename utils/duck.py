@@ -0,0 +1,84 @@
+"""DuckDB 인프로세스 분석 엔진 (선택 의존성)
+
+duckdb가 설치돼 있으면 캐시된 DataFrame을 (키별 1회) Arrow 테이블로 변환해 등록하고
+파라미터 SQL로 필터 · 정렬 · 집계를 멀티스레드로 실행한다. 설치돼 있지 않으면 available()이
+False이고 호출부는 기존 pandas 경로를 사용한다.
+
+    if duck.available():
+        raw = duck.arrow_table((version, kf, kt), raw_df)
+        df = duck.query("SELECT ad_type, SUM(clicks) AS clicks FROM raw GROUP BY 1", raw=raw)
+
+pandas 문자열 컬럼을 직접 스캔하면 행 단위 변환이 일어나므로 항상 arrow_table()로 등록한다.
+"""
+import importlib.util
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+
+def available() -> bool:
+    return all(importlib.util.find_spec(m) for m in ("duckdb", "pyarrow"))
+
+
+@st.cache_resource(show_spinner=False)
+def _database():
+    """프로세스 공용 인메모리 DB (쿼리마다 cursor로 분리 → 스레드 안전)"""
+    import duckdb
+    return duckdb.connect(":memory:")
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _arrow_table(key: tuple, _df: pd.DataFrame):
+    import pyarrow as pa
+    return pa.Table.from_pandas(_df, preserve_index=False)
+
+
+def arrow_table(key: tuple, df: pd.DataFrame):
+    """df → Arrow 테이블 (데이터 버전 등 df 내용을 결정하는 key별 1회, 세션 간 공유)"""
+    return _arrow_table(tuple(key), df)
+
+
+def quote(name: str) -> str:
+    """식별자 인용 (컬럼명은 호출부 화이트리스트에서만 전달할 것)"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def query(sql: str, params=None, **frames) -> pd.DataFrame:
+    """frames(Arrow 테이블 · DataFrame)를 이름별 뷰로 등록(복사 없음)한 뒤 파라미터 SQL 실행"""
+    con = _database().cursor()
+    try:
+        for name, frame in frames.items():
+            con.register(name, frame)
+        return con.execute(sql, params or []).df()
+    finally:
+        con.close()
+
+
+
+def group_by(table, dims, measures, start: date, end: date, daily: bool = False,
+             date_col: str = 'date') -> pd.DataFrame:
+    """[start, end] 기간 차원값별 합계 + 행 수 rows (daily=True면 일 × 차원값)
+
+    DailyCube.by / daily와 같은 형태로 반환한다 (결측 차원값도 하나의 그룹, 합계는 float).
+    """
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    keys = ([f"CAST(DATE_TRUNC('day', {quote(date_col)}) AS TIMESTAMP) AS {quote(date_col)}"] if daily else []) \
+        + [quote(d) for d in dims]
+    sums = [f"CAST(SUM({quote(m)}) AS DOUBLE) AS {quote(m)}" for m in measures]
+    return query(
+        f"SELECT {', '.join(keys + sums + ['COUNT(*) AS rows'])} FROM t "
+        f"WHERE {quote(date_col)} >= ? AND {quote(date_col)} < ? "
+        f"GROUP BY ALL ORDER BY ALL",
+        [pd.Timestamp(start), pd.Timestamp(end + timedelta(days=1))], t=table,
+    )
+    return out
+
+
+def distinct_count(table, group: str, target: str, start: date, end: date, date_col: str = 'date') -> pd.DataFrame:
+    """[start, end] 기간 group별 target 고유값 수 (결측 target은 세지 않음, 결측만 있는 그룹은 0)"""
+    return query(
+        f"SELECT {quote(group)}, COUNT(DISTINCT {quote(target)}) AS count FROM t "
+        f"WHERE {quote(date_col)} >= ? AND {quote(date_col)} < ? GROUP BY ALL ORDER BY ALL",
+        [pd.Timestamp(start), pd.Timestamp(end + timedelta(days=1))], t=table,
+    )
@@ -0,0 +1,158 @@
+"""다운로드 내보내기 (CSV · Parquet · Excel)
+
+파일은 다운로드 버튼을 눌렀을 때만 청크 단위로 임시 파일에 생성되고, (데이터 버전, 기간, 형식)별로
+캐시되어 같은 구간을 다시 받으면 인코딩 없이 바로 전달된다 (디스크 사용량 기준으로 오래된 파일부터 삭제).
+"""
+import importlib.util
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import BinaryIO
+
+import pandas as pd
+import streamlit as st
+
+# 형식 → (버튼 라벨, MIME, 확장자)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "text/csv", "csv"),
+    "parquet": ("Parquet", "application/vnd.apache.parquet", "parquet"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+CSV_CHUNK_ROWS = 50_000
+EXCEL_MAX_ROWS = 1_048_575   # 시트 최대 행(1,048,576) - 헤더
+EXPORT_CACHE_BYTES = 512 * 1024 * 1024   # 캐시된 내보내기 파일의 디스크 사용량 상한
+
+
+def available_formats() -> list[str]:
+    """설치된 엔진 기준 사용 가능한 형식 (Parquet: pyarrow, Excel: openpyxl)"""
+    formats = ["csv"]
+    if importlib.util.find_spec("pyarrow"):
+        formats.append("parquet")
+    if importlib.util.find_spec("openpyxl"):
+        formats.append("xlsx")
+    return formats
+
+
+def _write_csv(df: pd.DataFrame, path: str):
+    """CSV (UTF-8 BOM, 엑셀 호환) — 행 청크 단위로 인코딩해 파일에 이어 씀 (메모리는 청크 크기까지만)"""
+    with open(path, "wb") as f:
+        for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+            chunk = df.iloc[start:start + CSV_CHUNK_ROWS]
+            first = start == 0
+            f.write(chunk.to_csv(index=False, header=first).encode("utf-8-sig" if first else "utf-8"))
+
+
+def _write_parquet(df: pd.DataFrame, path: str):
+    """Parquet — 같은 스키마로 행 청크마다 row group을 이어 씀"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+            chunk = df.iloc[start:start + CSV_CHUNK_ROWS]
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_excel(df: pd.DataFrame, path: str):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name="data")
+
+
+_WRITERS = {"csv": _write_csv, "parquet": _write_parquet, "xlsx": _write_excel}
+
+
+class _ExportStore:
+    """(키, 형식) → 임시 파일 (세션 간 공유, 디스크 사용량 기준 LRU — 제거 시 파일 삭제)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.dir = tempfile.mkdtemp(prefix="dashboard-export-")
+        self.entries = OrderedDict()   # (key, fmt) → (경로, 바이트 수)
+        self.nbytes = 0
+
+    def open(self, key):
+        """캐시된 파일을 열어 반환 (없으면 None) — 제거와 겹치지 않도록 잠금 안에서 연다"""
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit is None:
+                return None
+            self.entries.move_to_end(key)
+            return open(hit[0], "rb")
+
+    def put(self, key, path: str):
+        size = os.path.getsize(path)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self._drop(old)
+            self.entries[key] = (path, size)
+            self.nbytes += size
+            # 방금 만든 파일은 상한을 넘더라도 이번 다운로드를 위해 남김
+            while self.nbytes > EXPORT_CACHE_BYTES and len(self.entries) > 1:
+                self._drop(self.entries.popitem(last=False)[1])
+
+    def _drop(self, entry):
+        path, size = entry
+        self.nbytes -= size
+        try:
+            os.remove(path)   # 이미 열린 핸들은 닫힐 때까지 유효 (POSIX)
+        except OSError:
+            pass
+
+
+@st.cache_resource(show_spinner=False)
+def _get_export_store() -> _ExportStore:
+    return _ExportStore()
+
+
+def export_file(df, key: tuple, fmt: str) -> BinaryIO:
+    """(데이터 버전, 기간, …) 키 + 형식별로 1회만 인코딩되는 내보내기 파일 (읽기용 핸들)
+
+    파일은 청크 단위로 임시 디렉터리에 쓰이고, 다운로드 시 Streamlit이 핸들에서 읽어 간다.
+    """
+    store = _get_export_store()
+    cache_key = (tuple(key), fmt)
+    f = store.open(cache_key)
+    if f is None:
+        fd, path = tempfile.mkstemp(suffix=f".{EXPORT_FORMATS[fmt][2]}", dir=store.dir)
+        os.close(fd)
+        try:
+            _WRITERS[fmt](df() if callable(df) else df, path)
+        except Exception:
+            os.remove(path)
+            raise
+        store.put(cache_key, path)
+        f = open(path, "rb")
+    return f
+
+
+def export_bytes(df, key: tuple, fmt: str) -> bytes:
+    """export_file의 내용을 bytes로 반환"""
+    with export_file(df, key, fmt) as f:
+        return f.read()
+
+
+def export_buttons(df, key: tuple, file_stem: str, formats=None, rows: int | None = None):
+    """형식별 다운로드 버튼 (클릭 시에만 파일 생성, 클릭해도 rerun 없음)
+
+    df: DataFrame 또는 클릭 시 DataFrame을 만드는 함수 (함수면 rows로 행 수 전달)
+    key: 데이터 버전 · 기간 등 df 내용을 결정하는 값 (캐시 키)
+    """
+    rows = len(df) if rows is None and not callable(df) else rows or 0
+    formats = [f for f in (formats or EXPORT_FORMATS) if f in available_formats()]
+    cols = st.columns(len(formats) + 4, gap="small")
+    for col, fmt in zip(cols, formats):
+        label, mime, ext = EXPORT_FORMATS[fmt]
+        too_large = fmt == "xlsx" and rows > EXCEL_MAX_ROWS
+        with col:
+            st.download_button(
+                f"📥 {label}",
+                data=lambda fmt=fmt: export_file(df, key, fmt),
+                file_name=f"{file_stem}.{ext}", mime=mime,
+                key=f"{file_stem}_{fmt}_download", on_click="ignore",
+                disabled=too_large,
+                help=f"Excel 시트 최대 행 수({EXCEL_MAX_ROWS:,}) 초과 — CSV 또는 Parquet을 사용하세요" if too_large else None,
+                width='stretch',
+            )
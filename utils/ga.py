@@ -0,0 +1,176 @@
+"""GA4 분석 공통 모듈 (페이지 × 이벤트 일별 누적합 큐브)"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datetime import date
+from . import duck
+from .cube import DailyCube, shift_window
+from .metrics import safe_divide
+from .data_loader import data_version
+
+
+# 합산 지표 (존재하는 컬럼만 사용)
+# 평균 세션시간은 합산 가능한 총 세션시간(session_duration) / sessions 로 계산
+# 사용자 수(activeUsers · newUsers)는 행 사이에 중복되므로 합산하지 않고 *_ga_user 테이블에서만 읽는다
+GA_SUM_METRICS = ['eventCount', 'sessions', 'session_duration']
+# 사용자 지표 테이블(*_ga_user) 중 합산 가능한 지표 (active28DayUsers 등 롤링 지표 제외)
+GA_USER_METRICS = ['activeUsers', 'newUsers', 'sessions']
+# 세션 지표를 읽는 이벤트: 이벤트 행마다 같은 세션이 반복 집계되므로 페이지당 page_view 행의 세션만 사용
+SESSION_EVENT = 'page_view'
+NOT_SET = '(not set)'
+
+
+class GaCube:
+    """(pageTitle, eventName) 차원의 일별 누적합 큐브
+
+    기준일(하루)이든 임의 기간이든 누적합 차이로 페이지/이벤트 집계를 만들므로
+    원본 이벤트 프레임을 다시 훑지 않고, 기간 길이와 무관하게 즉시 계산된다.
+    table: 같은 프레임의 Arrow 테이블 — 있으면 (pageTitle, eventName) 집계는 DuckDB로 계산
+    """
+
+    def __init__(self, df: pd.DataFrame, table=None):
+        self.table = table
+        self.metrics = [m for m in GA_SUM_METRICS if m in df.columns]
+        self.has_page = 'pageTitle' in df.columns
+        self.has_event = 'eventName' in df.columns
+        self.has_duration = {'session_duration', 'sessions'} <= set(self.metrics)
+
+        # 원본 이벤트 행 / 서버 측 일별 집계(*_ga_page_daily) 모두 합계만으로 재집계 가능
+        self.dim = tuple(c for c in ('pageTitle', 'eventName') if c in df.columns) or None
+        self.cube = DailyCube(df, self.metrics, dims=[self.dim] if self.dim else ())
+        day_rows = np.diff(self.cube.cum_rows)
+        self.dates = [pd.Timestamp(self.cube.start) + pd.Timedelta(days=int(i))
+                      for i in np.flatnonzero(day_rows > 0)]
+
+    def frame(self, start: date, end: date) -> pd.DataFrame:
+        """기간 내 (pageTitle, eventName)별 합계"""
+        if self.dim is None:
+            return pd.DataFrame()
+        if self.table is not None:
+            return duck.group_by(self.table, self.dim, self.cube.measures, start, end)
+        return self.cube.by(self.dim, start, end)
+
+    def total(self, start: date, end: date, metric: str) -> float:
+        """기간 지표 합계 (eventCount 등 이벤트 지표 — 세션 · 사용자 수는 *_ga_user 기준으로 볼 것)"""
+        if metric not in self.metrics:
+            return 0
+        return self.cube.totals(start, end)[metric]
+
+    def avg_duration(self, start: date, end: date) -> float:
+        """기간 평균 세션시간 (페이지 단위 세션 가중: page_view 행의 총 세션시간 / 세션 수)"""
+        if not self.has_duration:
+            return 0
+        if self.dim is None:
+            tot = self.cube.totals(start, end)
+        else:
+            tot = _session_rows(self.frame(start, end))[['session_duration', 'sessions']].sum()
+        return safe_divide(tot['session_duration'], tot['sessions'], default=0, scale=1)
+
+    def page_entry(self, start: date, end: date, top: int | None = 20) -> pd.DataFrame:
+        """pageTitle별 page_view / click / 진입률"""
+        return page_entry(self.frame(start, end), top) if self.has_event else pd.DataFrame()
+
+    def page_duration(self, start: date, end: date, top: int | None = 20) -> pd.DataFrame:
+        """pageTitle별 평균 세션시간(세션 가중) / 세션수"""
+        return page_duration(self.frame(start, end), top) if self.has_duration else pd.DataFrame()
+
+    def event_mix(self, start: date, end: date, top: int | None = 15) -> pd.DataFrame:
+        """eventName별 이벤트 수"""
+        return event_mix(self.frame(start, end), top) if self.has_event else pd.DataFrame()
+
+    def compare_pages(self, start: date, end: date, mode: str = "prev", top: int = 20) -> pd.DataFrame:
+        """현재 기간 vs 비교 기간 pageTitle별 진입률 (현재 기간 page_view 상위 top개)"""
+        curr = self.page_entry(start, end, top)
+        if curr.empty:
+            return curr
+        prev = self.page_entry(*shift_window(start, end, mode), top=None)
+        if prev.empty:
+            prev = pd.DataFrame(columns=['pageTitle', 'page_view', 'click', '진입률(click/pv)'])
+        prev = prev.rename(columns={'page_view': '비교_page_view', 'click': '비교_click',
+                                    '진입률(click/pv)': '비교_진입률'})
+        out = curr.merge(prev, on='pageTitle', how='left').fillna(0)
+        out['진입률 증감(%p)'] = out['진입률(click/pv)'] - out['비교_진입률']
+        return out
+
+    def compare_events(self, start: date, end: date, mode: str = "prev", top: int = 15) -> pd.DataFrame:
+        """현재 기간 vs 비교 기간 eventName별 이벤트 수 (현재 기간 상위 top개)"""
+        curr = self.event_mix(start, end, top)
+        if curr.empty:
+            return curr
+        prev = self.event_mix(*shift_window(start, end, mode), top=None)
+        if prev.empty:
+            prev = pd.DataFrame(columns=['eventName', 'eventCount'])
+        out = curr.merge(prev.rename(columns={'eventCount': '비교_eventCount'}),
+                         on='eventName', how='left').fillna(0)
+        c, p = out['eventCount'].to_numpy(dtype=float), out['비교_eventCount'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out['증감률(%)'] = np.where(p != 0, (c - p) / p * 100, 0.0)
+        return out
+
+
+def _session_rows(frame: pd.DataFrame) -> pd.DataFrame:
+    """세션 지표를 합산할 행 — eventName 차원이 있으면 page_view 행만
+
+    GA4는 (페이지, 이벤트) 행마다 그 이벤트가 있었던 세션을 세므로 이벤트 행을 모두 더하면
+    세션이 이벤트 종류 수만큼 중복된다. 페이지를 본 세션은 모두 page_view 행에 잡히므로 이 행만
+    쓰면 페이지 단위 세션 수가 된다 (media_key 등 나머지 차원의 행은 그대로 합산).
+    """
+    if frame.empty or 'eventName' not in frame.columns:
+        return frame
+    return frame[frame['eventName'] == SESSION_EVENT]
+
+
+def _pages(frame: pd.DataFrame) -> pd.DataFrame:
+    if frame.empty or 'pageTitle' not in frame.columns:
+        return pd.DataFrame()
+    return frame[frame['pageTitle'].notna() & (frame['pageTitle'] != NOT_SET)]
+
+
+def page_entry(frame: pd.DataFrame, top: int | None = 20) -> pd.DataFrame:
+    """(pageTitle, eventName) 합계 → pageTitle별 page_view / click / 진입률"""
+    pages = _pages(frame)
+    if pages.empty or 'eventCount' not in pages.columns:
+        return pd.DataFrame()
+    pv = pages[pages['eventName'] == 'page_view'].groupby('pageTitle')['eventCount'].sum().rename('page_view')
+    cl = pages[pages['eventName'] == 'click'].groupby('pageTitle')['eventCount'].sum().rename('click')
+    entry = pd.concat([pv, cl], axis=1).fillna(0).reset_index()
+    if entry.empty:
+        return entry
+    pv_v, cl_v = entry['page_view'].to_numpy(dtype=float), entry['click'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entry['진입률(click/pv)'] = np.where(pv_v > 0, cl_v / pv_v * 100, 0.0)
+    entry = entry[entry['page_view'] > 0].sort_values('page_view', ascending=False)
+    return entry.head(top) if top else entry
+
+
+def page_duration(frame: pd.DataFrame, top: int | None = 20) -> pd.DataFrame:
+    """(pageTitle, eventName) 합계 → pageTitle별 평균 세션시간(페이지 단위 세션 가중) / 세션수"""
+    pages = _session_rows(_pages(frame))
+    if pages.empty or 'session_duration' not in pages.columns:
+        return pd.DataFrame()
+    g = pages.groupby('pageTitle').agg(
+        총세션시간=('session_duration', 'sum'), 세션수=('sessions', 'sum')
+    ).reset_index()
+    g = g[g['세션수'] > 0]
+    g['평균세션시간'] = g['총세션시간'] / g['세션수']
+    g = g[['pageTitle', '평균세션시간', '세션수']].sort_values('평균세션시간', ascending=False)
+    return g.head(top) if top else g
+
+
+def event_mix(frame: pd.DataFrame, top: int | None = 15) -> pd.DataFrame:
+    """(pageTitle, eventName) 합계 → eventName별 이벤트 수"""
+    if frame.empty or 'eventName' not in frame.columns or 'eventCount' not in frame.columns:
+        return pd.DataFrame()
+    evt = frame.groupby('eventName')['eventCount'].sum().reset_index()
+    evt = evt[evt['eventCount'] > 0].sort_values('eventCount', ascending=False)
+    return evt.head(top) if top else evt
+
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _build_ga_cube(version: str, _df: pd.DataFrame) -> GaCube:
+    return GaCube(_df, duck.arrow_table((version,), _df) if duck.available() else None)
+
+
+def get_ga_cube(df: pd.DataFrame) -> GaCube:
+    """데이터 버전별로 1회만 생성되어 세션 간 공유되는 GA 큐브"""
+    return _build_ga_cube(data_version(df), df)
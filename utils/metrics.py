@@ -2,7 +2,6 @@
 import pandas as pd
 import numpy as np
 import streamlit as st
-from datetime import timedelta
 
 
 def safe_divide(numerator, denominator, default=0, scale=100):
@@ -40,71 +39,52 @@ def format_pct(n):
     return f"{n:,.1f}%"
 
 
-def get_comparison_metrics(df, start_date, end_date):
-    """현재 기간 vs 이전 기간 비교 메트릭 계산"""
-    if df.empty or 'date' not in df.columns:
-        empty_series = pd.Series(dtype=float)
-        return empty_series, empty_series, lambda x: 0.0, lambda x, y, z: 0.0
+# 집계 단위: 'W' 주(월요일 시작), 'M' 월(1일 시작), 정수 N은 anchor 기준 N일 단위
+PERIOD_FREQS = {'W': '주단위 (월요일 기준)', 'M': '월단위'}
+_MONDAY = np.datetime64('1970-01-05', 'D')
 
-    numeric_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
-    if not numeric_cols:
-        empty_series = pd.Series(dtype=float)
-        return empty_series, empty_series, lambda x: 0.0, lambda x, y, z: 0.0
 
-    curr_mask = (df['date'].dt.date >= start_date) & (df['date'].dt.date <= end_date)
-    curr_df = df[curr_mask]
-
-    duration = (end_date - start_date).days + 1
-    prev_end = start_date - timedelta(days=1)
-    prev_start = prev_end - timedelta(days=duration - 1)
-
-    prev_mask = (df['date'].dt.date >= prev_start) & (df['date'].dt.date <= prev_end)
-    prev_df = df[prev_mask]
-
-    curr_sums = curr_df[numeric_cols].sum() if not curr_df.empty else pd.Series(0, index=numeric_cols)
-    prev_sums = prev_df[numeric_cols].sum() if not prev_df.empty else pd.Series(0, index=numeric_cols)
-
-    def get_delta(col):
-        c = curr_sums.get(col, 0)
-        p = prev_sums.get(col, 0)
-        return safe_divide(c - p, p, default=0, scale=100)
-
-    def get_rate_delta(numerator_col, denominator_col, scale=100):
-        cn = curr_sums.get(numerator_col, 0)
-        cd = curr_sums.get(denominator_col, 0)
-        pn = prev_sums.get(numerator_col, 0)
-        pd_val = prev_sums.get(denominator_col, 0)
-
-        curr_rate = safe_divide(cn, cd, default=0, scale=scale)
-        prev_rate = safe_divide(pn, pd_val, default=0, scale=scale)
-
-        return round(curr_rate - prev_rate, 1)
-
-    return curr_sums, prev_sums, get_delta, get_rate_delta
+def period_start(dates: pd.Series, freq='W', anchor=None) -> pd.Series:
+    """날짜 → 구간 시작일 (정수 일 연산으로 벡터화, 결측은 NaT 유지)"""
+    days = dates.to_numpy(dtype='datetime64[D]')
+    if freq == 'M':
+        starts = days.astype('datetime64[M]').astype('datetime64[D]')
+    else:
+        step = 7 if freq == 'W' else int(freq)
+        base = _MONDAY if anchor is None else np.datetime64(pd.Timestamp(anchor).date(), 'D')
+        nat = np.isnat(days)
+        offset = np.where(nat, 0, (days - base).astype('int64'))
+        starts = base + (offset // step) * step
+        starts[nat] = np.datetime64('NaT')
+    return pd.Series(starts.astype('datetime64[ns]'), index=dates.index, name='period')
 
 
-def make_weekly(df, date_col='date', group_col=None):
-    """일별 데이터를 주별로 집계"""
+def make_periodic(df, date_col='date', group_col=None, freq='W', anchor=None):
+    """일별 데이터를 주/월/N일 구간으로 집계 (원본 복사 없이 구간 키로 바로 groupby)"""
     if df.empty or date_col not in df.columns:
         return pd.DataFrame()
 
-    t = df.copy()
     try:
-        t['week_start'] = t[date_col].dt.to_period('W').apply(lambda x: x.start_time)
+        keys = [period_start(df[date_col], freq, anchor)]
     except Exception as e:
-        st.warning(f"주 단위 변환 중 오류: {e}")
+        st.warning(f"기간 단위 변환 중 오류: {e}")
         return pd.DataFrame()
 
-    nums = [c for c in t.columns if pd.api.types.is_numeric_dtype(t[c]) and c != date_col]
+    nums = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c]) and c != date_col]
     if not nums:
         return pd.DataFrame()
 
-    if group_col and group_col in t.columns:
-        r = t.groupby(['week_start', group_col], dropna=False)[nums].sum().reset_index()
-    else:
-        r = t.groupby('week_start', dropna=False)[nums].sum().reset_index()
+    if group_col and group_col in df.columns:
+        keys.append(df[group_col])
+    r = df.groupby(keys, dropna=False)[nums].sum().reset_index()
 
     if r.empty:
         return pd.DataFrame()
 
-    return r.rename(columns={'week_start': 'week'})
+    return r
+
+
+def make_weekly(df, date_col='date', group_col=None):
+    """일별 데이터를 주별(월요일 시작)로 집계"""
+    r = make_periodic(df, date_col, group_col, freq='W')
+    return r.rename(columns={'period': 'week'}) if not r.empty else r